@@ -0,0 +1,294 @@
+"""Benchmark every graph declared in the repo's langgraph.json files against the fake chat model.
+
+Discovers the graphs in module-*/studio/langgraph.json and module-*/deployment/langgraph.json
+and runs each one in its own interpreter, from its own directory, with CHAT_MODEL=fake
+(see fake_chat_model.py) and a MemorySaver and InMemoryStore attached. Every request is a
+new thread. Runs that stop at an interrupt are resumed with no input, as a user
+approving would, up to --max-resumes times.
+
+Message graphs get one of a few sample user messages. Other graphs get recorded inputs
+from --inputs, a JSON file mapping graph names to lists of inputs (benchmark_inputs.json
+by default), or inputs generated from their input schema. For each concurrency level,
+reports p50/p95/p99 latency, throughput, peak RSS and the time spent in each node, and
+saves everything as JSON:
+
+    python benchmark_graphs.py --concurrency 1,4,16 --requests 64 --profile fast --output results.json
+
+Compare the results of two commits with:
+
+    python benchmark_graphs.py --compare before.json after.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# User messages for graphs whose input is a list of messages
+SAMPLE_MESSAGES = [
+    "Hi, I'm Lance. I live in San Francisco and I like to bike around the city.",
+    "Add a ToDo: book a flight to Tokyo by Friday.",
+    "What is 3 + 4 * 2?",
+    "Can you summarize what we talked about so far?",
+    "Multiply 3 and 4, then add 5.",
+]
+
+def discover() -> list[tuple[str, str]]:
+    """(directory, graph name) for every graph in the repo's langgraph.json files, relative to the repo root."""
+    graphs = []
+    for pattern in ("module-*/studio/langgraph.json", "module-*/deployment/langgraph.json"):
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            with open(path) as f:
+                names = json.load(f)["graphs"]
+            graphs += [(os.path.relpath(os.path.dirname(path), ROOT), name) for name in names]
+    return graphs
+
+def percentiles(latencies: list[float]) -> dict:
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(latencies, n=100)
+    return {"p50_ms": cuts[49], "p95_ms": cuts[94], "p99_ms": cuts[98]}
+
+## Worker: runs one graph in the current process
+
+def synthetic_inputs(graph, count: int) -> list[dict]:
+    from fake_chat_model import generate_value
+    import random
+
+    if "messages" in graph.channels:
+        return [{"messages": [{"role": "user", "content": SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]}]} for i in range(count)]
+    schema = graph.get_input_jsonschema()
+    return [generate_value(schema, random.Random(i), schema.get("$defs", {}), []) for i in range(count)]
+
+class NodeTimer:
+    """Callback handler that adds up the wall time of every top-level node run, by node name.
+
+    Nodes of subgraphs (including Trustcall's extractor graph) count toward the node that
+    runs them.
+    """
+
+    def __init__(self):
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        timer = self
+        self._lock = Lock()
+        self._starts: dict = {}
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+
+        class Handler(BaseCallbackHandler):
+            def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, name=None, **kwargs):
+                # A node's own run is the chain named after the node; runs inside it are skipped,
+                # and so are nodes of subgraphs, whose checkpoint namespace is nested
+                metadata = metadata or {}
+                node = metadata.get("langgraph_node")
+                if node is not None and node != "__start__" and name == node and "|" not in metadata.get("langgraph_checkpoint_ns", ""):
+                    with timer._lock:
+                        timer._starts[run_id] = (node, time.perf_counter())
+
+            def on_chain_end(self, outputs, *, run_id, **kwargs):
+                timer._finish(run_id)
+
+            def on_chain_error(self, error, *, run_id, **kwargs):
+                timer._finish(run_id)
+
+        self.handler = Handler()
+
+    def _finish(self, run_id) -> None:
+        with self._lock:
+            start = self._starts.pop(run_id, None)
+            if start is not None:
+                self.totals[start[0]] += time.perf_counter() - start[1]
+                self.calls[start[0]] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._starts.clear()
+            self.totals.clear()
+            self.calls.clear()
+
+def run_worker(directory: str, name: str, options: dict) -> dict:
+    import importlib
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.store.memory import InMemoryStore
+
+    os.chdir(os.path.join(ROOT, directory))
+    sys.path.insert(0, os.getcwd())
+    with open("langgraph.json") as f:
+        path = json.load(f)["graphs"][name]
+    module, _, attribute = path.partition(":")
+    module = module.removeprefix("./").removesuffix(".py").replace("/", ".")
+
+    start = time.perf_counter()
+    graph = getattr(importlib.import_module(module), attribute)
+    import_ms = (time.perf_counter() - start) * 1000
+    graph = graph.copy(update={"checkpointer": MemorySaver(), "store": InMemoryStore()})
+
+    inputs = options["inputs"] or synthetic_inputs(graph, options["requests"])
+    timer = NodeTimer()
+
+    def request(i: int) -> tuple[float, str]:
+        """Run one request on a new thread; return its latency and outcome."""
+        config = {"configurable": {"thread_id": str(uuid.uuid4()), "user_id": f"user-{i % 8}"}, "callbacks": [timer.handler]}
+        start = time.perf_counter()
+        try:
+            graph.invoke(inputs[i % len(inputs)], config)
+            for _ in range(options["max_resumes"]):
+                if not graph.get_state(config).next:
+                    break
+                graph.invoke(None, config)
+            outcome = "interrupted" if graph.get_state(config).next else "ok"
+        except Exception as error:
+            outcome = f"error: {type(error).__name__}: {error}"
+        return (time.perf_counter() - start) * 1000, outcome
+
+    # Warm up caches and lazily built models, so the first level does not pay for them
+    request(0)
+
+    levels = []
+    for concurrency in options["concurrency"]:
+        timer.reset()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(request, range(options["requests"])))
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for latency, outcome in results if outcome == "ok"]
+        errors = sorted({outcome for _, outcome in results if outcome.startswith("error")})
+        levels.append({
+            "concurrency": concurrency,
+            "requests": len(results),
+            "ok": len(latencies),
+            "interrupted": sum(outcome == "interrupted" for _, outcome in results),
+            "errors": len([1 for _, outcome in results if outcome.startswith("error")]),
+            "first_error": errors[0] if errors else None,
+            **percentiles(latencies),
+            "throughput_rps": len(results) / elapsed,
+            # ru_maxrss is in KB on Linux, and the peak of the process so far
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "nodes": {
+                node: {"calls": timer.calls[node], "total_ms": total * 1000, "ms_per_request": total * 1000 / len(results)}
+                for node, total in sorted(timer.totals.items(), key=lambda item: -item[1])
+            },
+        })
+    return {"directory": directory, "graph": name, "import_ms": import_ms, "levels": levels}
+
+## Driver: one worker process per graph
+
+def run_graph(directory: str, name: str, options: dict, env: dict) -> dict:
+    with tempfile.NamedTemporaryFile("r", suffix=".json") as result:
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", directory, name, json.dumps(options), result.name],
+            env=env, capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            lines = process.stderr.strip().splitlines() or ["worker failed"]
+            return {"directory": directory, "graph": name, "error": lines[-1]}
+        return json.load(result)
+
+def print_results(results: list[dict]) -> None:
+    print(f"{'graph':<38} {'conc':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'RSS MB':>7} {'ok':>4} {'intr':>4} {'err':>4}")
+    for result in results:
+        label = f"{result['directory'].split('/')[0]}/{result['graph']}"
+        if "error" in result:
+            print(f"{label:<38} failed: {result['error']}")
+            continue
+        for level in result["levels"]:
+            print(f"{label:<38} {level['concurrency']:>4} {level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} {level['p99_ms']:>9.1f} "
+                  f"{level['throughput_rps']:>8.1f} {level['peak_rss_mb']:>7.0f} {level['ok']:>4} {level['interrupted']:>4} {level['errors']:>4}")
+        # Node breakdown at the lowest concurrency, where node times are not inflated by contention
+        nodes = result["levels"][0]["nodes"]
+        if nodes:
+            print("    " + ", ".join(f"{node} {stats['ms_per_request']:.1f}" for node, stats in nodes.items()) + "  (ms per request)")
+        if result["levels"][0]["first_error"]:
+            print(f"    {result['levels'][0]['first_error'][:120]}")
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before['commit'][:10]} -> {after['commit'][:10]}")
+    print(f"{'graph':<38} {'conc':>4} {'p50 ms':>18} {'p99 ms':>18} {'req/s':>16}")
+    old = {(r["directory"], r["graph"], level["concurrency"]): level for r in before["results"] if "levels" in r for level in r["levels"]}
+    change = lambda a, b: f"{a:>7.1f}->{b:<7.1f}{(b - a) / a * 100 if a else 0.0:+.0f}%"
+    for result in after["results"]:
+        for level in result.get("levels", []):
+            previous = old.get((result["directory"], result["graph"], level["concurrency"]))
+            if previous is None:
+                continue
+            label = f"{result['directory'].split('/')[0]}/{result['graph']}"
+            print(f"{label:<38} {level['concurrency']:>4} {change(previous['p50_ms'], level['p50_ms']):>18} "
+                  f"{change(previous['p99_ms'], level['p99_ms']):>18} {change(previous['throughput_rps'], level['throughput_rps']):>16}")
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        directory, name, options, result_path = sys.argv[2:6]
+        result = run_worker(directory, name, json.loads(options))
+        with open(result_path, "w") as f:
+            json.dump(result, f)
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrent requests")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per graph and concurrency level")
+    parser.add_argument("--profile", default="fast", help="Fake model latency profile: instant, fast or gpt-4o")
+    parser.add_argument("--graphs", default="", help="Comma-separated graph names or module-N/name to run; all by default")
+    parser.add_argument("--inputs", default=os.path.join(ROOT, "benchmark_inputs.json"), help="JSON file mapping graph names to lists of recorded inputs")
+    parser.add_argument("--max-resumes", type=int, default=3, help="Resumes of a run that stops at an interrupt")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two saved results and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    recorded = {}
+    if args.inputs and os.path.exists(args.inputs):
+        with open(args.inputs) as f:
+            recorded = json.load(f)
+    wanted = set(filter(None, args.graphs.split(",")))
+    graphs = [(d, name) for d, name in discover() if not wanted or name in wanted or f"{d.split('/')[0]}/{name}" in wanted]
+
+    env = {**os.environ, "CHAT_MODEL": "fake", "FAKE_MODEL_PROFILE": args.profile}
+    results = []
+    for directory, name in graphs:
+        options = {
+            "concurrency": [int(c) for c in args.concurrency.split(",")],
+            "requests": args.requests,
+            "max_resumes": args.max_resumes,
+            "inputs": recorded.get(f"{directory.split('/')[0]}/{name}") or recorded.get(name),
+        }
+        print(f"Running {directory}/{name} ...", file=sys.stderr)
+        results.append(run_graph(directory, name, options, env))
+
+    print_results(results)
+    commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    with open(args.output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "profile": args.profile,
+            "requests": args.requests,
+            "results": results,
+        }, f, indent=2)
+    print(f"Saved {args.output}")
+
+if __name__ == "__main__":
+    main()
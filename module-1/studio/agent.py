@@ -1,9 +1,18 @@
-from langchain_core.messages import SystemMessage
-from langchain_openai import ChatOpenAI
+import time
+from functools import lru_cache
 
-from langgraph.graph import START, StateGraph, MessagesState
-from langgraph.prebuilt import tools_condition, ToolNode
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
+from langgraph.graph import START, END, StateGraph
+from langgraph.prebuilt import tools_condition
+
+from batched_tools import BatchedToolNode
+from delta_messages import MessagesBase
+from fast_path import ArithmeticFastPath
+from lazy import chat_model, use_fake_model
+from tool_cache import pure, tool_results
+
+@pure
 def add(a: int, b: int) -> int:
     """Adds a and b.
 
@@ -13,6 +22,7 @@ def add(a: int, b: int) -> int:
     """
     return a + b
 
+@pure
 def multiply(a: int, b: int) -> int:
     """Multiplies a and b.
 
@@ -22,6 +32,7 @@ def multiply(a: int, b: int) -> int:
     """
     return a * b
 
+@pure
 def divide(a: int, b: int) -> float:
     """Divide a and b.
 
@@ -33,22 +44,43 @@ def divide(a: int, b: int) -> float:
 
 tools = [add, multiply, divide]
 
-# Define LLM with bound tools
-llm = ChatOpenAI(model="gpt-4o")
-llm_with_tools = llm.bind_tools(tools)
+# Define LLM with bound tools, built on first use for each CHAT_MODEL setting
+def llm_with_tools():
+    return _llm_with_tools(use_fake_model())
+
+@lru_cache(maxsize=None)
+def _llm_with_tools(fake: bool):
+    return chat_model().bind_tools(tools)
 
 # System message
 sys_msg = SystemMessage(content="You are a helpful assistant tasked with writing performing arithmetic on a set of inputs.")
 
-# Node
-def assistant(state: MessagesState):
-   return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+# Answers plain arithmetic prompts with the tools directly, without the LLM
+fast_path = ArithmeticFastPath(tools)
+
+# Nodes
+def answer_locally(state: MessagesBase):
+   last = state["messages"][-1]
+   answer = fast_path.answer(last.content) if isinstance(last, HumanMessage) else None
+   return {"messages": [AIMessage(content=answer)]} if answer is not None else {}
+
+def route_fast_path(state: MessagesBase):
+   # Answered locally -> END; anything else -> assistant
+   return END if isinstance(state["messages"][-1], AIMessage) else "assistant"
+
+def assistant(state: MessagesBase):
+   start = time.perf_counter()
+   response = llm_with_tools().invoke([sys_msg] + state["messages"])
+   fast_path.record_llm_call(time.perf_counter() - start)
+   return {"messages": [response]}
 
 # Build graph
-builder = StateGraph(MessagesState)
+builder = StateGraph(MessagesBase)
+builder.add_node("fast_path", answer_locally)
 builder.add_node("assistant", assistant)
-builder.add_node("tools", ToolNode(tools))
-builder.add_edge(START, "assistant")
+builder.add_node("tools", BatchedToolNode(tools, wrap_tool_call=tool_results))
+builder.add_edge(START, "fast_path")
+builder.add_conditional_edges("fast_path", route_fast_path, ["assistant", END])
 builder.add_conditional_edges(
     "assistant",
     # If the latest message (result) from assistant is a tool call -> tools_condition routes to tools
@@ -0,0 +1,94 @@
+"""Benchmark BatchedToolNode against ToolNode on turns with many arithmetic tool calls.
+
+Each turn is one AIMessage with --calls tool calls spread over add, multiply and divide,
+run through a graph whose only node is the tool node. Checks that both nodes return the
+same ToolMessages, then reports turn latency.
+
+    python benchmark_batched_tools.py --calls 1000 --turns 20
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import MessagesState, StateGraph, START, END
+from langgraph.prebuilt import ToolNode
+
+from batched_tools import BatchedToolNode
+
+def add(a: int, b: int) -> int:
+    """Adds a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a + b
+
+def multiply(a: int, b: int) -> int:
+    """Multiplies a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a * b
+
+def divide(a: int, b: int) -> float:
+    """Divide a and b.
+
+    Args:
+        a: first int
+        b: second int
+    """
+    return a / b
+
+tools = [add, multiply, divide]
+
+def build(node):
+    builder = StateGraph(MessagesState)
+    builder.add_node("tools", node)
+    builder.add_edge(START, "tools")
+    builder.add_edge("tools", END)
+    return builder.compile()
+
+def make_turn(calls: int) -> AIMessage:
+    tool_calls = [
+        {"name": random.choice(["add", "multiply", "divide"]), "args": {"a": random.randint(-1000, 1000), "b": random.randint(1, 1000)}, "id": str(uuid.uuid4())}
+        for _ in range(calls)
+    ]
+    return AIMessage(content="", tool_calls=tool_calls)
+
+def run(graph, turns: list[AIMessage]) -> tuple[list[float], list]:
+    latencies, outputs = [], []
+    for turn in turns:
+        start = time.perf_counter()
+        output = graph.invoke({"messages": [turn]})
+        latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append(output["messages"][1:])
+    return latencies, outputs
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000, help="Tool calls per turn")
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    turns = [make_turn(args.calls) for _ in range(args.turns)]
+    baseline, expected = run(build(ToolNode(tools)), turns)
+    batched, actual = run(build(BatchedToolNode(tools)), turns)
+    # Compare the fields ToolNode sets; message IDs are assigned per run
+    fields = lambda messages: [(m.content, m.name, m.tool_call_id, m.status) for m in messages]
+    assert all(fields(e) == fields(a) for e, a in zip(expected, actual)), "BatchedToolNode output differs from ToolNode"
+
+    print(f"{args.calls} tool calls per turn, {args.turns} turns")
+    print(f"{'node':<18} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, latencies in (("ToolNode", baseline), ("BatchedToolNode", batched)):
+        quantiles = statistics.quantiles(latencies, n=20)
+        print(f"{name:<18} {quantiles[9]:>9.2f} {quantiles[18]:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark the agent's arithmetic fast path on a mix of prompts.
+
+Runs --prompts prompts, a --arithmetic share of them plain arithmetic and the rest not,
+through ArithmeticFastPath. Checks every local answer against Python, then reports the
+hit rate, local answer time and the LLM latency saved, assuming each LLM call takes
+--llm-latency-ms.
+
+    python benchmark_fast_path.py --prompts 10000 --arithmetic 0.5 --llm-latency-ms 800
+"""
+import argparse
+import random
+import statistics
+import time
+
+from fast_path import ArithmeticFastPath
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+def multiply(a: int, b: int) -> int:
+    return a * b
+
+def divide(a: int, b: int) -> float:
+    return a / b
+
+tools = [add, multiply, divide]
+
+OTHER_PROMPTS = [
+    "What is the capital of France?",
+    "Multiply 3 and 4, then explain why",
+    "What is 7 minus 2?",
+    "Add 1.5 and 2",
+    "Tell me a joke about numbers",
+    "Divide 10 and 2",
+]
+
+def arithmetic_prompt() -> tuple[str, float]:
+    """A random arithmetic prompt and its expected answer."""
+    a, b, c = random.randint(1, 1000), random.randint(1, 1000), random.randint(1, 100)
+    return random.choice([
+        (f"Multiply {a} and {b}, then add {c}", a * b + c),
+        (f"What is {a} + {b} * {c}?", a + b * c),
+        (f"Divide {a} by {c}", a / c),
+        (f"Add {a} and {b}, then divide the result by {c}", (a + b) / c),
+        (f"{a} plus {b} times {c}", a + b * c),
+    ])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=10000)
+    parser.add_argument("--arithmetic", type=float, default=0.5, help="Share of prompts that are plain arithmetic")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Assumed latency of one LLM call")
+    args = parser.parse_args()
+
+    random.seed(0)
+    prompts = [arithmetic_prompt() if random.random() < args.arithmetic else (random.choice(OTHER_PROMPTS), None) for _ in range(args.prompts)]
+
+    fast_path = ArithmeticFastPath(tools)
+    fast_path.record_llm_call(args.llm_latency_ms / 1000)
+    latencies = []
+    for text, expected in prompts:
+        start = time.perf_counter()
+        answer = fast_path.answer(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        # Prompts the fast path is unsure of must fall through, and its answers must be right
+        assert (answer is None) == (expected is None), text
+        assert answer is None or answer == str(expected), text
+
+    stats = fast_path.stats()
+    quantiles = statistics.quantiles(latencies, n=20)
+    print(f"{stats['prompts']} prompts, {args.arithmetic:.0%} arithmetic, {args.llm_latency_ms:.0f} ms per LLM call")
+    print(f"hit rate         {stats['hit_rate']:>10.1%}")
+    print(f"local p50 / p95  {quantiles[9]:>7.1f} / {quantiles[18]:.1f} us")
+    print(f"LLM calls saved  {stats['llm_calls_saved']:>10}")
+    print(f"latency saved    {stats['latency_saved_seconds']:>10.1f} s ({stats['latency_saved_seconds'] / stats['prompts'] * 1000:.0f} ms per prompt)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark LangGraph's own orchestration overhead on simple.py-style graphs.
+
+The graphs have no model calls: --depth layers of --width nodes, each node appending a
+word to the state like simple.py's nodes (without printing), and each layer joined on
+the previous one, so a run takes `depth` supersteps over `width * depth` nodes. Every
+width and depth is run with and without a checkpointer through invoke, batch, stream
+and ainvoke.
+
+Reports latency per input, overhead per node (run latency / nodes), throughput and the
+peak memory allocated during a run, traced with tracemalloc in a separate pass.
+
+    python benchmark_graph_overhead.py --widths 1,4,16 --depths 1,4,16 --runs 50
+"""
+import argparse
+import asyncio
+import operator
+import statistics
+import time
+import tracemalloc
+import uuid
+from typing import Annotated
+from typing_extensions import TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+
+MODES = ["invoke", "batch", "stream", "ainvoke"]
+
+# State: parallel nodes in a layer all append to graph_state
+class State(TypedDict):
+    graph_state: Annotated[str, operator.add]
+
+def node(state):
+    return {"graph_state": " I am"}
+
+def build(width: int, depth: int) -> StateGraph:
+    builder = StateGraph(State)
+    previous = [START]
+    for layer in range(depth):
+        names = [f"node_{layer}_{i}" for i in range(width)]
+        for name in names:
+            builder.add_node(name, node)
+            # A list of sources waits for all of them, so each layer is one superstep
+            builder.add_edge(previous if len(previous) > 1 else previous[0], name)
+        previous = names
+    builder.add_edge(previous if len(previous) > 1 else previous[0], END)
+    return builder
+
+def config(checkpointed: bool) -> dict:
+    # Each run gets its own thread so checkpoints do not pile up in one history
+    return {"configurable": {"thread_id": str(uuid.uuid4())}} if checkpointed else {}
+
+def run_once(graph, mode: str, checkpointed: bool, batch_size: int, loop: asyncio.AbstractEventLoop) -> int:
+    """Run the graph once in `mode` and return the number of inputs processed."""
+    inputs = {"graph_state": "Hi, this is Lance."}
+    if mode == "invoke":
+        graph.invoke(inputs, config(checkpointed))
+        return 1
+    if mode == "batch":
+        graph.batch([inputs] * batch_size, [config(checkpointed) for _ in range(batch_size)])
+        return batch_size
+    if mode == "stream":
+        for _ in graph.stream(inputs, config(checkpointed), stream_mode="updates"):
+            pass
+        return 1
+    # One event loop for every ainvoke, so its startup is not counted as graph overhead
+    loop.run_until_complete(graph.ainvoke(inputs, config(checkpointed)))
+    return 1
+
+def measure(graph, mode: str, checkpointed: bool, runs: int, batch_size: int, loop: asyncio.AbstractEventLoop) -> dict:
+    run = lambda: run_once(graph, mode, checkpointed, batch_size, loop)
+    # Warm up, so compiled channels and caches do not count against the first run
+    for _ in range(3):
+        run()
+
+    # `runs` counts inputs, so a batch call covers batch_size of them
+    calls = max(runs // batch_size, 2) if mode == "batch" else runs
+    latencies, inputs, start = [], 0, time.perf_counter()
+    for _ in range(calls):
+        run_start = time.perf_counter()
+        count = run()
+        latencies.append((time.perf_counter() - run_start) * 1000 / count)
+        inputs += count
+    elapsed = time.perf_counter() - start
+
+    # Allocations are traced in a separate pass, since tracemalloc slows every allocation
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(calls, 10)):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        count = run()
+        peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024 / count)
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(latencies, n=20)
+    return {"p50": quantiles[9], "p95": quantiles[18], "throughput": inputs / elapsed, "peak_kb": statistics.median(peaks)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--widths", default="1,4,16", help="Comma-separated nodes per layer")
+    parser.add_argument("--depths", default="1,4,16", help="Comma-separated number of layers")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--runs", type=int, default=50, help="Inputs per configuration and mode")
+    parser.add_argument("--batch-size", type=int, default=16, help="Inputs per batch call")
+    args = parser.parse_args()
+
+    widths = [int(w) for w in args.widths.split(",")]
+    depths = [int(d) for d in args.depths.split(",")]
+    modes = args.modes.split(",")
+    loop = asyncio.new_event_loop()
+
+    print(f"{'width':>5} {'depth':>5} {'checkpointer':<12} {'mode':<8} {'p50 ms':>9} {'p95 ms':>9} {'us/node':>9} {'inputs/s':>9} {'peak KB':>9}")
+    for width in widths:
+        for depth in depths:
+            builder = build(width, depth)
+            for checkpointer in (None, MemorySaver()):
+                graph = builder.compile(checkpointer=checkpointer)
+                for mode in modes:
+                    result = measure(graph, mode, checkpointer is not None, args.runs, args.batch_size, loop)
+                    per_node = result["p50"] * 1000 / (width * depth)
+                    name = "MemorySaver" if checkpointer else "none"
+                    print(f"{width:>5} {depth:>5} {name:<12} {mode:<8} {result['p50']:>9.3f} {result['p95']:>9.3f} {per_node:>9.1f} {result['throughput']:>9.0f} {result['peak_kb']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import ast
+import re
+import time
+from threading import Lock
+from typing import Callable, Optional
+
+## Local answers to plain arithmetic prompts
+
+NUMBER = r"-?\d+"
+
+# Polite or question wrappers around the arithmetic itself
+PREFIX_RE = re.compile(r"^(?:please\s+|can you\s+|could you\s+)?(?:what is|what's|compute|calculate|evaluate|work out)?\s*", re.IGNORECASE)
+SUFFIX_RE = re.compile(r"\s*(?:please)?\s*[?.!=]*\s*$", re.IGNORECASE)
+
+# Operator words that can be turned into symbols
+WORD_OPERATORS = [
+    (re.compile(r"\bmultiplied by\b|\btimes\b|×", re.IGNORECASE), "*"),
+    (re.compile(r"\bdivided by\b|÷", re.IGNORECASE), "/"),
+    (re.compile(r"\bplus\b", re.IGNORECASE), "+"),
+]
+SYMBOLIC_RE = re.compile(r"^[\d\s+*/()-]+$")
+
+# "Multiply 3 and 4", "add 3 to 4", "divide 10 by 2"
+FIRST_STEP_RE = re.compile(rf"^(add|multiply|divide)\s+({NUMBER})\s+(and|to|by|with)\s+({NUMBER})$", re.IGNORECASE)
+# "then add 5", "multiply it by 2", "divide the result by 3"
+NEXT_STEP_RE = re.compile(rf"^(add|multiply|divide)\s+(?:(?:it|that|this|the result)\s+)?(?:(to|by|and|with)\s+)?({NUMBER})(?:\s+to\s+(?:it|that|the result))?$", re.IGNORECASE)
+STEP_SPLIT_RE = re.compile(r"\s*(?:,\s*(?:and\s+)?then\b|,\s*and\b|\band then\b|\bthen\b|;|,)\s*", re.IGNORECASE)
+
+# Prepositions that read unambiguously with each operation
+PREPOSITIONS = {"add": {"and", "to", "with"}, "multiply": {"and", "by", "with"}, "divide": {"by"}}
+
+AST_OPERATORS = {ast.Add: "add", ast.Mult: "multiply", ast.Div: "divide"}
+
+# Bounds on what is answered locally; longer numbers or expressions go to the LLM
+MAX_OPERAND_DIGITS = 100
+MAX_OPERATIONS = 32
+DIGITS_RE = re.compile(r"\d+")
+OPERATION_RE = re.compile(r"[+*/×÷(]|\b(?:add|multiply|divide|plus|times|by)\b", re.IGNORECASE)
+
+# Errors that mean the prompt is not plain arithmetic the tools can answer
+EVALUATION_ERRORS = (ArithmeticError, ValueError, RecursionError, OverflowError)
+
+def parse_steps(text: str) -> Optional[tuple]:
+    """Parse "Multiply 3 and 4, then add 5" into a nested (tool, left, right) expression."""
+    steps = [step for step in STEP_SPLIT_RE.split(text) if step]
+    if not steps:
+        return None
+    match = FIRST_STEP_RE.match(steps[0])
+    if match is None or match.group(3).lower() not in PREPOSITIONS[match.group(1).lower()]:
+        return None
+    expression = (match.group(1).lower(), int(match.group(2)), int(match.group(4)))
+    for step in steps[1:]:
+        match = NEXT_STEP_RE.match(step)
+        if match is None:
+            return None
+        name, preposition = match.group(1).lower(), (match.group(2) or "").lower()
+        # "divide 3" could mean either order, so a division must say "by"
+        if (preposition or name == "divide") and preposition not in PREPOSITIONS[name]:
+            return None
+        expression = (name, expression, int(match.group(3)))
+    return expression
+
+def parse_symbolic(text: str) -> Optional[tuple]:
+    """Parse "3 + 4 * 2" or "3 plus 4 times 2" into a nested (tool, left, right) expression."""
+    for pattern, symbol in WORD_OPERATORS:
+        text = pattern.sub(symbol, text)
+    if not SYMBOLIC_RE.match(text) or not re.search(r"[+*/]", text):
+        return None
+    try:
+        tree = ast.parse(text.strip(), mode="eval").body
+    except SyntaxError:
+        return None
+
+    def convert(node):
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) and type(node.operand.value) is int:
+            return -node.operand.value
+        if isinstance(node, ast.BinOp) and type(node.op) in AST_OPERATORS:
+            left, right = convert(node.left), convert(node.right)
+            if left is None or right is None:
+                return None
+            return (AST_OPERATORS[type(node.op)], left, right)
+        # Anything else, including subtraction, has no tool
+        return None
+
+    expression = convert(tree)
+    return expression if isinstance(expression, tuple) else None
+
+def parse(text: str) -> Optional[tuple]:
+    """Parse a prompt that is nothing but arithmetic, or return None."""
+    text = SUFFIX_RE.sub("", PREFIX_RE.sub("", text.strip()))
+    # Checked before parsing, so huge numbers or deeply nested expressions never reach int() or the AST
+    if any(len(digits) > MAX_OPERAND_DIGITS for digits in DIGITS_RE.findall(text)):
+        return None
+    if len(OPERATION_RE.findall(text)) > MAX_OPERATIONS:
+        return None
+    return parse_steps(text) or parse_symbolic(text)
+
+def operations(expression) -> list[str]:
+    """The tool names in an expression, one per operation."""
+    if not isinstance(expression, tuple):
+        return []
+    return [expression[0]] + operations(expression[1]) + operations(expression[2])
+
+class ArithmeticFastPath:
+    """Answer prompts that are plain arithmetic over the graph's tools, without calling the LLM.
+
+    The agent would call the LLM once per tool hop plus once for the final answer, so each
+    hit saves (operations + 1) LLM calls. Latency saved is estimated from the average LLM
+    call latency the assistant records.
+    """
+
+    def __init__(self, tools: list[Callable]):
+        self.tools = {tool.__name__: tool for tool in tools}
+        self._lock = Lock()
+        self.prompts = 0
+        self.hits = 0
+        self.llm_calls_saved = 0
+        self.local_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def evaluate(self, expression):
+        if not isinstance(expression, tuple):
+            return expression
+        name, left, right = expression
+        return self.tools[name](self.evaluate(left), self.evaluate(right))
+
+    def answer(self, text: str) -> Optional[str]:
+        """Return the answer to `text`, or None when it is not confidently plain arithmetic."""
+        start = time.perf_counter()
+        answer = None
+        calls = 0
+        # Anything that goes wrong while parsing, evaluating or formatting falls through to the LLM
+        try:
+            expression = parse(text) if isinstance(text, str) else None
+            if expression is not None and all(name in self.tools for name in operations(expression)):
+                answer = str(self.evaluate(expression))
+                calls = len(operations(expression)) + 1
+        except EVALUATION_ERRORS:
+            answer = None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.prompts += 1
+            if answer is not None:
+                self.hits += 1
+                self.llm_calls_saved += calls
+                self.local_seconds += elapsed
+        return answer
+
+    def record_llm_call(self, seconds: float) -> None:
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            average_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                "prompts": self.prompts,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.prompts if self.prompts else 0.0,
+                "llm_calls_saved": self.llm_calls_saved,
+                "average_llm_seconds": average_llm,
+                "latency_saved_seconds": self.llm_calls_saved * average_llm - self.local_seconds,
+            }
@@ -1,16 +1,15 @@
-from langchain_openai import ChatOpenAI
+from functools import lru_cache
+
 from langgraph.graph import MessagesState
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_google_vertexai import ChatVertexAI
 
+from lazy import chat_model, use_fake_model
+from tool_cache import pure, tool_results
 
-llm = ChatVertexAI(
-        model="gemini-1.5-pro", 
-        temperature=0.0
-    )
 
 # Tool
+@pure
 def multiply(a: int, b: int) -> int:
     """Multiplies a and b.
 
@@ -20,17 +19,27 @@ def multiply(a: int, b: int) -> int:
     """
     return a * b
 
-# LLM with bound tool
-llm_with_tools = llm.bind_tools([multiply])
+# LLM with bound tool, built on first use for each CHAT_MODEL setting
+def llm_with_tools():
+    return _llm_with_tools(use_fake_model())
+
+@lru_cache(maxsize=None)
+def _llm_with_tools(fake: bool):
+    llm = chat_model(
+        "gemini-1.5-pro",
+        provider="vertexai",
+        temperature=0.0
+    )
+    return llm.bind_tools([multiply])
 
 # Node
 def tool_calling_llm(state: MessagesState):
-    return {"messages": [llm_with_tools.invoke(state["messages"])]}
+    return {"messages": [llm_with_tools().invoke(state["messages"])]}
 
 # Build graph
 builder = StateGraph(MessagesState)
 builder.add_node("tool_calling_llm", tool_calling_llm)
-builder.add_node("tools", ToolNode([multiply]))
+builder.add_node("tools", ToolNode([multiply], wrap_tool_call=tool_results))
 builder.add_edge(START, "tool_calling_llm")
 builder.add_conditional_edges(
     "tool_calling_llm",
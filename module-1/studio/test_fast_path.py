@@ -0,0 +1,42 @@
+import pytest
+
+from fast_path import MAX_OPERAND_DIGITS, ArithmeticFastPath
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+def multiply(a: int, b: int) -> int:
+    return a * b
+
+def divide(a: int, b: int) -> float:
+    return a / b
+
+@pytest.fixture
+def fast_path():
+    return ArithmeticFastPath([add, multiply, divide])
+
+@pytest.mark.parametrize("text, answer", [
+    ("Multiply 3 and 4, then add 5", "17"),
+    ("What is 3 + 4 * 2?", "11"),
+    ("Divide 10 by 4", "2.5"),
+    ("What is 7 minus 2?", None),
+    ("Divide 3 by 0", None),
+])
+def test_answers(fast_path, text, answer):
+    assert fast_path.answer(text) == answer
+
+@pytest.mark.parametrize("text", [
+    # Deep enough to overflow the recursion limit while converting and evaluating the AST
+    "1" + "+1" * 1000,
+    "(" * 1000 + "1" + ")" * 1000 + " + 1",
+    # Operands past Python's int/str conversion limit
+    f"Multiply {'9' * 5000} and 2",
+    f"What is {'9' * 5000} + 1?",
+    f"Add {'9' * (MAX_OPERAND_DIGITS + 1)} and 1",
+    # A result past the int/str conversion limit
+    "Multiply 99999999999 and 99999999999" + ", then multiply by 99999999999" * 500,
+    " * ".join(["9" * 100] * 45),
+])
+def test_oversized_prompts_fall_through_to_the_llm(fast_path, text):
+    assert fast_path.answer(text) is None
+    assert fast_path.stats()["hits"] == 0
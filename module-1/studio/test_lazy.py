@@ -0,0 +1,26 @@
+from langchain_openai import ChatOpenAI
+
+import agent
+from fake_chat_model import FakeChatModel
+from lazy import chat_model
+
+def test_chat_model_follows_chat_model_setting(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("CHAT_MODEL", "fake")
+    fake = chat_model()
+    assert isinstance(fake, FakeChatModel)
+    assert chat_model() is fake
+
+    monkeypatch.delenv("CHAT_MODEL")
+    assert isinstance(chat_model(), ChatOpenAI)
+
+    monkeypatch.setenv("CHAT_MODEL", "fake")
+    assert chat_model() is fake
+
+def test_models_built_on_chat_model_follow_it_too(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("CHAT_MODEL", "fake")
+    assert isinstance(agent.llm_with_tools().bound, FakeChatModel)
+
+    monkeypatch.delenv("CHAT_MODEL")
+    assert isinstance(agent.llm_with_tools().bound, ChatOpenAI)
@@ -0,0 +1,70 @@
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable
+
+from langchain_core.messages import ToolMessage
+
+## Result cache for pure tools
+
+# Attribute that marks a tool function as pure
+PURE_ATTR = "__pure_tool__"
+
+def pure(func: Callable) -> Callable:
+    """Mark a tool function as pure: its result depends only on its arguments."""
+    setattr(func, PURE_ATTR, True)
+    return func
+
+def is_pure(tool) -> bool:
+    """True for a tool built from a function marked with `pure`, or a tool with {"pure": True} metadata."""
+    if getattr(getattr(tool, "func", None), PURE_ATTR, False):
+        return True
+    return bool((getattr(tool, "metadata", None) or {}).get("pure"))
+
+class ToolResultCache:
+    """Bounded LRU cache of pure tool results, keyed by tool name and canonicalized arguments.
+
+    Pass it to ToolNode as `wrap_tool_call`. Calls to pure tools are answered from the cache
+    when possible; other tools, errors and Commands are never cached.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._results: OrderedDict[tuple, tuple] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, request, execute):
+        tool = request.tool
+        if tool is None or not is_pure(tool):
+            return execute(request)
+        call = request.tool_call
+        key = (call["name"], json.dumps(call["args"], sort_keys=True, separators=(",", ":"), default=str))
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            content, name = cached
+            return ToolMessage(content=content, name=name, tool_call_id=call["id"])
+
+        result = execute(request)
+        if isinstance(result, ToolMessage) and result.status != "error":
+            with self._lock:
+                self._results[key] = (result.content, result.name)
+                while len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "size": len(self._results)}
+
+# Shared by every run in the process
+tool_results = ToolResultCache()
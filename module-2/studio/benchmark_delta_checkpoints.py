@@ -0,0 +1,87 @@
+"""Benchmark full-list against delta-encoded message checkpoints on SqliteSaver.
+
+Each turn appends a user message and an assistant reply to one thread, as the chatbot
+does, until the thread holds --messages messages. Reports the bytes written per
+checkpoint at the end of the thread, the total DB size, and get_state latency.
+
+    python benchmark_delta_checkpoints.py --messages 1000 --message-chars 400
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import MessagesState, StateGraph, START, END
+
+from delta_messages import DeltaMessagesState, SNAPSHOT_FREQUENCY
+
+# Bytes written by every checkpoint and pending write, found by row ID since the last call
+WRITTEN_SQL = """
+SELECT
+  (SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE rowid > ?),
+  (SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE rowid > ?),
+  (SELECT COUNT(*) FROM checkpoints WHERE rowid > ?),
+  (SELECT COALESCE(MAX(rowid), 0) FROM checkpoints),
+  (SELECT COALESCE(MAX(rowid), 0) FROM writes)
+"""
+
+def build(state_schema: type, message_chars: int):
+    """A chatbot graph whose reply is a fixed-size message, so no model is called."""
+    def conversation(state):
+        return {"messages": [("ai", "x" * message_chars)]}
+
+    builder = StateGraph(state_schema)
+    builder.add_node("conversation", conversation)
+    builder.add_edge(START, "conversation")
+    builder.add_edge("conversation", END)
+    return builder
+
+def run(name: str, state_schema: type, args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.db")
+        conn = sqlite3.connect(path, check_same_thread=False)
+        graph = build(state_schema, args.message_chars).compile(checkpointer=SqliteSaver(conn))
+        config = {"configurable": {"thread_id": "1"}}
+
+        # Count the bytes of the last `--window` turns, where the thread is longest
+        turns = args.messages // 2
+        written = checkpoints = 0
+        last_checkpoint = last_write = 0
+        for turn in range(turns):
+            graph.invoke({"messages": [("user", "y" * args.message_chars)]}, config)
+            row = conn.execute(WRITTEN_SQL, (last_checkpoint, last_write, last_checkpoint)).fetchone()
+            last_checkpoint, last_write = row[3], row[4]
+            if turn >= turns - args.window:
+                written += row[0] + row[1]
+                checkpoints += row[2]
+
+        latencies = []
+        for _ in range(args.samples):
+            start = time.perf_counter()
+            graph.get_state(config)
+            latencies.append((time.perf_counter() - start) * 1000)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size = os.path.getsize(path)
+        conn.close()
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<20} {written / checkpoints / 1024:>14.1f} {size / 1024 / 1024:>9.1f} {quantiles[49]:>9.3f} {quantiles[98]:>9.3f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000, help="Messages in the thread at the end")
+    parser.add_argument("--message-chars", type=int, default=400)
+    parser.add_argument("--window", type=int, default=50, help="Final turns whose writes are counted")
+    parser.add_argument("--samples", type=int, default=100, help="get_state calls timed")
+    args = parser.parse_args()
+
+    print(f"Snapshot every {SNAPSHOT_FREQUENCY} updates in delta mode")
+    print(f"{'checkpoints':<20} {'KB/checkpoint':>14} {'DB MB':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    run("full list", MessagesState, args)
+    run("delta", DeltaMessagesState, args)
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,66 @@
+import uuid
+from typing import Optional
+
 from langchain_core.messages import HumanMessage, SystemMessage, RemoveMessage
-from langgraph.graph import MessagesState
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 
-# We will use this model for both the conversation and the summarization
-from langchain_openai import ChatOpenAI
-model = ChatOpenAI(model="gpt-4o", temperature=0) 
+from delta_messages import MessagesBase
+from lazy import chat_model
+from summary_scheduler import summary_scheduler
+from summary_tree import SummaryTree, add_chunk, render_tree, tree_from_summary
+from tokens import message_tokens
+
+# Summarize once the kept messages exceed this many tokens
+MESSAGE_TOKEN_BUDGET = 3000
+
+# After summarizing, keep the most recent messages that fit in this many tokens
+RETAINED_TOKEN_TARGET = 1500
+
+# Upper bounds on the length of each level of the summary tree
+CHUNK_SUMMARY_MAX_TOKENS = 200
+SECTION_SUMMARY_MAX_TOKENS = 300
+SUMMARY_MAX_TOKENS = 500
+
+# Most tokens of the summary tree to include in the prompt
+SUMMARY_TOKEN_BUDGET = 1000
+
+# Set "background_summary": True in the configurable to summarize after the reply is returned,
+# and "summary_wait_seconds" to how long the next turn waits for a summary still in progress
+DEFAULT_SUMMARY_WAIT_SECONDS = 0.0
+
+# We will use this model for both the conversation and the summarization, built on first use
+def model():
+    return chat_model(temperature=0)
+
+def chunk_model():
+    return model().bind(max_tokens=CHUNK_SUMMARY_MAX_TOKENS)
+
+def section_model():
+    return model().bind(max_tokens=SECTION_SUMMARY_MAX_TOKENS)
 
-# State class to store messages and summary
-class State(MessagesState):
+def summary_model():
+    return model().bind(max_tokens=SUMMARY_MAX_TOKENS)
+
+# State class to store messages and summary, plus the ID of the background summary started from this checkpoint
+class State(MessagesBase):
+    summary_tree: SummaryTree
+    pending_summary: Optional[str]
+    # Running summary of threads checkpointed before the summary tree, which seeds their tree
     summary: str
+
+def summary_tree_of(state: State) -> Optional[SummaryTree]:
+    """The thread's summary tree, seeded from the running summary of an older thread if it has none yet."""
+    tree = state.get("summary_tree")
+    if not tree and state.get("summary"):
+        return tree_from_summary(state["summary"])
+    return tree
     
 # Define the logic to call the model
 def call_model(state: State):
     
-    # Get summary if it exists
-    summary = state.get("summary", "")
+    # Get the levels of the summary tree that fit in the budget, if any
+    summary = render_tree(summary_tree_of(state), SUMMARY_TOKEN_BUDGET)
 
     # If there is summary, then we add it to messages
     if summary:
@@ -28,58 +74,149 @@ def call_model(state: State):
     else:
         messages = state["messages"]
     
-    response = model.invoke(messages)
+    response = model().invoke(messages)
     return {"messages": response}
 
 # Determine whether to end or summarize the conversation
-def should_continue(state: State):
+def should_continue(state: State, config: RunnableConfig):
     
     """Return the next node to execute."""
     
     messages = state["messages"]
     
-    # If there are more than six messages, then we summarize the conversation
-    if len(messages) > 6:
+    # If the messages no longer fit in the token budget, then we summarize the conversation
+    if message_tokens.total(messages) > MESSAGE_TOKEN_BUDGET:
+        configurable = config.get("configurable", {})
+        # Background summaries are committed by the next turn, which needs a thread to find them
+        if configurable.get("background_summary") and configurable.get("thread_id") is not None:
+            return "schedule_summary"
         return "summarize_conversation"
     
     # Otherwise we can just end
     return END
 
+def messages_to_evict(messages):
+    
+    """Return the oldest messages to drop so the rest fit in RETAINED_TOKEN_TARGET, always keeping the last 2."""
+    
+    kept_tokens = 0
+    cut = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        kept_tokens += message_tokens.count(messages[i])
+        if kept_tokens > RETAINED_TOKEN_TARGET and len(messages) - i > 2:
+            break
+        cut = i
+    return messages[:cut]
+
+def summarize_section(chunks):
+    
+    """Roll the chunk summaries of a full section into one section summary."""
+    
+    numbered = "\n".join(f"{i}. {chunk}" for i, chunk in enumerate(chunks, start=1))
+    summary_message = (
+        f"These are summaries of consecutive parts of a conversation:\n\n{numbered}\n\n"
+        f"Combine them into one summary in under {SECTION_SUMMARY_MAX_TOKENS // 2} words:"
+    )
+    return section_model().invoke([HumanMessage(content=summary_message)]).content
+
+def fold_thread(thread, section):
+    
+    """Extend the thread summary with a newly closed section."""
+    
+    if not thread:
+        return section
+    summary_message = (
+        f"This is summary of the conversation to date: {thread}\n\n"
+        f"This is a summary of what was said next: {section}\n\n"
+        f"Extend the summary to cover both. Keep it under {SUMMARY_MAX_TOKENS // 2} words:"
+    )
+    return summary_model().invoke([HumanMessage(content=summary_message)]).content
+
+def extend_summary_tree(evicted, tree):
+    
+    """Summarize the evicted messages as a new chunk and add it to the summary tree."""
+
+    # Each chunk summarizes only its own messages, so its cost does not grow with the thread
+    summary_message = f"Create a summary of the conversation above in under {CHUNK_SUMMARY_MAX_TOKENS // 2} words:"
+    chunk = chunk_model().invoke(evicted + [HumanMessage(content=summary_message)]).content
+    return add_chunk(tree, chunk, summarize_section, fold_thread)
+
 def summarize_conversation(state: State):
     
-    # First get the summary if it exists
-    summary = state.get("summary", "")
+    # Only the messages being evicted are summarized; the rest stay in the conversation
+    evicted = messages_to_evict(state["messages"])
+    if not evicted:
+        return {}
 
-    # Create our summarization prompt 
-    if summary:
-        
-        # If a summary already exists, add it to the prompt
-        summary_message = (
-            f"This is summary of the conversation to date: {summary}\n\n"
-            "Extend the summary by taking into account the new messages above:"
-        )
-        
-    else:
-        # If no summary exists, just create a new one
-        summary_message = "Create a summary of the conversation above:"
+    # Add the evicted messages to the summary tree
+    summary_tree = extend_summary_tree(evicted, summary_tree_of(state))
+    
+    # Delete the evicted messages and add our summary to the state 
+    delete_messages = [RemoveMessage(id=m.id) for m in evicted]
+    return {"summary_tree": summary_tree, "messages": delete_messages}
 
-    # Add prompt to our history
-    messages = state["messages"] + [HumanMessage(content=summary_message)]
-    response = model.invoke(messages)
+def schedule_summary(state: State, config: RunnableConfig):
+    
+    """Start summarizing the evicted messages in the background and end the turn."""
     
-    # Delete all but the 2 most recent messages and add our summary to the state 
-    delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
-    return {"summary": response.content, "messages": delete_messages}
+    evicted = messages_to_evict(state["messages"])
+    if not evicted:
+        return {}
+
+    # Only one summary per thread is in flight; a later turn schedules the next one
+    thread_id = config["configurable"]["thread_id"]
+    if state.get("pending_summary") and summary_scheduler.is_pending(thread_id, state["pending_summary"]):
+        return {}
+
+    # The job gets an ID of its own, which the state records, so only turns continuing from
+    # this checkpoint, on this branch or a fork of it, collect its result
+    job_id = str(uuid.uuid4())
+    summary_tree = summary_tree_of(state)
+    summary_scheduler.schedule(
+        thread_id,
+        job_id,
+        lambda: {"summary_tree": extend_summary_tree(evicted, summary_tree), "evicted_ids": [m.id for m in evicted]},
+    )
+    return {"pending_summary": job_id}
+
+def apply_pending_summary(state: State, config: RunnableConfig):
+    
+    """Commit a finished background summary to the thread before the model is called."""
+
+    configurable = config.get("configurable", {})
+    thread_id = configurable.get("thread_id")
+    if thread_id is None:
+        return {}
+
+    # Wait briefly for this branch's summary still in progress, or go on with the last committed
+    # one; summaries scheduled by branches the thread has moved away from are dropped
+    job_id = state.get("pending_summary")
+    timeout = configurable.get("summary_wait_seconds", DEFAULT_SUMMARY_WAIT_SECONDS)
+    result = summary_scheduler.take(thread_id, job_id, timeout=float(timeout))
+    if result is None:
+        # The job is gone, e.g. it failed or ran in another process, so let this turn schedule it again
+        if job_id and not summary_scheduler.is_pending(thread_id, job_id):
+            return {"pending_summary": None}
+        return {}
+
+    # Only remove the evicted messages that are still in the conversation
+    current_ids = {m.id for m in state["messages"]}
+    delete_messages = [RemoveMessage(id=i) for i in result["evicted_ids"] if i in current_ids]
+    return {"summary_tree": result["summary_tree"], "messages": delete_messages, "pending_summary": None}
 
 # Define a new graph
 workflow = StateGraph(State)
+workflow.add_node(apply_pending_summary)
 workflow.add_node("conversation", call_model)
 workflow.add_node(summarize_conversation)
+workflow.add_node(schedule_summary)
 
-# Set the entrypoint as conversation
-workflow.add_edge(START, "conversation")
-workflow.add_conditional_edges("conversation", should_continue)
+# Commit any background summary, then have the conversation
+workflow.add_edge(START, "apply_pending_summary")
+workflow.add_edge("apply_pending_summary", "conversation")
+workflow.add_conditional_edges("conversation", should_continue, ["summarize_conversation", "schedule_summary", END])
 workflow.add_edge("summarize_conversation", END)
+workflow.add_edge("schedule_summary", END)
 
 # Compile
 graph = workflow.compile()
\ No newline at end of file
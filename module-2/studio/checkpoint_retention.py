@@ -0,0 +1,180 @@
+"""Checkpoint retention and compaction for SqliteSaver databases.
+
+Keeps the last N checkpoints of every thread plus any checkpoint tagged with a
+"retention_tag" in its metadata, deletes the rest with their pending writes, and
+VACUUMs the file. Reports the DB size and get_state latency before and after.
+
+    python checkpoint_retention.py ../state_db/example.db --keep-last 10
+
+Tag a checkpoint with `tag_checkpoint`, or tag every checkpoint of a run by passing
+{"metadata": {"retention_tag": "..."}} in its config. For online retention, compile
+the graph with RetainingSqliteSaver, which prunes each thread as it writes.
+
+Threads with delta-encoded messages (DELTA_CHECKPOINTS=1) also keep every checkpoint
+back to the snapshot their oldest kept checkpoint is rebuilt from. A tagged delta
+checkpoint older than that is kept, but can no longer be rebuilt.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import MessagesState, StateGraph, START, END
+
+# Metadata key that exempts a checkpoint from pruning
+TAG_KEY = "retention_tag"
+
+# Checkpoints kept per thread and namespace, newest first
+DEFAULT_KEEP_LAST = 10
+
+# Checkpoint IDs are time-ordered, so the newest ones sort last. Checkpoints of delta-encoded
+# channels hold only the changes since the last snapshot, which carries no
+# "counters_since_delta_snapshot" metadata, so the cutoff is moved back to the newest snapshot
+# at or before the oldest kept checkpoint. Without delta channels every checkpoint is a snapshot
+PRUNE_CHECKPOINTS_SQL = f"""
+DELETE FROM checkpoints
+WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+  AND json_extract(CAST(metadata AS TEXT), '$.{TAG_KEY}') IS NULL
+  AND checkpoint_id < (
+    SELECT MAX(checkpoint_id) FROM checkpoints
+    WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+      AND json_extract(CAST(metadata AS TEXT), '$.counters_since_delta_snapshot') IS NULL
+      AND checkpoint_id <= (
+        SELECT checkpoint_id FROM checkpoints
+        WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+        ORDER BY checkpoint_id DESC LIMIT 1 OFFSET :keep_last - 1
+      )
+  )
+"""
+
+PRUNE_WRITES_SQL = """
+DELETE FROM writes
+WHERE thread_id = ? AND checkpoint_ns = ?
+  AND checkpoint_id NOT IN (
+    SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+  )
+"""
+
+def check_keep_last(keep_last: int) -> None:
+    # The cutoff is the keep_last-th newest checkpoint, which does not exist for zero
+    if keep_last < 1:
+        raise ValueError(f"keep_last must be at least 1, got {keep_last}")
+
+def prune_thread(cur: sqlite3.Cursor, thread_id: str, checkpoint_ns: str, keep_last: int) -> int:
+    """Delete the untagged checkpoints of one thread beyond the newest `keep_last`, and their writes."""
+    cur.execute(PRUNE_CHECKPOINTS_SQL, {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "keep_last": keep_last})
+    deleted = cur.rowcount
+    if deleted:
+        cur.execute(PRUNE_WRITES_SQL, (thread_id, checkpoint_ns, thread_id, checkpoint_ns))
+    return deleted
+
+def tag_checkpoint(saver: SqliteSaver, config: RunnableConfig, tag: str) -> None:
+    """Exempt the checkpoint in `config` (the thread's latest if it has no checkpoint_id) from pruning."""
+    checkpoint = saver.get_tuple(config)
+    if checkpoint is None:
+        raise ValueError(f"No checkpoint found for {config['configurable']}")
+    configurable = checkpoint.config["configurable"]
+    with saver.cursor() as cur:
+        cur.execute(
+            f"UPDATE checkpoints SET metadata = CAST(json_set(CAST(metadata AS TEXT), '$.{TAG_KEY}', ?) AS BLOB) "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (tag, configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"]),
+        )
+
+class RetainingSqliteSaver(SqliteSaver):
+    """SqliteSaver that prunes a thread to its last `keep_last` checkpoints, plus tagged ones, on every write."""
+
+    def __init__(self, conn: sqlite3.Connection, *, keep_last: int = DEFAULT_KEEP_LAST, **kwargs):
+        check_keep_last(keep_last)
+        super().__init__(conn, **kwargs)
+        self.keep_last = keep_last
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        configurable = saved["configurable"]
+        with self.cursor() as cur:
+            prune_thread(cur, str(configurable["thread_id"]), configurable["checkpoint_ns"], self.keep_last)
+        return saved
+
+def compact(saver: SqliteSaver, keep_last: int = DEFAULT_KEEP_LAST) -> int:
+    """Prune every thread in the database, then VACUUM it. Returns the number of checkpoints deleted."""
+    check_keep_last(keep_last)
+    with saver.cursor() as cur:
+        threads = cur.execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints").fetchall()
+        deleted = sum(prune_thread(cur, thread_id, checkpoint_ns, keep_last) for thread_id, checkpoint_ns in threads)
+    # VACUUM cannot run inside a transaction, and the cursor above has committed. SqliteSaver
+    # runs in WAL mode, so fold the log back into the file to actually release the space
+    with saver.lock:
+        saver.conn.execute("VACUUM")
+        saver.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return deleted
+
+## Report
+
+def db_size(path: str) -> int:
+    """Size of the database file and its write-ahead log, in bytes."""
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+def get_state_latency(saver: SqliteSaver, samples: int) -> float:
+    """Median get_state latency in milliseconds over the latest checkpoint of every thread."""
+    # get_state only needs the graph's channels, so an empty MessagesState graph reads any thread
+    builder = StateGraph(MessagesState)
+    builder.add_node("noop", lambda state: {})
+    builder.add_edge(START, "noop")
+    builder.add_edge("noop", END)
+    graph = builder.compile(checkpointer=saver)
+
+    with saver.cursor(transaction=False) as cur:
+        threads = [row[0] for row in cur.execute("SELECT DISTINCT thread_id FROM checkpoints").fetchall()]
+    if not threads:
+        return 0.0
+    latencies = []
+    for i in range(samples):
+        config = {"configurable": {"thread_id": threads[i % len(threads)]}}
+        start = time.perf_counter()
+        graph.get_state(config)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+def report(saver: SqliteSaver, path: str, samples: int) -> dict:
+    with saver.cursor(transaction=False) as cur:
+        checkpoints = cur.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        writes = cur.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+    return {
+        "size_bytes": db_size(path),
+        "checkpoints": checkpoints,
+        "writes": writes,
+        "get_state_ms": get_state_latency(saver, samples),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="SqliteSaver database file")
+    parser.add_argument("--keep-last", type=int, default=DEFAULT_KEEP_LAST, help="Checkpoints kept per thread")
+    parser.add_argument("--samples", type=int, default=200, help="get_state calls timed for the report")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.path, check_same_thread=False)
+    saver = SqliteSaver(conn)
+    before = report(saver, args.path, args.samples)
+    deleted = compact(saver, args.keep_last)
+    after = report(saver, args.path, args.samples)
+    conn.close()
+
+    print(f"Deleted {deleted} checkpoints, keeping the last {args.keep_last} per thread plus tagged ones")
+    print(f"{'':<14} {'size KB':>10} {'checkpoints':>12} {'writes':>8} {'get_state ms':>13}")
+    for name, row in (("before", before), ("after", after)):
+        print(f"{name:<14} {row['size_bytes'] / 1024:>10.1f} {row['checkpoints']:>12} {row['writes']:>8} {row['get_state_ms']:>13.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""A deterministic stand-in for the graphs' chat models, for offline runs and benchmarks.
+
+Set CHAT_MODEL=fake and every graph gets FakeChatModel from `lazy.chat_model` instead of
+calling OpenAI or Vertex AI. The search nodes get canned documents in place of Tavily
+and Wikipedia. Other settings:
+
+    FAKE_MODEL_PROFILE    latency profile: instant (default), fast or gpt-4o
+    FAKE_MODEL_RESPONSES  JSON file of scripted responses, replayed in order
+    FAKE_MODEL_SEED       seed for generated responses and latencies (default 0)
+
+Without scripted responses, the model generates them: text of `response_tokens` words,
+or, when tools are bound, a tool call whose arguments are built from the tool's schema.
+Tool calls are made when a tool is forced (as with_structured_output and Trustcall do)
+or when the last message is from the user, so tool loops end after one round. Response
+text and latency depend only on the seed and the prompt.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+## Latency profiles
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """Time to first token, drawn from a normal distribution, then a steady token rate."""
+    ttft_ms: float = 0.0
+    ttft_jitter_ms: float = 0.0
+    tokens_per_second: float = 0.0  # 0 streams every token at once
+
+PROFILES = {
+    "instant": LatencyProfile(),
+    "fast": LatencyProfile(ttft_ms=150, ttft_jitter_ms=50, tokens_per_second=200),
+    "gpt-4o": LatencyProfile(ttft_ms=450, ttft_jitter_ms=150, tokens_per_second=80),
+}
+
+# IDs the prompt names, like Trustcall's <instance id=...> tags
+ID_RE = re.compile(r"\bid=[\"']?([\w.-]+)")
+
+# Words for generated text and string arguments
+WORDS = ["the", "user", "likes", "graph", "memory", "task", "plan", "note", "answer", "today", "agent", "state", "tool", "update", "report"]
+
+## Schema-generated values
+
+def generate_value(schema: dict, rng: random.Random, defs: dict, ids: list[str], name: str = "") -> Any:
+    """A value matching a JSON schema: the first enum, one for numbers, two items for arrays.
+
+    Numbers are never zero, so arithmetic tools can divide by them, and arrays have two
+    items, so a generated index of one is in range. String fields named like an ID take an
+    ID from the prompt and fields named `path` a JSON pointer, so patch tools like
+    Trustcall's PatchDoc refer to a document that exists and apply cleanly.
+    """
+    if "$ref" in schema:
+        return generate_value(defs[schema["$ref"].split("/")[-1]], rng, defs, ids, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return generate_value(options[0], rng, defs, ids, name)
+    kind = schema.get("type") or ("object" if "properties" in schema else "string")
+    if kind == "string" and ids and (name == "id" or name.endswith("_id")):
+        return rng.choice(ids)
+    if kind == "string" and name == "path":
+        return "/" + rng.choice(WORDS)
+    if kind == "string":
+        return " ".join(rng.choice(WORDS) for _ in range(3))
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return False
+    if kind == "array":
+        return [generate_value(schema.get("items", {}), rng, defs, ids) for _ in range(2)]
+    if kind == "null":
+        return None
+    return {key: generate_value(prop, rng, defs, ids, key) for key, prop in schema.get("properties", {}).items()}
+
+def generate_args(tool: dict, rng: random.Random, prompt: str) -> dict:
+    parameters = tool["function"].get("parameters", {})
+    return generate_value(parameters, rng, parameters.get("$defs", {}), ID_RE.findall(prompt))
+
+## Fake chat model
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that replays scripted responses or generates them, with simulated latency.
+
+    Supports bind_tools (and through it with_structured_output), invoke, stream and their
+    async variants. Scripted `responses` are strings or {"content", "tool_calls"} dicts,
+    used in order and then repeated.
+    """
+
+    model: str = "fake"
+    profile: LatencyProfile = LatencyProfile()
+    responses: list = []
+    response_tokens: int = 20
+    seed: int = 0
+
+    _calls: int = PrivateAttr(default=0)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    @classmethod
+    def from_env(cls, model: str = "fake") -> "FakeChatModel":
+        """Build the model from the FAKE_MODEL_* environment variables."""
+        responses = []
+        if os.environ.get("FAKE_MODEL_RESPONSES"):
+            with open(os.environ["FAKE_MODEL_RESPONSES"]) as f:
+                responses = json.load(f)
+        return cls(
+            model=model,
+            profile=PROFILES[os.environ.get("FAKE_MODEL_PROFILE", "instant")],
+            responses=responses,
+            seed=int(os.environ.get("FAKE_MODEL_SEED", "0")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice is True:
+            tool_choice = "any"
+        return self.bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+    def _rng(self, messages: list[BaseMessage]) -> random.Random:
+        """A generator seeded by the prompt, so the same prompt gets the same response and latency."""
+        digest = hashlib.sha256(repr((self.seed, [(m.type, m.content) for m in messages])).encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _respond(self, messages: list[BaseMessage], rng: random.Random, tools: Optional[list] = None, tool_choice=None) -> AIMessage:
+        if self.responses:
+            with self._lock:
+                response = self.responses[self._calls % len(self.responses)]
+                self._calls += 1
+            if isinstance(response, str):
+                return AIMessage(content=response)
+            tool_calls = [{"name": call["name"], "args": call.get("args", {}), "id": call.get("id", f"call_{uuid.uuid4().hex[:12]}")} for call in response.get("tool_calls", [])]
+            return AIMessage(content=response.get("content", ""), tool_calls=tool_calls)
+
+        forced = tool_choice not in (None, "auto", "none")
+        if tools and (forced or isinstance(messages[-1], HumanMessage)):
+            name = tool_choice if isinstance(tool_choice, str) and tool_choice not in ("any", "required", "auto") else None
+            if isinstance(tool_choice, dict):
+                name = tool_choice.get("function", {}).get("name")
+            tool = next((t for t in tools if t["function"]["name"] == name), None) or rng.choice(tools)
+            call = {"name": tool["function"]["name"], "args": generate_args(tool, rng, "\n".join(str(m.content) for m in messages)), "id": f"call_{rng.getrandbits(48):012x}"}
+            return AIMessage(content="", tool_calls=[call])
+
+        words = [rng.choice(WORDS) for _ in range(self.response_tokens)]
+        if isinstance(messages[-1], ToolMessage):
+            words[:0] = ["Result:", str(messages[-1].content)]
+        return AIMessage(content=" ".join(words))
+
+    def _timing(self, response: AIMessage, rng: random.Random) -> tuple[float, float]:
+        """Seconds to the first token and between tokens."""
+        ttft = max(0.0, rng.gauss(self.profile.ttft_ms, self.profile.ttft_jitter_ms)) / 1000
+        per_token = 1 / self.profile.tokens_per_second if self.profile.tokens_per_second else 0.0
+        return ttft, per_token
+
+    def _chunks(self, response: AIMessage) -> list[AIMessageChunk]:
+        """The response split into one chunk per word, with tool calls in the last chunk."""
+        words = response.content.split(" ") if response.content else []
+        chunks = [AIMessageChunk(content=word if i == 0 else " " + word) for i, word in enumerate(words)]
+        if response.tool_calls:
+            # Tool call arguments stream at roughly four characters per token
+            tokens = sum(len(json.dumps(call["args"])) for call in response.tool_calls) // 4
+            chunks += [AIMessageChunk(content="") for _ in range(max(tokens - 1, 0))]
+            chunks.append(AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(response.tool_calls)
+            ]))
+        return chunks or [AIMessageChunk(content="")]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        rng = self._rng(messages)
+        response = self._respond(messages, rng, kwargs.get("tools"), kwargs.get("tool_choice"))
+        ttft, per_token = self._timing(response, rng)
+        time.sleep(ttft + per_token * (len(self._chunks(response)) - 1))
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        rng = self._rng(messages)
+        response = self._respond(messages, rng, kwargs.get("tools"), kwargs.get("tool_choice"))
+        ttft, per_token = self._timing(response, rng)
+        await asyncio.sleep(ttft + per_token * (len(self._chunks(response)) - 1))
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        rng = self._rng(messages)
+        response = self._respond(messages, rng, kwargs.get("tools"), kwargs.get("tool_choice"))
+        ttft, per_token = self._timing(response, rng)
+        for i, chunk in enumerate(self._chunks(response)):
+            time.sleep(ttft if i == 0 else per_token)
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        rng = self._rng(messages)
+        response = self._respond(messages, rng, kwargs.get("tools"), kwargs.get("tool_choice"))
+        ttft, per_token = self._timing(response, rng)
+        for i, chunk in enumerate(self._chunks(response)):
+            await asyncio.sleep(ttft if i == 0 else per_token)
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+## Canned search results
+
+class FakeSearch:
+    """Stand-in for TavilySearchResults: `max_results` results for any query."""
+
+    def __init__(self, max_results: int = 3):
+        self.max_results = max_results
+
+    def invoke(self, query: str) -> list[dict]:
+        return [{"url": f"https://example.com/{i}", "content": f"Result {i} about {query}."} for i in range(self.max_results)]
+
+class FakeLoader:
+    """Stand-in for WikipediaLoader: `load_max_docs` documents for any query."""
+
+    def __init__(self, query: str, load_max_docs: int = 2):
+        self.query = query
+        self.load_max_docs = load_max_docs
+
+    def load(self) -> list[Document]:
+        return [Document(page_content=f"Article {i} about {self.query}.", metadata={"source": f"https://en.wikipedia.org/wiki/{i}"}) for i in range(self.load_max_docs)]
@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from threading import Lock
+from typing import Any, Callable, Optional
+
+## Background summarization, one job per thread branch
+
+# How long a finished result waits to be collected before it is dropped
+DEFAULT_RESULT_TTL_SECONDS = 600.0
+
+class SummaryScheduler:
+    """Run summarization jobs off the critical path and hand their results to the next turn.
+
+    Jobs are keyed by (thread_id, job_id), where the caller picks a unique job_id and
+    records it in the thread's state. The next turn only collects the result of the job
+    recorded in the checkpoint it continues from, so results for branches the user has
+    forked or time-travelled away from are never applied. The next turn collects
+    the result with `take`, waiting up to a timeout for a job that is still running, and
+    commits it to the thread state itself, so the result never races with the turn's own
+    checkpoint writes.
+
+    Results live in this process's memory. With several server processes, a turn that
+    lands on a process that did not schedule the job finds nothing, and the chatbot
+    schedules the summary again there. Results nobody collects, e.g. for abandoned
+    threads, are dropped `result_ttl` seconds after they finish.
+    """
+
+    def __init__(self, max_workers: int = 4, result_ttl: float = DEFAULT_RESULT_TTL_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+        self.result_ttl = result_ttl
+        self._pending: dict[tuple[str, str], Future] = {}
+        self._finished_at: dict[tuple[str, str], float] = {}
+        self._lock = Lock()
+
+    def _evict_expired(self) -> None:
+        """Drop results that finished more than `result_ttl` seconds ago. Call with the lock held."""
+        cutoff = time.monotonic() - self.result_ttl
+        for key in [key for key, finished_at in self._finished_at.items() if finished_at < cutoff]:
+            self._pending.pop(key, None)
+            del self._finished_at[key]
+
+    def _finished(self, key: tuple[str, str], future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                self._finished_at[key] = time.monotonic()
+
+    def schedule(self, thread_id: str, job_id: str, fn: Callable[[], Any]) -> bool:
+        """Start `fn` as the thread's job `job_id` unless that job is already pending.
+
+        The thread's other jobs are dropped, since the thread has moved on from them.
+        """
+        key = (thread_id, job_id)
+        with self._lock:
+            self._evict_expired()
+            if key in self._pending:
+                return False
+            self._discard_others(key)
+            future = self._executor.submit(fn)
+            self._pending[key] = future
+        future.add_done_callback(lambda future: self._finished(key, future))
+        return True
+
+    def _discard_others(self, key: tuple[str, str]) -> None:
+        """Drop the thread's jobs other than key's. Call with the lock held."""
+        for other in [other for other in self._pending if other[0] == key[0] and other != key]:
+            self._pending.pop(other).cancel()
+            self._finished_at.pop(other, None)
+
+    def is_pending(self, thread_id: str, job_id: str) -> bool:
+        with self._lock:
+            self._evict_expired()
+            return (thread_id, job_id) in self._pending
+
+    def take(self, thread_id: str, job_id: str, timeout: float = 0.0) -> Optional[Any]:
+        """Return the result of the thread's job `job_id`, waiting up to `timeout` seconds for it.
+
+        Returns None if there is no such job, or it is still running after the timeout. The
+        thread's other jobs are dropped. A failed job is dropped so the
+        next turn can schedule a new one.
+        """
+        key = (thread_id, job_id)
+        with self._lock:
+            self._evict_expired()
+            self._discard_others(key)
+            future = self._pending.get(key)
+        if future is None:
+            return None
+        try:
+            result = future.result(timeout=timeout)
+        except TimeoutError:
+            return None
+        except Exception:
+            result = None
+        with self._lock:
+            self._pending.pop(key, None)
+            self._finished_at.pop(key, None)
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+# Shared by every run in the process
+summary_scheduler = SummaryScheduler()
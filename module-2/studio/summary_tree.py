@@ -0,0 +1,84 @@
+from typing import Callable, TypedDict
+
+from tokens import count_tokens
+
+## Multi-level summary of a long conversation
+
+# Chunk summaries rolled up into each section summary
+CHUNKS_PER_SECTION = 4
+
+class SummaryTree(TypedDict):
+    """Summaries of the evicted messages at three levels of detail.
+
+    Every eviction adds one chunk summary. Once CHUNKS_PER_SECTION chunks have piled up,
+    they are rolled up into a section summary and the section is folded into the thread
+    summary, which covers every closed section.
+    """
+    thread: str
+    sections: list[str]
+    chunks: list[str]
+
+def empty_tree() -> SummaryTree:
+    return {"thread": "", "sections": [], "chunks": []}
+
+def tree_from_summary(summary: str) -> SummaryTree:
+    """A tree whose thread summary is a running summary written before summary trees existed."""
+    return {"thread": summary, "sections": [], "chunks": []}
+
+def add_chunk(
+    tree: SummaryTree,
+    chunk: str,
+    summarize_section: Callable[[list[str]], str],
+    fold_thread: Callable[[str, str], str],
+) -> SummaryTree:
+    """Return a new tree with `chunk` added, recomputing only the branch it lands in.
+
+    `summarize_section` rolls a full set of chunks into one section summary, and
+    `fold_thread` extends the thread summary with a newly closed section.
+    """
+    tree = tree or empty_tree()
+    chunks = tree["chunks"] + [chunk]
+    if len(chunks) < CHUNKS_PER_SECTION:
+        return {"thread": tree["thread"], "sections": tree["sections"], "chunks": chunks}
+
+    # The section is full, so close it and fold it into the thread summary
+    section = summarize_section(chunks)
+    return {
+        "thread": fold_thread(tree["thread"], section),
+        "sections": tree["sections"] + [section],
+        "chunks": [],
+    }
+
+def render_tree(tree: SummaryTree, token_budget: int) -> str:
+    """Render the most useful levels of the tree that fit in `token_budget` tokens.
+
+    The thread summary comes first for coverage of the whole conversation. The remaining
+    budget goes to the newest details: open chunks, then closed sections, newest first.
+    Whatever is picked is rendered oldest first.
+    """
+    if not tree:
+        return ""
+    remaining = token_budget
+    thread = ""
+    if tree["thread"] and count_tokens(tree["thread"]) <= remaining:
+        thread = tree["thread"]
+        remaining -= count_tokens(thread)
+
+    def newest_that_fit(texts: list[str]) -> list[str]:
+        nonlocal remaining
+        picked = []
+        for text in reversed(texts):
+            tokens = count_tokens(text)
+            if tokens > remaining:
+                break
+            picked.append(text)
+            remaining -= tokens
+        return picked[::-1]
+
+    chunks = newest_that_fit(tree["chunks"])
+    # Older sections are only worth their tokens once every open chunk is in
+    sections = newest_that_fit(tree["sections"]) if len(chunks) == len(tree["chunks"]) else []
+
+    parts = [thread] if thread else []
+    parts += [f"- {text}" for text in sections + chunks]
+    return "\n".join(parts)
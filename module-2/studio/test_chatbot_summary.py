@@ -0,0 +1,49 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import MessagesState, StateGraph, START, END
+
+import chatbot
+
+class PromptSpy(BaseCallbackHandler):
+    def __init__(self):
+        self.prompts = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.prompts.append(messages[0])
+
+# The chatbot's state before the summary tree: messages and one running summary
+class LegacyState(MessagesState):
+    summary: str
+
+def legacy_thread(checkpointer, config) -> None:
+    builder = StateGraph(LegacyState)
+    builder.add_node("conversation", lambda state: {})
+    builder.add_edge(START, "conversation")
+    builder.add_edge("conversation", END)
+    legacy = builder.compile(checkpointer=checkpointer)
+    legacy.invoke({"messages": [HumanMessage(content="I'm training for a marathon", id="1"), AIMessage(content="Great!", id="2")],
+                   "summary": "Lance lives in San Francisco and likes biking."}, config)
+
+def test_legacy_summary_is_kept(monkeypatch):
+    monkeypatch.setenv("CHAT_MODEL", "fake")
+    checkpointer, config = MemorySaver(), {"configurable": {"thread_id": "legacy"}}
+    legacy_thread(checkpointer, config)
+
+    graph = chatbot.workflow.compile(checkpointer=checkpointer)
+    spy = PromptSpy()
+    graph.invoke({"messages": [("user", "Where do I live?")]}, {**config, "callbacks": [spy]})
+    assert "Lance lives in San Francisco" in spy.prompts[-1][0].content
+
+def test_legacy_summary_seeds_the_tree(monkeypatch):
+    monkeypatch.setenv("CHAT_MODEL", "fake")
+    monkeypatch.setattr(chatbot, "MESSAGE_TOKEN_BUDGET", 10)
+    monkeypatch.setattr(chatbot, "RETAINED_TOKEN_TARGET", 5)
+    checkpointer, config = MemorySaver(), {"configurable": {"thread_id": "legacy"}}
+    legacy_thread(checkpointer, config)
+
+    graph = chatbot.workflow.compile(checkpointer=checkpointer)
+    graph.invoke({"messages": [("user", "Where do I live?")]}, config)
+    tree = graph.get_state(config).values["summary_tree"]
+    assert tree["thread"] == "Lance lives in San Francisco and likes biking."
+    assert len(tree["chunks"]) == 1
@@ -0,0 +1,84 @@
+import sqlite3
+from typing import Annotated
+
+import pytest
+from typing_extensions import TypedDict
+
+from langchain_core.messages import AnyMessage
+from langgraph.channels.delta import DeltaChannel
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import MessagesState, StateGraph, START, END
+from langgraph.graph.message import _messages_delta_reducer
+
+from checkpoint_retention import RetainingSqliteSaver, compact, tag_checkpoint
+
+CONFIG = {"configurable": {"thread_id": "retention"}}
+
+def run_turns(saver, turns: int, state=MessagesState):
+    builder = StateGraph(state)
+    builder.add_node("reply", lambda state: {"messages": [("ai", "ok")]})
+    builder.add_edge(START, "reply")
+    builder.add_edge("reply", END)
+    graph = builder.compile(checkpointer=saver)
+    for turn in range(turns):
+        graph.invoke({"messages": [("user", f"turn {turn}")]}, CONFIG)
+    return graph
+
+def checkpoint_ids(conn: sqlite3.Connection) -> list[str]:
+    return [row[0] for row in conn.execute("SELECT checkpoint_id FROM checkpoints ORDER BY checkpoint_id")]
+
+def test_keep_last_must_be_positive():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    with pytest.raises(ValueError):
+        RetainingSqliteSaver(conn, keep_last=0)
+    with pytest.raises(ValueError):
+        compact(SqliteSaver(conn), keep_last=0)
+
+def test_threads_are_pruned_to_the_last_n_checkpoints():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    graph = run_turns(RetainingSqliteSaver(conn, keep_last=3), turns=4)
+    assert len(checkpoint_ids(conn)) == 3
+    assert len(list(graph.get_state_history(CONFIG))) == 3
+    assert len(graph.get_state(CONFIG).values["messages"]) == 8
+
+def test_compact_keeps_tagged_checkpoints(tmp_path):
+    conn = sqlite3.connect(tmp_path / "checkpoints.db", check_same_thread=False)
+    saver = SqliteSaver(conn)
+    run_turns(saver, turns=1)
+    tagged = checkpoint_ids(conn)[-1]
+    tag_checkpoint(saver, {"configurable": {**CONFIG["configurable"], "checkpoint_id": tagged}}, "first answer")
+    run_turns(saver, turns=3)
+
+    total = len(checkpoint_ids(conn))
+    assert compact(saver, keep_last=2) == total - 3
+    kept = checkpoint_ids(conn)
+    assert tagged in kept and len(kept) == 3
+
+def test_writes_are_deleted_with_their_checkpoint():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    saver = SqliteSaver(conn)
+    run_turns(saver, turns=3)
+    oldest = checkpoint_ids(conn)[:-2]
+    assert conn.execute(f"SELECT COUNT(*) FROM writes WHERE checkpoint_id IN ({','.join('?' * len(oldest))})", oldest).fetchone()[0] > 0
+
+    compact(saver, keep_last=2)
+    assert conn.execute("SELECT COUNT(*) FROM writes WHERE checkpoint_id NOT IN (SELECT checkpoint_id FROM checkpoints)").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0] > 0
+
+def delta_state(snapshot_frequency: int):
+    class DeltaState(TypedDict):
+        messages: Annotated[list[AnyMessage], DeltaChannel(_messages_delta_reducer, snapshot_frequency=snapshot_frequency)]
+    return DeltaState
+
+def test_delta_threads_are_not_pruned_before_a_snapshot_exists():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    run_turns(SqliteSaver(conn), turns=4, state=delta_state(1000))
+    total = len(checkpoint_ids(conn))
+    assert compact(SqliteSaver(conn), keep_last=2) == 0
+    assert len(checkpoint_ids(conn)) == total
+
+def test_delta_threads_keep_the_snapshot_their_oldest_checkpoint_needs():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    graph = run_turns(RetainingSqliteSaver(conn, keep_last=2), turns=4, state=delta_state(4))
+    assert len(checkpoint_ids(conn)) > 2
+    assert len(graph.get_state(CONFIG).values["messages"]) == 8
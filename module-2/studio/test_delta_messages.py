@@ -0,0 +1,33 @@
+import sqlite3
+
+from langchain_core.messages import RemoveMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import StateGraph, START, END
+
+from delta_messages import DeltaMessagesState
+
+CONFIG = {"configurable": {"thread_id": "delta"}}
+
+def build(saver):
+    builder = StateGraph(DeltaMessagesState)
+    builder.add_node("reply", lambda state: {"messages": [("ai", f"reply {len(state['messages'])}")]})
+    builder.add_edge(START, "reply")
+    builder.add_edge("reply", END)
+    return builder.compile(checkpointer=saver)
+
+def test_messages_round_trip_through_the_checkpointer(tmp_path):
+    path = tmp_path / "checkpoints.db"
+    graph = build(SqliteSaver(sqlite3.connect(path, check_same_thread=False)))
+    for turn in range(3):
+        graph.invoke({"messages": [("user", f"turn {turn}")]}, CONFIG)
+    written = graph.get_state(CONFIG).values["messages"]
+
+    # A new connection has nothing cached, so the list is rebuilt from the stored deltas
+    graph = build(SqliteSaver(sqlite3.connect(path, check_same_thread=False)))
+    messages = graph.get_state(CONFIG).values["messages"]
+    assert [(m.id, m.content) for m in messages] == [(m.id, m.content) for m in written]
+    assert [m.content for m in messages] == ["turn 0", "reply 1", "turn 1", "reply 3", "turn 2", "reply 5"]
+
+    # Replayed messages keep their IDs, so they can still be removed
+    graph.update_state(CONFIG, {"messages": [RemoveMessage(id=messages[0].id)]})
+    assert [m.content for m in graph.get_state(CONFIG).values["messages"]][0] == "reply 1"
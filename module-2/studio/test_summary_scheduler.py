@@ -0,0 +1,54 @@
+import threading
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+
+import chatbot
+from summary_scheduler import SummaryScheduler
+
+def test_results_are_keyed_by_job():
+    scheduler = SummaryScheduler()
+    assert scheduler.schedule("thread", "job-1", lambda: "summary")
+    assert not scheduler.schedule("thread", "job-1", lambda: "again")
+    assert scheduler.take("thread", "job-2", timeout=1) is None
+    # Taking another job drops the job of the branch the thread left
+    assert scheduler.take("thread", "job-1", timeout=1) is None
+    assert len(scheduler) == 0
+
+def test_scheduling_a_new_job_drops_the_old_job():
+    scheduler = SummaryScheduler()
+    release = threading.Event()
+    scheduler.schedule("thread", "job-1", release.wait)
+    scheduler.schedule("thread", "job-2", lambda: "summary")
+    release.set()
+    assert not scheduler.is_pending("thread", "job-1")
+    assert scheduler.take("thread", "job-2", timeout=1) == "summary"
+
+def test_uncollected_results_expire():
+    scheduler = SummaryScheduler(result_ttl=0.05)
+    for i in range(10):
+        scheduler.schedule(f"thread-{i}", "job", lambda: "summary")
+    time.sleep(0.2)
+    scheduler.schedule("thread-new", "job", lambda: "summary")
+    assert len(scheduler) <= 1
+
+def test_summary_is_not_applied_after_time_travel(monkeypatch):
+    monkeypatch.setenv("CHAT_MODEL", "fake")
+    monkeypatch.setattr(chatbot, "MESSAGE_TOKEN_BUDGET", 10)
+    monkeypatch.setattr(chatbot, "RETAINED_TOKEN_TARGET", 5)
+    graph = chatbot.workflow.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "time-travel", "background_summary": True, "summary_wait_seconds": 5}}
+
+    graph.invoke({"messages": [("user", "hi, I'm Lance and I like biking in San Francisco")]}, config)
+    graph.invoke({"messages": [("user", "what bikes do you recommend for hills?")]}, config)
+    assert graph.get_state(config).values["pending_summary"]
+
+    # Go back to before the summary was scheduled and continue from there
+    before = next(s for s in graph.get_state_history(config) if s.next == ("apply_pending_summary",) and len(s.values["messages"]) == 3)
+    graph.invoke({"messages": [("user", "actually, tell me about running")]}, {**before.config, "configurable": {**before.config["configurable"], **config["configurable"]}})
+    assert not graph.get_state(config).values.get("summary_tree")
+
+    # The new branch schedules a summary of its own, which the next turn applies
+    assert graph.get_state(config).values["pending_summary"]
+    graph.invoke({"messages": [("user", "and swimming?")]}, config)
+    assert graph.get_state(config).values.get("summary_tree")
@@ -1,9 +1,14 @@
+from functools import lru_cache
+
 from langchain_core.messages import SystemMessage
-from langchain_openai import ChatOpenAI
 
 from langgraph.graph import START, StateGraph, MessagesState
 from langgraph.prebuilt import tools_condition, ToolNode
 
+from lazy import chat_model, use_fake_model
+from tool_cache import pure, tool_results
+
+@pure
 def add(a: int, b: int) -> int:
     """Adds a and b.
 
@@ -13,6 +18,7 @@ def add(a: int, b: int) -> int:
     """
     return a + b
 
+@pure
 def multiply(a: int, b: int) -> int:
     """Multiplies a and b.
 
@@ -22,8 +28,9 @@ def multiply(a: int, b: int) -> int:
     """
     return a * b
 
+@pure
 def divide(a: int, b: int) -> float:
-    """Adds a and b.
+    """Divide a and b.
 
     Args:
         a: first int
@@ -33,21 +40,25 @@ def divide(a: int, b: int) -> float:
 
 tools = [add, multiply, divide]
 
-# Define LLM with bound tools
-llm = ChatOpenAI(model="gpt-4o")
-llm_with_tools = llm.bind_tools(tools)
+# Define LLM with bound tools, built on first use for each CHAT_MODEL setting
+def llm_with_tools():
+    return _llm_with_tools(use_fake_model())
+
+@lru_cache(maxsize=None)
+def _llm_with_tools(fake: bool):
+    return chat_model().bind_tools(tools)
 
 # System message
 sys_msg = SystemMessage(content="You are a helpful assistant tasked with writing performing arithmetic on a set of inputs.")
 
 # Node
 def assistant(state: MessagesState):
-   return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+   return {"messages": [llm_with_tools().invoke([sys_msg] + state["messages"])]}
 
 # Build graph
 builder = StateGraph(MessagesState)
 builder.add_node("assistant", assistant)
-builder.add_node("tools", ToolNode(tools))
+builder.add_node("tools", ToolNode(tools, wrap_tool_call=tool_results))
 builder.add_edge(START, "assistant")
 builder.add_conditional_edges(
     "assistant",
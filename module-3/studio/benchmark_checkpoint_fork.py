@@ -0,0 +1,95 @@
+"""Benchmark what-if branches of one long agent thread on MemorySaver or SqliteSaver.
+
+Builds a thread of --messages messages with the agent's assistant / tools loop, plus a
+--context-chars context channel that branches never edit. Then fans out --forks edits
+of a past checkpoint two ways: copying the state into a new thread with get_state and
+update_state, and branch_checkpoint. Reports the time and the newly stored bytes per
+fork. On MemorySaver the branch shares the unedited context channel; SqliteSaver stores
+every checkpoint in full. The edited messages channel is stored again in full either way.
+
+    python benchmark_checkpoint_fork.py --messages 1000 --forks 24 --saver sqlite
+"""
+import argparse
+import sqlite3
+import time
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import MessagesState, StateGraph, START, END
+
+from checkpoint_fork import branch_checkpoint
+
+class State(MessagesState):
+    context: str
+
+def build(message_chars: int):
+    """The agent's graph shape, with nodes that return fixed-size messages instead of calling a model."""
+    def assistant(state):
+        return {"messages": [("ai", "x" * message_chars)]}
+
+    def route(state):
+        return "tools" if len(state["messages"]) % 6 < 4 else END
+
+    builder = StateGraph(State)
+    builder.add_node("assistant", assistant)
+    builder.add_node("tools", assistant)
+    builder.add_edge(START, "assistant")
+    builder.add_conditional_edges("assistant", route, ["tools", END])
+    builder.add_edge("tools", "assistant")
+    return builder
+
+def stored_bytes(saver) -> int:
+    """Bytes of every serialized blob, checkpoint, metadata and write the saver holds."""
+    if not isinstance(saver, MemorySaver):
+        return saver.conn.execute(
+            "SELECT (SELECT TOTAL(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints)"
+            " + (SELECT TOTAL(LENGTH(value)) FROM writes)"
+        ).fetchone()[0]
+    total = sum(len(blob[1]) for blob in saver.blobs.values())
+    for namespaces in saver.storage.values():
+        for checkpoints in namespaces.values():
+            total += sum(len(checkpoint[1]) + len(metadata[1]) for checkpoint, metadata, _ in checkpoints.values())
+    return total
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000, help="Messages in the source thread")
+    parser.add_argument("--message-chars", type=int, default=300)
+    parser.add_argument("--context-chars", type=int, default=100_000, help="Size of the channel forks leave unedited")
+    parser.add_argument("--forks", type=int, default=24)
+    parser.add_argument("--saver", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args()
+
+    if args.saver == "sqlite":
+        from langgraph.checkpoint.sqlite import SqliteSaver
+        saver = SqliteSaver(sqlite3.connect(":memory:", check_same_thread=False))
+    else:
+        saver = MemorySaver()
+    graph = build(args.message_chars).compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "source"}}
+    while len(graph.get_state(config).values.get("messages", [])) < args.messages:
+        graph.invoke({"messages": [("user", "y" * args.message_chars)], "context": "z" * args.context_chars}, config)
+    past = next(s for s in graph.get_state_history(config) if s.next == ("assistant",) and s.metadata["step"] > 0)
+    edit = {"messages": [HumanMessage("What if?", id=past.values["messages"][-1].id)]}
+
+    def copy_state(thread_id):
+        values = graph.get_state(past.config).values
+        graph.update_state({"configurable": {"thread_id": thread_id}}, values, as_node="tools")
+
+    runs = [
+        ("copy state", copy_state),
+        ("branch + edit", lambda thread_id: branch_checkpoint(graph, past.config, edit, as_node="tools")),
+    ]
+    print(f"Forking a checkpoint with {len(past.values['messages'])} messages and {args.context_chars} context chars, {args.forks} times, on {args.saver}")
+    print(f"{'':<14} {'ms/fork':>9} {'KB/fork':>9}")
+    for name, fork in runs:
+        thread_ids = [f"{name}-{i}" for i in range(args.forks)]
+        before = stored_bytes(saver)
+        start = time.perf_counter()
+        for thread_id in thread_ids:
+            fork(thread_id)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<14} {elapsed / args.forks * 1000:>9.3f} {(stored_bytes(saver) - before) / args.forks / 1024:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import get_checkpoint_id
+
+## What-if branches of a thread's past checkpoints
+
+def branch_checkpoint(graph, config: RunnableConfig, values: Optional[Any] = None, as_node: Optional[str] = None) -> RunnableConfig:
+    """Branch off the past checkpoint in `config` within its own thread, applying `values` as `as_node`.
+
+    Whether the branch shares storage with its parent depends on the checkpointer.
+    MemorySaver (InMemorySaver) and PostgresSaver store each channel value once per
+    version, so the branch's checkpoint adds only the channels `values` changes and
+    shares every other channel with the checkpoint it branches from. SqliteSaver stores
+    every checkpoint in full, so there a branch costs as much as a copy of the state.
+
+    Even where channels are shared, the saving applies only to unedited channels.
+    `messages` is a single channel, so editing any one message stores the whole list
+    again. Without `values`, nothing is stored, and invoking the graph with the returned
+    config starts the branch. Returns the config of the branch.
+    """
+    if get_checkpoint_id(config) is None:
+        raise ValueError("Branching needs the checkpoint_id of the checkpoint to branch from")
+    if values is None:
+        return config
+    return graph.update_state(config, values, as_node=as_node)
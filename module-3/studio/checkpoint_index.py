@@ -0,0 +1,206 @@
+import bisect
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import StateSnapshot
+
+## Side index over checkpoints for time travel
+
+# Edges trigger a node by writing to its "branch:to:<node>" channel, or "join:<nodes>:<node>"
+# for an edge from several nodes, and input starts at START. Send packets wait in TASKS
+BRANCH_PREFIX = "branch:to:"
+JOIN_PREFIX = "join:"
+START_CHANNEL = "__start__"
+TASKS_CHANNEL = "__pregel_tasks"
+
+def triggered_node(channel: str) -> Optional[str]:
+    """The node a trigger channel starts, or None for channels that only hold state."""
+    if channel.startswith(BRANCH_PREFIX):
+        return channel[len(BRANCH_PREFIX):]
+    if channel.startswith(JOIN_PREFIX):
+        return channel.rsplit(":", 1)[1]
+    if channel == START_CHANNEL:
+        return START_CHANNEL
+    return None
+
+def next_nodes(checkpoint: Checkpoint) -> tuple[str, ...]:
+    """The nodes a checkpoint runs next, worked out the way the graph loop plans its next step.
+
+    Sends (PUSH tasks) are the packets waiting in the TASKS channel. A node reached by an
+    edge (PULL task) runs if its trigger channel holds a value of a newer version than the
+    node has seen, which also covers update_state checkpoints. Nodes with custom triggers,
+    as in the functional API, are not covered.
+    """
+    values = checkpoint.get("channel_values") or {}
+    versions = checkpoint.get("channel_versions") or {}
+    versions_seen = checkpoint.get("versions_seen") or {}
+    pushed = [packet.node for packet in values.get(TASKS_CHANNEL) or () if hasattr(packet, "node")]
+    pulled = set()
+    for channel, version in versions.items():
+        node = triggered_node(channel)
+        if node is None or channel not in values:
+            continue
+        seen = versions_seen.get(node, {}).get(channel)
+        if seen is None or version > seen:
+            pulled.add(node)
+    return tuple(pushed + sorted(pulled))
+
+@dataclass(frozen=True)
+class CheckpointEntry:
+    """What the index keeps about one checkpoint: its metadata, never its channel values."""
+    thread_id: str
+    checkpoint_ns: str
+    checkpoint_id: str
+    parent_checkpoint_id: Optional[str]
+    step: int
+    source: str
+    next: tuple[str, ...]
+    ts: str
+
+    @property
+    def config(self) -> RunnableConfig:
+        return {"configurable": {"thread_id": self.thread_id, "checkpoint_ns": self.checkpoint_ns, "checkpoint_id": self.checkpoint_id}}
+
+    def load(self, graph) -> StateSnapshot:
+        """Load the full state of this checkpoint. This is the only call that reads channel values."""
+        return graph.get_state(self.config)
+
+class ThreadIndex:
+    """The checkpoints of one thread and namespace, oldest first, with positions by next node."""
+
+    def __init__(self):
+        self.ids: list[str] = []
+        self.entries: list[CheckpointEntry] = []
+        self.by_node: dict[str, list[int]] = {}
+
+    def add(self, entry: CheckpointEntry) -> None:
+        # Checkpoint IDs are time-ordered, so new checkpoints almost always go at the end
+        position = bisect.bisect_left(self.ids, entry.checkpoint_id)
+        if position < len(self.ids) and self.ids[position] == entry.checkpoint_id:
+            return
+        self.ids.insert(position, entry.checkpoint_id)
+        self.entries.insert(position, entry)
+        # A node with several Sends in one step is listed once
+        if position == len(self.entries) - 1:
+            for node in dict.fromkeys(entry.next):
+                self.by_node.setdefault(node, []).append(position)
+        else:
+            self.by_node = {}
+            for i, e in enumerate(self.entries):
+                for node in dict.fromkeys(e.next):
+                    self.by_node.setdefault(node, []).append(i)
+
+class CheckpointIndex:
+    """Checkpoint metadata by (thread_id, step, node, timestamp), recorded as checkpoints are written.
+
+    Every lookup first catches up on checkpoints the saver holds but the index has not
+    seen, e.g. those written by another process: it lists the thread newest first and
+    stops at the first known checkpoint, so it reads one checkpoint when nothing is new,
+    and the whole thread the first time it is queried. Checkpoint IDs are time-ordered,
+    so a checkpoint another process writes with a clock running behind can be missed.
+    """
+
+    def __init__(self, saver: BaseCheckpointSaver):
+        self.saver = saver
+        self._threads: dict[tuple[str, str], ThreadIndex] = {}
+        self._lock = Lock()
+
+    def record(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, parent_checkpoint_id: Optional[str]) -> None:
+        configurable = config["configurable"]
+        entry = CheckpointEntry(
+            thread_id=str(configurable["thread_id"]),
+            checkpoint_ns=configurable.get("checkpoint_ns", ""),
+            checkpoint_id=checkpoint["id"],
+            parent_checkpoint_id=parent_checkpoint_id,
+            step=metadata.get("step", -1),
+            source=metadata.get("source", ""),
+            next=next_nodes(checkpoint),
+            ts=checkpoint["ts"],
+        )
+        with self._lock:
+            self._threads.setdefault((entry.thread_id, entry.checkpoint_ns), ThreadIndex()).add(entry)
+
+    def forget(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._threads if key[0] == thread_id]:
+                del self._threads[key]
+
+    def _thread(self, thread_id: str, checkpoint_ns: str) -> ThreadIndex:
+        key = (str(thread_id), checkpoint_ns)
+        config = {"configurable": {"thread_id": key[0], "checkpoint_ns": checkpoint_ns}}
+        with self._lock:
+            known = set(self._threads.get(key, ThreadIndex()).ids)
+        for item in self.saver.list(config):
+            if item.checkpoint["id"] in known:
+                break
+            parent = item.parent_config["configurable"]["checkpoint_id"] if item.parent_config else None
+            self.record(item.config, item.checkpoint, item.metadata, parent)
+        with self._lock:
+            return self._threads.setdefault(key, ThreadIndex())
+
+    def history(self, thread_id: str, checkpoint_ns: str = "") -> list[CheckpointEntry]:
+        """Every checkpoint of the thread, newest first, like get_state_history."""
+        thread = self._thread(thread_id, checkpoint_ns)
+        with self._lock:
+            return thread.entries[::-1]
+
+    def find(
+        self,
+        thread_id: str,
+        *,
+        node: Optional[str] = None,
+        step: Optional[int] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        checkpoint_ns: str = "",
+    ) -> list[CheckpointEntry]:
+        """Checkpoints about to run `node`, at `step`, or written between the ISO timestamps `since` and `until`, newest first."""
+        thread = self._thread(thread_id, checkpoint_ns)
+        with self._lock:
+            candidates = [thread.entries[i] for i in thread.by_node.get(node, [])] if node is not None else list(thread.entries)
+        return [
+            entry for entry in reversed(candidates)
+            if (step is None or entry.step == step)
+            and (since is None or entry.ts >= since)
+            and (until is None or entry.ts <= until)
+        ]
+
+    def before_node(self, thread_id: str, node: str, checkpoint_ns: str = "") -> Optional[CheckpointEntry]:
+        """The latest checkpoint right before `node` ran, which is where to replay or fork it from."""
+        matches = self.find(thread_id, node=node, checkpoint_ns=checkpoint_ns)
+        return matches[0] if matches else None
+
+class IndexedCheckpointer:
+    """Mixin that keeps a CheckpointIndex of every checkpoint the saver writes.
+
+    Put it before the saver class, e.g. `class IndexedSqliteSaver(IndexedCheckpointer, SqliteSaver)`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index = CheckpointIndex(self)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        self.index.record(saved, checkpoint, metadata, config["configurable"].get("checkpoint_id"))
+        return saved
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        saved = await super().aput(config, checkpoint, metadata, new_versions)
+        self.index.record(saved, checkpoint, metadata, config["configurable"].get("checkpoint_id"))
+        return saved
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self.index.forget(thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await super().adelete_thread(thread_id)
+        self.index.forget(thread_id)
+
+class IndexedMemorySaver(IndexedCheckpointer, MemorySaver):
+    """MemorySaver with a checkpoint index, for the time-travel notebooks."""
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+
+from checkpoint_fork import branch_checkpoint
+
+class State(MessagesState):
+    context: str
+
+def build(saver):
+    def assistant(state):
+        return {"messages": [("ai", f"reply {len(state['messages'])}")]}
+
+    builder = StateGraph(State)
+    builder.add_node("assistant", assistant)
+    builder.add_edge(START, "assistant")
+    builder.add_edge("assistant", END)
+    return builder.compile(checkpointer=saver)
+
+def thread_with_history(saver):
+    graph = build(saver)
+    config = {"configurable": {"thread_id": "source"}}
+    for turn in range(3):
+        graph.invoke({"messages": [("user", f"question {turn}")], "context": "z" * 1000}, config)
+    past = next(s for s in graph.get_state_history(config) if s.next == ("assistant",) and len(s.values["messages"]) == 3)
+    return graph, config, past
+
+def edit_of(past):
+    return {"messages": [HumanMessage("What if?", id=past.values["messages"][-1].id)]}
+
+def test_branching_needs_a_checkpoint_id():
+    graph, config, _ = thread_with_history(MemorySaver())
+    with pytest.raises(ValueError):
+        branch_checkpoint(graph, config, {"messages": [("user", "hi")]})
+
+def test_branch_without_values_stores_nothing():
+    saver = MemorySaver()
+    graph, config, past = thread_with_history(saver)
+    checkpoints = len(list(saver.list(config)))
+    assert branch_checkpoint(graph, past.config) == past.config
+    assert len(list(saver.list(config))) == checkpoints
+
+def test_branch_applies_the_edit_and_leaves_its_parent_alone():
+    graph, config, past = thread_with_history(MemorySaver())
+    branch = branch_checkpoint(graph, past.config, edit_of(past), as_node="__start__")
+
+    state = graph.get_state(branch)
+    assert state.parent_config["configurable"]["checkpoint_id"] == past.config["configurable"]["checkpoint_id"]
+    assert state.values["messages"][-1].content == "What if?"
+    assert graph.get_state(past.config).values["messages"][-1].content == "question 1"
+
+    result = graph.invoke(None, branch)
+    assert [m.content for m in result["messages"][-2:]] == ["What if?", "reply 3"]
+
+def test_branch_shares_unedited_channels_on_memory_saver():
+    saver = MemorySaver()
+    graph, _, past = thread_with_history(saver)
+    context_blobs = sum(1 for key in saver.blobs if key[2] == "context")
+    branch_checkpoint(graph, past.config, edit_of(past), as_node="__start__")
+    assert sum(1 for key in saver.blobs if key[2] == "context") == context_blobs
+
+def test_branch_stores_the_full_checkpoint_on_sqlite_saver():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    graph, _, past = thread_with_history(SqliteSaver(conn))
+    branch = branch_checkpoint(graph, past.config, edit_of(past), as_node="__start__")
+    (stored,) = conn.execute("SELECT checkpoint FROM checkpoints WHERE checkpoint_id = ?", (branch["configurable"]["checkpoint_id"],)).fetchone()
+    # The unedited context is serialized into the branch's own row
+    assert b"z" * 1000 in stored
@@ -0,0 +1,72 @@
+import operator
+import sqlite3
+from typing import Annotated
+
+from typing_extensions import TypedDict
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+
+from checkpoint_index import IndexedCheckpointer, IndexedMemorySaver
+
+class IndexedSqliteSaver(IndexedCheckpointer, SqliteSaver):
+    pass
+
+class State(TypedDict):
+    items: list[int]
+    results: Annotated[list[int], operator.add]
+
+def build(saver):
+    """Fan out one Send per item, then stop before `summarize`."""
+    builder = StateGraph(State)
+    builder.add_node("plan", lambda state: {})
+    builder.add_node("work", lambda packet: {"results": [packet["item"] * 2]})
+    builder.add_node("summarize", lambda state: {})
+    builder.add_edge(START, "plan")
+    builder.add_conditional_edges("plan", lambda state: [Send("work", {"item": item}) for item in state["items"]], ["work"])
+    builder.add_edge("work", "summarize")
+    builder.add_edge("summarize", END)
+    return builder.compile(checkpointer=saver, interrupt_before=["summarize"])
+
+CONFIG = {"configurable": {"thread_id": "1"}}
+
+def run(graph) -> None:
+    graph.invoke({"items": [1, 2]}, CONFIG)
+    graph.update_state(CONFIG, {"results": [10]}, as_node="work")
+
+def assert_matches_history(graph, entries) -> None:
+    snapshots = list(graph.get_state_history(CONFIG))
+    assert [entry.checkpoint_id for entry in entries] == [s.config["configurable"]["checkpoint_id"] for s in snapshots]
+    for entry, snapshot in zip(entries, snapshots):
+        assert sorted(entry.next) == sorted(snapshot.next), snapshot.metadata
+        assert (entry.step, entry.source) == (snapshot.metadata["step"], snapshot.metadata["source"])
+
+def test_history_matches_get_state_history():
+    saver = IndexedMemorySaver()
+    graph = build(saver)
+    run(graph)
+    assert_matches_history(graph, saver.index.history("1"))
+
+def test_sends_and_update_state_checkpoints_are_indexed_by_node():
+    saver = IndexedMemorySaver()
+    graph = build(saver)
+    run(graph)
+    snapshots = list(graph.get_state_history(CONFIG))
+    for node in ("work", "summarize"):
+        expected = [s.config["configurable"]["checkpoint_id"] for s in snapshots if node in s.next]
+        assert [entry.checkpoint_id for entry in saver.index.find("1", node=node)] == expected
+    # Both Sends run in one step, and the update_state checkpoint is the latest stop before summarize
+    assert ("work", "work") in [entry.next for entry in saver.index.find("1", node="work")]
+    assert saver.index.before_node("1", "summarize").source == "update"
+
+def test_checkpoints_written_by_another_process_are_picked_up():
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    indexed = IndexedSqliteSaver(conn)
+    # A saver over the same database with its own index, as another process would have
+    other = build(SqliteSaver(conn))
+    other.invoke({"items": [1]}, CONFIG)
+    assert_matches_history(other, indexed.index.history("1"))
+
+    other.update_state(CONFIG, {"results": [10]}, as_node="work")
+    assert_matches_history(other, indexed.index.history("1"))
@@ -0,0 +1,107 @@
+"""Models and heavy dependencies built on first use, so importing a graph stays cheap.
+
+Model clients, Trustcall extractors and community loaders pull in heavy packages and
+are not needed until a node runs. Graphs get them from the factories here, or from
+cached ones built on `chat_model` and keyed on `use_fake_model()`. With CHAT_MODEL=fake,
+the factories return the offline stand-ins in fake_chat_model.py instead.
+
+Nodes call the factory (`chat_model().invoke(...)`) rather than holding a module-level
+proxy: when a graph is compiled, LangGraph looks up attributes of the objects a node
+refers to, which would build a proxied model at import time anyway.
+
+Run this file from a studio directory to check the import time of every graph in its
+langgraph.json, each in a fresh interpreter:
+
+    python lazy.py --budget-ms 250
+
+Every graph imports langgraph itself, which takes about 1 s on a slow machine, so the
+budget is for what a graph adds on top of it: the time to import the graph in an
+interpreter that has already imported `langgraph.graph`.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from functools import lru_cache
+
+## Factories
+
+def use_fake_model() -> bool:
+    return os.environ.get("CHAT_MODEL") == "fake"
+
+def chat_model(model: str = "gpt-4o", provider: str = "openai", **kwargs):
+    """The chat model used by the graphs, built once per CHAT_MODEL setting and set of arguments on first use."""
+    # CHAT_MODEL is read on every call, so changing it takes effect without a restart
+    return _chat_model(use_fake_model(), model, provider, **kwargs)
+
+@lru_cache(maxsize=None)
+def _chat_model(fake: bool, model: str, provider: str, **kwargs):
+    if fake:
+        from fake_chat_model import FakeChatModel
+        return FakeChatModel.from_env(model)
+    if provider == "vertexai":
+        from langchain_google_vertexai import ChatVertexAI
+        return ChatVertexAI(model=model, **kwargs)
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model, **kwargs)
+
+def web_search(max_results: int = 3):
+    """Tavily web search, or canned results with CHAT_MODEL=fake."""
+    if use_fake_model():
+        from fake_chat_model import FakeSearch
+        return FakeSearch(max_results=max_results)
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    return TavilySearchResults(max_results=max_results)
+
+def wikipedia_loader(query: str, load_max_docs: int = 2):
+    """Wikipedia loader for `query`, or canned documents with CHAT_MODEL=fake."""
+    if use_fake_model():
+        from fake_chat_model import FakeLoader
+        return FakeLoader(query, load_max_docs=load_max_docs)
+    from langchain_community.document_loaders import WikipediaLoader
+    return WikipediaLoader(query=query, load_max_docs=load_max_docs)
+
+## Import-time budget
+
+# Import time a graph may add on top of BASELINE_MODULE, measured in a fresh interpreter
+DEFAULT_IMPORT_BUDGET_MS = 250
+BASELINE_MODULE = "langgraph.graph"
+
+def import_ms(module: str, after: str = "") -> float:
+    """Milliseconds to import `module` in a fresh interpreter in the current directory, after importing `after` if given."""
+    code = f"import time; start = time.perf_counter(); import {module}; print((time.perf_counter() - start) * 1000)"
+    if after:
+        code = f"import {after}; {code}"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="langgraph.json")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS, help="Import time a graph may add on top of langgraph")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per graph; the fastest is reported")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        graphs = json.load(f)["graphs"]
+    over = 0
+    print(f"{'graph':<28} {'import ms':>10} {'added ms':>9}  budget {args.budget_ms:.0f} ms")
+    for name, path in graphs.items():
+        module = path.split(":")[0].removeprefix("./").removesuffix(".py").replace("/", ".")
+        try:
+            elapsed = min(import_ms(module) for _ in range(args.runs))
+            added = min(import_ms(module, after=BASELINE_MODULE) for _ in range(args.runs))
+        except RuntimeError as error:
+            print(f"{name:<28} {'error':>10} {'':>9}  {error}")
+            over += 1
+            continue
+        status = "ok" if added <= args.budget_ms else "OVER"
+        over += status == "OVER"
+        print(f"{name:<28} {elapsed:>10.0f} {added:>9.0f}  {status}")
+    sys.exit(1 if over else 0)
+
+if __name__ == "__main__":
+    main()
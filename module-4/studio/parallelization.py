@@ -5,14 +5,13 @@ from typing_extensions import TypedDict
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage
 
-from langchain_community.document_loaders import WikipediaLoader
-from langchain_community.tools import TavilySearchResults
-
-from langchain_openai import ChatOpenAI
-
 from langgraph.graph import StateGraph, START, END
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0) 
+from lazy import chat_model, web_search, wikipedia_loader
+
+# LLM, built on first use
+def llm():
+    return chat_model(temperature=0)
 
 class State(TypedDict):
     question: str
@@ -24,7 +23,7 @@ def search_web(state):
     """ Retrieve docs from web search """
 
     # Search
-    tavily_search = TavilySearchResults(max_results=3)
+    tavily_search = web_search(max_results=3)
     search_docs = tavily_search.invoke(state['question'])
 
      # Format
@@ -42,8 +41,8 @@ def search_wikipedia(state):
     """ Retrieve docs from wikipedia """
 
     # Search
-    search_docs = WikipediaLoader(query=state['question'], 
-                                  load_max_docs=2).load()
+    search_docs = wikipedia_loader(query=state['question'], 
+                                   load_max_docs=2).load()
 
      # Format
     formatted_search_docs = "\n\n---\n\n".join(
@@ -69,7 +68,7 @@ def generate_answer(state):
                                                        context=context)    
     
     # Answer
-    answer = llm.invoke([SystemMessage(content=answer_instructions)]+[HumanMessage(content=f"Answer the question.")])
+    answer = llm().invoke([SystemMessage(content=answer_instructions)]+[HumanMessage(content=f"Answer the question.")])
       
     # Append it to state
     return {"answer": answer}
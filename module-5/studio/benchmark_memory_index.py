@@ -0,0 +1,82 @@
+"""Measure MemoryIndex lookup latency as a user's memory collection grows.
+
+Runs fully offline: memories are synthetic sentences and nothing is embedded remotely.
+`search` times MemoryIndex.search alone; `get + search` times what call_model does each
+turn, memory_indexes.get on an InMemoryStore followed by the search.
+
+    python benchmark_memory_index.py --sizes 1000 10000 --queries 1000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from langgraph.store.base import Item
+from langgraph.store.memory import InMemoryStore
+
+from memory_index import MemoryIndex, MemoryIndexRegistry
+
+SUBJECTS = ["User", "The user", "Lance", "Their sister", "Their manager"]
+VERBS = ["likes", "dislikes", "is learning", "plans to try", "often talks about", "recently started"]
+TOPICS = [
+    "biking", "French", "sourdough baking", "the Golden Gate park", "jazz piano", "rock climbing",
+    "machine learning", "Italian food", "marathon training", "gardening", "chess openings", "sailing",
+]
+QUERIES = [
+    "Any good biking routes this weekend?",
+    "Can you recommend a French restaurant?",
+    "What should I practice on the piano?",
+    "Help me plan my marathon training",
+    "What do you remember about my manager?",
+]
+
+def synthetic_memory(i: int, now: datetime) -> Item:
+    content = f"{random.choice(SUBJECTS)} {random.choice(VERBS)} {random.choice(TOPICS)} (note {i})"
+    return Item(value={"content": content}, key=str(i), namespace=("memories", "bench-user"), created_at=now, updated_at=now)
+
+def quantiles_ms(latencies: list[float]) -> tuple[float, float]:
+    quantiles = statistics.quantiles(latencies, n=100)
+    return quantiles[49] * 1000, quantiles[98] * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(0)
+    now = datetime.now(timezone.utc)
+    print(f"{'':>9} {'':>9} {'search':>19} {'get + search':>19}")
+    print(f"{'memories':>9} {'build s':>9} {'p50 ms':>9} {'p99 ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for size in args.sizes:
+        index = MemoryIndex()
+        start = time.perf_counter()
+        for i in range(size):
+            index.add(synthetic_memory(i, now))
+        build = time.perf_counter() - start
+
+        latencies = []
+        for q in range(args.queries):
+            start = time.perf_counter()
+            index.search(QUERIES[q % len(QUERIES)], args.k)
+            latencies.append(time.perf_counter() - start)
+
+        store, registry = InMemoryStore(), MemoryIndexRegistry()
+        namespace = ("memories", "bench-user")
+        for i in range(size):
+            registry.put(store, namespace, str(i), synthetic_memory(i, now).value)
+        # The first get builds the index, as the first turn after a restart would
+        registry.get(store, namespace)
+        turn_latencies = []
+        for q in range(args.queries):
+            start = time.perf_counter()
+            registry.get(store, namespace).search(QUERIES[q % len(QUERIES)], args.k)
+            turn_latencies.append(time.perf_counter() - start)
+
+        (p50, p99), (turn_p50, turn_p99) = quantiles_ms(latencies), quantiles_ms(turn_latencies)
+        print(f"{size:>9} {build:>9.3f} {p50:>9.3f} {p99:>9.3f} {turn_p50:>9.3f} {turn_p99:>9.3f}")
+
+if __name__ == "__main__":
+    main()
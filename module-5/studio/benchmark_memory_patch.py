@@ -0,0 +1,41 @@
+"""Compare output tokens per memory update for the rewrite and patch modes of write_memory.
+
+For each memory size, one update adds a fact and changes another. Rewrite mode has to
+emit the whole updated memory, while patch mode emits only the two line operations.
+Output is counted with tiktoken when its encoding is available, else estimated at
+four characters per token. No model is called.
+
+    python benchmark_memory_patch.py --sizes 10 50 100 500
+"""
+import argparse
+import math
+
+from memory_patch import LineOperation, MemoryPatch, apply_patch, render_lines
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("o200k_base").encode(text))
+    except Exception:
+        return max(1, math.ceil(len(text) / 4))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 250, 500])
+    args = parser.parse_args()
+
+    print(f"{'lines':>6} {'rewrite tokens':>15} {'patch tokens':>13} {'saved':>7}")
+    for size in args.sizes:
+        lines = [f"User fact number {i}: enjoys activity {i} on weekends with friends" for i in range(size)]
+        patch = MemoryPatch(operations=[
+            LineOperation(op="add", text="Recently moved to New York City"),
+            LineOperation(op="modify", line=1, text="User fact number 0: now prefers activity 0 on weekday mornings"),
+        ])
+
+        # Rewrite mode outputs the full memory; patch mode outputs the structured patch
+        rewrite_tokens = count_tokens(render_lines(apply_patch(lines, patch)))
+        patch_tokens = count_tokens(patch.model_dump_json(exclude_none=True))
+        print(f"{size:>6} {rewrite_tokens:>15} {patch_tokens:>13} {1 - patch_tokens / rewrite_tokens:>7.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass, field, fields
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated
@@ -10,6 +10,10 @@ from dataclasses import dataclass
 class Configuration:
     """The configurable fields for the chatbot."""
     user_id: str = "default-user"
+    # Small model consulted when the memory gate's heuristic is unsure; unset means always write
+    memory_gate_model: Optional[str] = None
+    # How write_memory updates the bulleted memory: "rewrite" regenerates it, "patch" edits numbered lines
+    memory_update_mode: Literal["rewrite", "patch"] = "rewrite"
 
     @classmethod
     def from_runnable_config(
@@ -3,22 +3,20 @@ from datetime import datetime
 
 from pydantic import BaseModel, Field
 
-from trustcall import create_extractor
-
 from typing import Literal, Optional, TypedDict
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import merge_message_runs
 from langchain_core.messages import SystemMessage, HumanMessage
 
-from langchain_openai import ChatOpenAI
-
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 
 import configuration
+from extractors import extractor_registry
+from lazy import chat_model
 
 ## Utilities 
 
@@ -124,15 +122,12 @@ class UpdateMemory(TypedDict):
     """ Decision on what memory type to update """
     update_type: Literal['user', 'todo', 'instructions']
 
-# Initialize the model
-model = ChatOpenAI(model="gpt-4o", temperature=0)
+# Initialize the model, built on first use
+def model():
+    return chat_model(temperature=0)
 
-## Create the Trustcall extractors for updating the user profile and ToDo list
-profile_extractor = create_extractor(
-    model,
-    tools=[Profile],
-    tool_choice="Profile",
-)
+## The Trustcall extractors for updating the user profile and ToDo list are built
+## once per process by `extractor_registry` and shared across runs
 
 ## Prompts 
 
@@ -233,7 +228,7 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
     system_msg = MODEL_SYSTEM_MESSAGE.format(user_profile=user_profile, todo=todo, instructions=instructions)
 
     # Respond using memory as well as the chat history
-    response = model.bind_tools([UpdateMemory], parallel_tool_calls=False).invoke([SystemMessage(content=system_msg)]+state["messages"])
+    response = model().bind_tools([UpdateMemory], parallel_tool_calls=False).invoke([SystemMessage(content=system_msg)]+state["messages"])
 
     return {"messages": [response]}
 
@@ -264,8 +259,10 @@ def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStor
     updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
 
     # Invoke the extractor
-    result = profile_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
+    result = extractor_registry.invoke(model(), Profile,
+                                       {"messages": updated_messages,
+                                        "existing": existing_memories},
+                                       tool_choice=tool_name)
 
     # Save save the memories from Trustcall to the store
     for r, rmeta in zip(result["responses"], result["response_metadata"]):
@@ -306,17 +303,13 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
     # Initialize the spy for visibility into the tool calls made by Trustcall
     spy = Spy()
     
-    # Create the Trustcall extractor for updating the ToDo list 
-    todo_extractor = create_extractor(
-    model,
-    tools=[ToDo],
-    tool_choice=tool_name,
-    enable_inserts=True
-    ).with_listeners(on_end=spy)
-
-    # Invoke the extractor
-    result = todo_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
+    # Invoke the shared Trustcall extractor for updating the ToDo list, with this call's spy
+    result = extractor_registry.invoke(model(), ToDo,
+                                       {"messages": updated_messages,
+                                        "existing": existing_memories},
+                                       tool_choice=tool_name,
+                                       enable_inserts=True,
+                                       on_end=spy)
 
     # Save save the memories from Trustcall to the store
     for r, rmeta in zip(result["responses"], result["response_metadata"]):
@@ -346,7 +339,7 @@ def update_instructions(state: MessagesState, config: RunnableConfig, store: Bas
         
     # Format the memory in the system prompt
     system_msg = CREATE_INSTRUCTIONS.format(current_instructions=existing_memory.value if existing_memory else None)
-    new_memory = model.invoke([SystemMessage(content=system_msg)]+state['messages'][:-1] + [HumanMessage(content="Please update the instructions based on the conversation")])
+    new_memory = model().invoke([SystemMessage(content=system_msg)]+state['messages'][:-1] + [HumanMessage(content="Please update the instructions based on the conversation")])
 
     # Overwrite the existing memory in the store 
     key = "user_instructions"
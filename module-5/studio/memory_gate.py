@@ -0,0 +1,103 @@
+import re
+from threading import Lock
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import SystemMessage
+
+## Gate that skips memory writes for turns without new user facts
+
+# Turns that are only small talk never carry new facts
+SMALL_TALK_RE = re.compile(
+    r"^\W*(?:(?:ok(?:ay)?|k|thanks?(?: you)?|thx|ty|cool|great|nice|awesome|sure|yes|yeah|yep|no|nope|"
+    r"got it|sounds good|perfect|lol|haha|hi|hello|hey|bye|goodbye|good (?:morning|night)|"
+    r"so much|a lot|very much|much appreciated|appreciate it)\W*)+$",
+    re.IGNORECASE,
+)
+
+# First-person statements that usually disclose something about the user
+SELF_DISCLOSURE_RE = re.compile(
+    r"\b(?:i am|i'm|im|i was|i've|i have|i had|i live|i work|i like|i love|i enjoy|i hate|i prefer|"
+    r"i want|i plan|i'm planning|i need|i just|i recently|i used to|i don't|i do not|i can't|"
+    r"my|mine|we|we're|our|call me|remember that)\b",
+    re.IGNORECASE,
+)
+
+# Life situations that are usually about the user, even in a question ("any tips for a new dad with twins?")
+IMPLIED_FACT_RE = re.compile(
+    r"\b(?:(?:a |an )?new (?:dad|mom|mum|parent|father|mother|job|home|house|city)|as an? \w+|"
+    r"twins|triplets|pregnant|expecting|newborn|toddler|kids|husband|wife|partner|boyfriend|girlfriend|"
+    r"fianc[eé]e?|allergic|vegan|vegetarian|diabetic|diagnosed|retired|moving to|just moved|"
+    r"birthday|anniversary|wedding)\b",
+    re.IGNORECASE,
+)
+
+GATE_INSTRUCTION = """Does the user's message below state any new fact about the user, such as personal details, preferences, interests, experiences or plans? Small talk does not count, and a question counts only if it reveals something about the user."""
+
+class GateDecision(BaseModel):
+    """Whether a user message contains new facts worth remembering."""
+    has_new_facts: bool = Field(description="True if the message states a new fact about the user")
+
+def classify(text: str) -> Literal["write", "skip", "uncertain"]:
+    """Cheap local classification of one user message."""
+    if not text.strip() or SMALL_TALK_RE.match(text):
+        return "skip"
+    if SELF_DISCLOSURE_RE.search(text):
+        return "write"
+    # Checked before the question shortcut, since a question can still reveal something about the user
+    if IMPLIED_FACT_RE.search(text):
+        return "uncertain"
+    # A question that says nothing about the user
+    if text.rstrip().endswith("?"):
+        return "skip"
+    return "uncertain"
+
+class MemoryGate:
+    """Decide whether a turn needs a memory write, and count how many writes were avoided.
+
+    The local heuristic settles clear cases. Uncertain turns go to `model`, a small chat
+    model, when one is given; without one the gate writes to stay on the safe side.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.decisions = {"heuristic": {"write": 0, "skip": 0}, "model": {"write": 0, "skip": 0}, "default": {"write": 0, "skip": 0}}
+        self.last_decision: Optional[dict] = None
+
+    def should_write(self, text: str, model: Optional[BaseChatModel] = None) -> bool:
+        """Return True if the memory should be updated for this user message."""
+        decision = classify(text)
+        source = "heuristic"
+        if decision == "uncertain":
+            if model is not None:
+                source = "model"
+                result = model.with_structured_output(GateDecision).invoke([SystemMessage(content=GATE_INSTRUCTION), ("user", text)])
+                decision = "write" if result.has_new_facts else "skip"
+            else:
+                source = "default"
+                decision = "write"
+        with self._lock:
+            self.decisions[source][decision] += 1
+            self.last_decision = {"source": source, "decision": decision}
+        return decision == "write"
+
+    def stats(self) -> dict:
+        """Decisions by source, plus how many memory-writing LLM calls were skipped."""
+        with self._lock:
+            skipped = sum(d["skip"] for d in self.decisions.values())
+            total = skipped + sum(d["write"] for d in self.decisions.values())
+            # Each skip avoids one write_memory call; each model decision costs one small call
+            return {
+                "decisions": {source: dict(counts) for source, counts in self.decisions.items()},
+                "last_decision": self.last_decision,
+                "turns": total,
+                "skipped": skipped,
+                "skip_rate": skipped / total if total else 0.0,
+                "write_calls_avoided": skipped,
+                "gate_model_calls": sum(self.decisions["model"].values()),
+            }
+
+# Shared by every run in the process
+memory_gate = MemoryGate()
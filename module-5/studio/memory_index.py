@@ -0,0 +1,194 @@
+import math
+import re
+import uuid
+import zlib
+from threading import Lock
+from typing import Optional
+
+from langgraph.store.base import BaseStore, Item
+
+## Offline semantic index over a user's memories
+
+# Number of items requested per store.search call when building an index
+PAGE_SIZE = 100
+
+# Where each namespace's version marker is stored: (VERSION_NAMESPACE, *namespace), VERSION_KEY
+VERSION_NAMESPACE = "memory_index_versions"
+VERSION_KEY = "version"
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+def terms(text: str) -> dict[int, float]:
+    """Hash word unigrams and bigrams into 32-bit term ids with sublinear term frequency."""
+    words = WORD_RE.findall(text.lower())
+    counts: dict[int, int] = {}
+    for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        term_id = zlib.crc32(term.encode())
+        counts[term_id] = counts.get(term_id, 0) + 1
+    return {term_id: 1.0 + math.log(count) for term_id, count in counts.items()}
+
+class Postings:
+    """The documents containing one term and the term's normalized weight in each."""
+
+    def __init__(self, capacity: int = 4):
+        # Imported here rather than at module level, so importing the graphs stays fast
+        import numpy as np
+        self.docs = np.zeros(capacity, dtype=np.int32)
+        self.weights = np.zeros(capacity, dtype=np.float32)
+        self.size = 0
+        self.live = 0
+
+    def append(self, doc: int, weight: float) -> int:
+        if self.size == len(self.docs):
+            import numpy as np
+            # Double the capacity so appends stay amortized O(1)
+            self.docs = np.concatenate([self.docs, np.zeros_like(self.docs)])
+            self.weights = np.concatenate([self.weights, np.zeros_like(self.weights)])
+        slot = self.size
+        self.docs[slot] = doc
+        self.weights[slot] = weight
+        self.size += 1
+        self.live += 1
+        return slot
+
+    def remove(self, slot: int) -> None:
+        # A zero weight keeps the slot but drops its contribution to every score
+        self.weights[slot] = 0.0
+        self.live -= 1
+
+class MemoryIndex:
+    """Top-k cosine search over the memories in one store namespace, with no network calls.
+
+    Each memory is an L2-normalized TF vector over hashed unigrams and bigrams, kept as
+    NumPy postings per term, so a query only touches the memories that share a term with
+    it. Query terms are weighted by inverse document frequency, so rare words count for
+    more. The index is updated in place on every put; MemoryIndexRegistry rebuilds it
+    when the store has changed underneath it.
+    """
+
+    def __init__(self, text_field: str = "content"):
+        self.text_field = text_field
+        self.items: list[Item] = []
+        self.positions: dict[str, int] = {}
+        self.slots: list[list[tuple[int, int]]] = []
+        self.postings: dict[int, Postings] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, item: Item) -> None:
+        """Insert or replace the memory stored under `item.key`."""
+        weights = terms(f"{item.value.get(self.text_field, item.value)}")
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        with self._lock:
+            position = self.positions.get(item.key)
+            if position is None:
+                position = len(self.items)
+                self.items.append(item)
+                self.slots.append([])
+                self.positions[item.key] = position
+            else:
+                for term_id, slot in self.slots[position]:
+                    self.postings[term_id].remove(slot)
+                self.items[position] = item
+            self.slots[position] = [
+                (term_id, self.postings.setdefault(term_id, Postings()).append(position, weight / norm))
+                for term_id, weight in weights.items()
+            ]
+
+    def search(self, query: str, k: int) -> list[Item]:
+        """Return up to `k` memories most similar to `query`, best match first."""
+        import numpy as np
+        weights = terms(query)
+        with self._lock:
+            n = len(self.items)
+            if n == 0 or k <= 0:
+                return []
+            scores = np.zeros(n, dtype=np.float32)
+            for term_id, weight in weights.items():
+                postings = self.postings.get(term_id)
+                if postings is None or postings.live == 0:
+                    continue
+                idf = math.log((1 + n) / (1 + postings.live)) + 1.0
+                scores[postings.docs[:postings.size]] += weight * idf * postings.weights[:postings.size]
+            if not scores.any():
+                # Nothing matched, so fall back to the most recently added memories
+                return self.items[-k:][::-1]
+            k = min(k, int(np.count_nonzero(scores)))
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            return [self.items[i] for i in top]
+
+def search_all(store: BaseStore, namespace: tuple[str, ...]) -> list[Item]:
+    """Page through every item in a namespace."""
+    items = []
+    offset = 0
+    while True:
+        page = store.search(namespace, limit=PAGE_SIZE, offset=offset)
+        items.extend(page)
+        if len(page) < PAGE_SIZE:
+            return items
+        offset += PAGE_SIZE
+
+class MemoryIndexRegistry:
+    """One MemoryIndex per (store, namespace), kept in step with the store.
+
+    Every `put` also writes a new version marker for the namespace, under
+    VERSION_NAMESPACE. `get` reads only that marker and rescans the namespace when it
+    differs from the version the index was built at, so memories written through another
+    registry, e.g. by another process, are picked up without scanning on every turn.
+    Code that writes memories straight to the store must call `invalidate` afterwards.
+    Entries hold their store, so its id() cannot be reused by another store while indexed.
+    """
+
+    def __init__(self, text_field: str = "content"):
+        self.text_field = text_field
+        self._indexes: dict[tuple, tuple[BaseStore, MemoryIndex, Optional[str]]] = {}
+        self._lock = Lock()
+
+    def _version(self, store: BaseStore, namespace: tuple[str, ...]) -> Optional[str]:
+        marker = store.get((VERSION_NAMESPACE, *namespace), VERSION_KEY)
+        return marker.value["version"] if marker is not None else None
+
+    def invalidate(self, store: BaseStore, namespace: tuple[str, ...]) -> str:
+        """Write a new version marker for `namespace`, so every registry rescans it on its next `get`."""
+        version = uuid.uuid4().hex
+        store.put((VERSION_NAMESPACE, *namespace), VERSION_KEY, {"version": version})
+        return version
+
+    def get(self, store: BaseStore, namespace: tuple[str, ...]) -> MemoryIndex:
+        """Return the index for `namespace`, rebuilt from the store's memories if its version marker has changed."""
+        version = self._version(store, namespace)
+        key = (id(store), namespace)
+        with self._lock:
+            entry = self._indexes.get(key)
+            if entry is not None and entry[0] is store and entry[2] == version:
+                return entry[1]
+        # The marker is read before the scan, so a write during the scan triggers another rescan
+        index = MemoryIndex(self.text_field)
+        for item in search_all(store, namespace):
+            index.add(item)
+        with self._lock:
+            self._indexes[key] = (store, index, version)
+        return index
+
+    def put(self, store: BaseStore, namespace: tuple[str, ...], key: str, value: dict) -> None:
+        """Write to the store and add the new value to the namespace's index, if it has one."""
+        previous = self._version(store, namespace)
+        store.put(namespace, key, value)
+        version = self.invalidate(store, namespace)
+        item = store.get(namespace, key)
+        with self._lock:
+            entry = self._indexes.get((id(store), namespace))
+            if item is None or entry is None or entry[0] is not store:
+                return
+            entry[1].add(item)
+            # Only an index that was current before this write is current after it; any other
+            # is rescanned on the next get. A write by another process between reading
+            # `previous` and writing the marker is picked up at the namespace's next write.
+            if entry[2] == previous:
+                self._indexes[(id(store), namespace)] = (store, entry[1], version)
+
+# Shared by every run in the process
+memory_indexes = MemoryIndexRegistry()
@@ -0,0 +1,65 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+## Line-based patches for a bulleted user memory
+
+class LineOperation(BaseModel):
+    """One change to the numbered memory."""
+    op: Literal["add", "modify", "delete"] = Field(description="add a new line, modify an existing line, or delete an existing line")
+    line: Optional[int] = Field(description="Number of the existing line to modify or delete. Leave empty for add.", default=None)
+    text: Optional[str] = Field(description="New text of the line for add or modify, without a leading bullet. Leave empty for delete.", default=None)
+
+class MemoryPatch(BaseModel):
+    """Changes to apply to the user's memory. Return an empty list if nothing needs to change."""
+    operations: list[LineOperation] = Field(default_factory=list)
+
+# Patch instruction, sent instead of asking the model to rewrite the whole memory
+PATCH_MEMORY_INSTRUCTION = """You are collecting information about the user to personalize your responses.
+
+CURRENT USER INFORMATION (numbered lines):
+{memory}
+
+INSTRUCTIONS:
+1. Review the chat history below carefully
+2. Identify new information about the user, such as:
+   - Personal details (name, location)
+   - Preferences (likes, dislikes)
+   - Interests and hobbies
+   - Past experiences
+   - Goals or future plans
+3. Return only the changes to the numbered lines above:
+   - `add` a line for each new fact
+   - `modify` a line whose fact changed, keeping the most recent version
+   - `delete` a line that is no longer true
+4. Do not repeat lines that stay the same
+
+Remember: Only include factual information directly stated by the user. Do not make assumptions or inferences."""
+
+def memory_lines(memory: Optional[str]) -> list[str]:
+    """Split a bulleted memory into its lines, without bullets."""
+    if not memory:
+        return []
+    return [line.strip().lstrip("-*• ").strip() for line in memory.splitlines() if line.strip().lstrip("-*• ").strip()]
+
+def number_lines(lines: list[str]) -> str:
+    """Render lines as a numbered list for the model to reference."""
+    return "\n".join(f"{i}. {line}" for i, line in enumerate(lines, start=1)) or "(empty)"
+
+def render_lines(lines: list[str]) -> str:
+    """Render lines as the bulleted list stored in the memory."""
+    return "\n".join(f"- {line}" for line in lines)
+
+def apply_patch(lines: list[str], patch: MemoryPatch) -> list[str]:
+    """Apply a patch whose line numbers refer to `lines` as they were before the patch."""
+    updated: list[Optional[str]] = list(lines)
+    added = []
+    for operation in patch.operations:
+        in_range = operation.line is not None and 1 <= operation.line <= len(lines)
+        if operation.op == "add" and operation.text:
+            added.append(operation.text.strip())
+        elif operation.op == "modify" and in_range and operation.text:
+            updated[operation.line - 1] = operation.text.strip()
+        elif operation.op == "delete" and in_range:
+            updated[operation.line - 1] = None
+    return [line for line in updated if line is not None] + added
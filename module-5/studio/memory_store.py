@@ -1,12 +1,15 @@
 from langchain_core.messages import SystemMessage
 from langchain_core.runnables.config import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 import configuration
+from lazy import chat_model
+from memory_gate import memory_gate
+from memory_patch import PATCH_MEMORY_INSTRUCTION, MemoryPatch, apply_patch, memory_lines, number_lines, render_lines
 
-# Initialize the LLM
-model = ChatOpenAI(model="gpt-4o", temperature=0) 
+# Initialize the LLM, built on first use
+def model():
+    return chat_model(temperature=0)
 
 # Chatbot instruction
 MODEL_SYSTEM_MESSAGE = """You are a helpful assistant with memory that provides information about the user. 
@@ -61,7 +64,7 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
     system_msg = MODEL_SYSTEM_MESSAGE.format(memory=existing_memory_content)
 
     # Respond using memory as well as the chat history
-    response = model.invoke([SystemMessage(content=system_msg)]+state["messages"])
+    response = model().invoke([SystemMessage(content=system_msg)]+state["messages"])
 
     return {"messages": response}
 
@@ -79,26 +82,59 @@ def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore)
     namespace = ("memory", user_id)
     existing_memory = store.get(namespace, "user_memory")
 
-    # Extract the memory
-    if existing_memory:
-        # Value is a dictionary with a memory key
-        existing_memory_content = existing_memory.value.get('memory')
+    # Every write bumps the memory's version
+    version = existing_memory.value.get('version', 0) + 1 if existing_memory else 1
+
+    if configurable.memory_update_mode == "patch":
+        # Ask only for changes to the numbered lines, so output tokens do not grow with the memory
+        lines = memory_lines(existing_memory.value.get('memory') if existing_memory else None)
+        system_msg = PATCH_MEMORY_INSTRUCTION.format(memory=number_lines(lines))
+        patch = model().with_structured_output(MemoryPatch).invoke([SystemMessage(content=system_msg)]+state['messages'])
+
+        # Nothing changed, so keep the stored memory and its version
+        if not patch.operations:
+            return
+        new_memory_content = render_lines(apply_patch(lines, patch))
     else:
-        existing_memory_content = "No existing memory found."
-        
-    # Format the memory in the system prompt
-    system_msg = CREATE_MEMORY_INSTRUCTION.format(memory=existing_memory_content)
-    new_memory = model.invoke([SystemMessage(content=system_msg)]+state['messages'])
+        # Extract the memory
+        if existing_memory:
+            # Value is a dictionary with a memory key
+            existing_memory_content = existing_memory.value.get('memory')
+        else:
+            existing_memory_content = "No existing memory found."
+
+        # Format the memory in the system prompt
+        system_msg = CREATE_MEMORY_INSTRUCTION.format(memory=existing_memory_content)
+        new_memory_content = model().invoke([SystemMessage(content=system_msg)]+state['messages']).content
 
     # Overwrite the existing memory in the store 
     key = "user_memory"
-    store.put(namespace, key, {"memory": new_memory.content})
+    store.put(namespace, key, {"memory": new_memory_content, "version": version})
+
+def gate_model(model_name: str):
+    """Small model used by the memory gate, created once per model name."""
+    return chat_model(model_name, temperature=0)
+
+# Conditional edge
+def should_write_memory(state: MessagesState, config: RunnableConfig):
+
+    """Skip write_memory when the latest user message holds no new facts about the user."""
+
+    # Get configuration
+    configurable = configuration.Configuration.from_runnable_config(config)
+    model_name = configurable.memory_gate_model
+
+    # Classify the latest user message
+    latest_user_message = next((m.content for m in reversed(state["messages"]) if m.type == "human"), "")
+    if memory_gate.should_write(f"{latest_user_message}", gate_model(model_name) if model_name else None):
+        return "write_memory"
+    return END
 
 # Define the graph
 builder = StateGraph(MessagesState,config_schema=configuration.Configuration)
 builder.add_node("call_model", call_model)
 builder.add_node("write_memory", write_memory)
 builder.add_edge(START, "call_model")
-builder.add_edge("call_model", "write_memory")
+builder.add_conditional_edges("call_model", should_write_memory, ["write_memory", END])
 builder.add_edge("write_memory", END)
 graph = builder.compile()
\ No newline at end of file
@@ -2,31 +2,41 @@ import uuid
 
 from pydantic import BaseModel, Field
 
-from trustcall import create_extractor
-
 from langchain_core.messages import SystemMessage
 from langchain_core.messages import merge_message_runs
 from langchain_core.runnables.config import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 import configuration
+from extractors import extractor_registry
+from lazy import chat_model
+from memory_index import memory_indexes
+from watermarks import messages_since
 
-# Initialize the LLM
-model = ChatOpenAI(model="gpt-4o", temperature=0) 
+# Initialize the LLM, built on first use
+def model():
+    return chat_model(temperature=0)
 
 # Memory schema
 class Memory(BaseModel):
     content: str = Field(description="The main content of the memory. For example: User expressed interest in learning about French.")
 
-# Create the Trustcall extractor
-trustcall_extractor = create_extractor(
-    model,
-    tools=[Memory],
-    tool_choice="Memory",
-    # This allows the extractor to insert new memories
-    enable_inserts=True,
-)
+# Create the Trustcall extractor on first use, shared through the registry
+def trustcall_extractor():
+    return extractor_registry.get(
+        model(),
+        Memory,
+        tool_choice="Memory",
+        # This allows the extractor to insert new memories
+        enable_inserts=True,
+    )
+
+# Graph state: the chat history plus the ID of the last message already extracted into memory
+class State(MessagesState):
+    memory_watermark: str
+
+# Number of memories, most relevant first, given to the chatbot on each turn
+MEMORY_TOP_K = 10
 
 # Chatbot instruction
 MODEL_SYSTEM_MESSAGE = """You are a helpful chatbot. You are designed to be a companion to a user. 
@@ -43,7 +53,7 @@ TRUSTCALL_INSTRUCTION = """Reflect on following interaction.
 Use the provided tools to retain any necessary memories about the user. 
 
 Use parallel tool calling to handle updates and insertions simultaneously:"""
-def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def call_model(state: State, config: RunnableConfig, store: BaseStore):
 
     """Load memory from the store and use it to personalize the chatbot's response."""
     
@@ -53,20 +63,21 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
     # Get the user ID from the config
     user_id = configurable.user_id
 
-    # Retrieve memory from the store
+    # Retrieve the memories most relevant to the latest user message from the local index
     namespace = ("memories", user_id)
-    memories = store.search(namespace)
+    latest_user_message = next((m.content for m in reversed(state["messages"]) if m.type == "human"), "")
+    memories = memory_indexes.get(store, namespace).search(f"{latest_user_message}", MEMORY_TOP_K)
 
     # Format the memories for the system prompt
     info = "\n".join(f"- {mem.value['content']}" for mem in memories)
     system_msg = MODEL_SYSTEM_MESSAGE.format(memory=info)
 
     # Respond using memory as well as the chat history
-    response = model.invoke([SystemMessage(content=system_msg)]+state["messages"])
+    response = model().invoke([SystemMessage(content=system_msg)]+state["messages"])
 
     return {"messages": response}
 
-def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def write_memory(state: State, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and save a memory to the store."""
     
@@ -90,22 +101,26 @@ def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore)
                           else None
                         )
 
-    # Merge the chat history and the instruction
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION)] + state["messages"]))
+    # Merge the instruction with the messages not yet extracted, so each extraction costs the same however long the thread is
+    new_messages = messages_since(state["messages"], state.get("memory_watermark"))
+    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION)] + new_messages))
 
     # Invoke the extractor
-    result = trustcall_extractor.invoke({"messages": updated_messages, 
+    result = trustcall_extractor().invoke({"messages": updated_messages, 
                                         "existing": existing_memories})
 
-    # Save the memories from Trustcall to the store
+    # Save the memories from Trustcall to the store, keeping the index up to date
     for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
+        memory_indexes.put(store, namespace,
                   rmeta.get("json_doc_id", str(uuid.uuid4())),
                   r.model_dump(mode="json"),
             )
 
+    # Everything up to the latest message has now been extracted
+    return {"memory_watermark": state["messages"][-1].id}
+
 # Define the graph
-builder = StateGraph(MessagesState,config_schema=configuration.Configuration)
+builder = StateGraph(State,config_schema=configuration.Configuration)
 builder.add_node("call_model", call_model)
 builder.add_node("write_memory", write_memory)
 builder.add_edge(START, "call_model")
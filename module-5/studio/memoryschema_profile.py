@@ -1,16 +1,16 @@
 from pydantic import BaseModel, Field
 
-from trustcall import create_extractor
-
 from langchain_core.messages import SystemMessage
 from langchain_core.runnables.config import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 import configuration
+from extractors import extractor_registry
+from lazy import chat_model
 
-# Initialize the LLM
-model = ChatOpenAI(model="gpt-4o", temperature=0) 
+# Initialize the LLM, built on first use
+def model():
+    return chat_model(temperature=0)
 
 # Schema 
 class UserProfile(BaseModel):
@@ -19,12 +19,13 @@ class UserProfile(BaseModel):
     user_location: str = Field(description="The user's location")
     interests: list = Field(description="A list of the user's interests")
 
-# Create the extractor
-trustcall_extractor = create_extractor(
-    model,
-    tools=[UserProfile],
-    tool_choice="UserProfile", # Enforces use of the UserProfile tool
-)
+# Create the extractor on first use, shared through the registry
+def trustcall_extractor():
+    return extractor_registry.get(
+        model(),
+        UserProfile,
+        tool_choice="UserProfile", # Enforces use of the UserProfile tool
+    )
 
 # Chatbot instruction
 MODEL_SYSTEM_MESSAGE = """You are a helpful assistant with memory that provides information about the user. 
@@ -63,7 +64,7 @@ def call_model(state: MessagesState, config: RunnableConfig, store: BaseStore):
     system_msg = MODEL_SYSTEM_MESSAGE.format(memory=formatted_memory)
 
     # Respond using memory as well as the chat history
-    response = model.invoke([SystemMessage(content=system_msg)]+state["messages"])
+    response = model().invoke([SystemMessage(content=system_msg)]+state["messages"])
 
     return {"messages": response}
 
@@ -85,7 +86,7 @@ def write_memory(state: MessagesState, config: RunnableConfig, store: BaseStore)
     existing_profile = {"UserProfile": existing_memory.value} if existing_memory else None
     
     # Invoke the extractor
-    result = trustcall_extractor.invoke({"messages": [SystemMessage(content=TRUSTCALL_INSTRUCTION)]+state["messages"], "existing": existing_profile})
+    result = trustcall_extractor().invoke({"messages": [SystemMessage(content=TRUSTCALL_INSTRUCTION)]+state["messages"], "existing": existing_profile})
     
     # Get the updated profile as a JSON object
     updated_profile = result["responses"][0].model_dump()
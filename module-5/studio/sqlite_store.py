@@ -0,0 +1,281 @@
+import asyncio
+import json
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Optional
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+
+## SQLite-backed store for the memory graphs
+
+# Namespace labels may not contain periods, so a dotted path is an unambiguous encoding
+SEPARATOR = "."
+
+# The character right after SEPARATOR, used as the exclusive upper bound of a prefix range
+SEPARATOR_END = chr(ord(SEPARATOR) + 1)
+
+# Rows keep the rowid of their first insert when updated, so ordering by rowid returns
+# items in insertion order like InMemoryStore, and paging is stable under updates.
+# Namespaces are numbered in the order they were first written to, as InMemoryStore keeps them.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    prefix TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (prefix, key)
+);
+CREATE INDEX IF NOT EXISTS store_prefix_rowid ON store (prefix);
+DROP INDEX IF EXISTS store_prefix_updated_at;
+CREATE TABLE IF NOT EXISTS namespaces (prefix TEXT PRIMARY KEY);
+"""
+
+# Databases created before the table had a rowid are copied over in creation order
+MIGRATE_WITHOUT_ROWID_SQL = """
+ALTER TABLE store RENAME TO store_without_rowid;
+CREATE TABLE store (
+    prefix TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (prefix, key)
+);
+INSERT INTO store SELECT prefix, key, value, created_at, updated_at FROM store_without_rowid ORDER BY created_at;
+DROP TABLE store_without_rowid;
+"""
+BACKFILL_NAMESPACES_SQL = "INSERT OR IGNORE INTO namespaces (prefix) SELECT prefix FROM store GROUP BY prefix ORDER BY MIN(rowid)"
+
+# Statements are kept as constants so sqlite3's per-connection statement cache reuses them
+UPSERT_SQL = """
+INSERT INTO store (prefix, key, value, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (prefix, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+"""
+DELETE_SQL = "DELETE FROM store WHERE prefix = ? AND key = ?"
+ADD_NAMESPACE_SQL = "INSERT OR IGNORE INTO namespaces (prefix) VALUES (?)"
+GET_SQL = "SELECT key, value, created_at, updated_at FROM store WHERE prefix = ? AND key = ?"
+LIST_PREFIXES_SQL = "SELECT DISTINCT prefix FROM store"
+
+# Exact namespace match, or any namespace nested under it, in InMemoryStore's order:
+# namespaces in the order they were first written to, then items in insertion order
+SEARCH_SQL = """
+SELECT prefix, key, value, created_at, updated_at FROM store JOIN namespaces USING (prefix)
+WHERE {conditions}
+ORDER BY namespaces.rowid, store.rowid
+LIMIT ? OFFSET ?
+"""
+NAMESPACE_CONDITION = "(prefix = ? OR (prefix >= ? AND prefix < ?))"
+
+# Comparison operators supported in search filters
+FILTER_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+def encode_namespace(namespace: tuple[str, ...]) -> str:
+    return SEPARATOR.join(namespace)
+
+def decode_namespace(prefix: str) -> tuple[str, ...]:
+    return tuple(prefix.split(SEPARATOR))
+
+def filter_clauses(filter: dict[str, Any], path: str = "$") -> tuple[list[str], list[Any]]:
+    """Translate a store filter into json_extract conditions, matching InMemoryStore semantics."""
+    clauses, params = [], []
+    for field, expected in filter.items():
+        field_path = f"{path}.{json.dumps(field)}"
+        if isinstance(expected, dict) and any(k.startswith("$") for k in expected):
+            for operator, operand in expected.items():
+                clauses.append(f"json_extract(value, ?) {FILTER_OPERATORS[operator]} ?")
+                params.extend([field_path, operand])
+        elif isinstance(expected, dict):
+            nested_clauses, nested_params = filter_clauses(expected, field_path)
+            clauses.extend(nested_clauses)
+            params.extend(nested_params)
+        elif isinstance(expected, (list, tuple)):
+            # json_extract returns arrays as minified JSON text
+            clauses.append("json_extract(value, ?) = ?")
+            params.extend([field_path, json.dumps(list(expected), separators=(",", ":"))])
+        else:
+            clauses.append("json_extract(value, ?) = ?")
+            params.extend([field_path, expected])
+    return clauses, params
+
+def does_match(condition, namespace: tuple[str, ...]) -> bool:
+    """Whether a namespace satisfies a prefix or suffix match condition ("*" is a wildcard)."""
+    path = condition.path
+    if len(namespace) < len(path):
+        return False
+    pairs = zip(namespace, path) if condition.match_type == "prefix" else zip(reversed(namespace), reversed(path))
+    return all(p == "*" or n == p for n, p in pairs)
+
+class SqliteStore(BaseStore):
+    """A persistent BaseStore backed by a single SQLite file.
+
+    The database runs in WAL mode so readers never block the writer, and a small pool of
+    connections lets graph nodes on different threads use the store at the same time.
+    Each `batch` call runs in one transaction, and puts in a batch are written with a
+    single `executemany`. Searches return items in the same order as InMemoryStore, and
+    an empty namespace prefix matches every item.
+
+    Use it when compiling a graph locally:
+
+        store = SqliteStore("memories.db")
+        graph = builder.compile(store=store)
+    """
+
+    def __init__(self, path: str = ":memory:", pool_size: int = 4, timeout: float = 30.0):
+        if path == ":memory:":
+            # A shared-cache in-memory database locks whole tables, so use a single connection
+            path = f"file:store-{uuid.uuid4()}?mode=memory&cache=shared"
+            pool_size = 1
+        self.path = path
+        self.timeout = timeout
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._write_lock = threading.Lock()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            tables = dict(conn.execute("SELECT name, wr FROM pragma_table_list WHERE schema = 'main'").fetchall())
+            if tables.get("store"):
+                conn.executescript(f"BEGIN IMMEDIATE; {MIGRATE_WITHOUT_ROWID_SQL} COMMIT;")
+            conn.executescript(SCHEMA)
+            if "store" in tables and "namespaces" not in tables:
+                conn.execute(BACKFILL_NAMESPACES_SQL)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            uri=self.path.startswith("file:"),
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection from the pool for the duration of the block."""
+        conn = self._pool.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        """Run all operations in one transaction, applying puts before reads like InMemoryStore."""
+        ops = list(ops)
+        results: list[Result] = [None] * len(ops)
+
+        # Later puts to the same key win, and only the last one is written
+        puts: dict[tuple[str, str], PutOp] = {}
+        for op in ops:
+            if isinstance(op, PutOp):
+                puts[(encode_namespace(op.namespace), op.key)] = op
+
+        with self._connection() as conn:
+            if puts:
+                # SQLite allows one writer at a time; serialize writers here instead of retrying on SQLITE_BUSY
+                with self._write_lock:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        self._apply_puts(conn, puts)
+                        self._read(conn, ops, results)
+                        conn.execute("COMMIT")
+                    except BaseException:
+                        conn.execute("ROLLBACK")
+                        raise
+            else:
+                conn.execute("BEGIN")
+                try:
+                    self._read(conn, ops, results)
+                finally:
+                    conn.execute("COMMIT")
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        """Run `batch` on a worker thread so the event loop is never blocked on disk I/O."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.batch, list(ops))
+
+    def _apply_puts(self, conn: sqlite3.Connection, puts: dict[tuple[str, str], PutOp]) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        upserts = [(prefix, key, json.dumps(op.value), now, now) for (prefix, key), op in puts.items() if op.value is not None]
+        deletes = [(prefix, key) for (prefix, key), op in puts.items() if op.value is None]
+        conn.executemany(ADD_NAMESPACE_SQL, [(prefix,) for prefix, _ in puts])
+        if upserts:
+            conn.executemany(UPSERT_SQL, upserts)
+        if deletes:
+            conn.executemany(DELETE_SQL, deletes)
+
+    def _read(self, conn: sqlite3.Connection, ops: list[Op], results: list[Result]) -> None:
+        for i, op in enumerate(ops):
+            if isinstance(op, GetOp):
+                results[i] = self._get(conn, op)
+            elif isinstance(op, SearchOp):
+                results[i] = self._search(conn, op)
+            elif isinstance(op, ListNamespacesOp):
+                results[i] = self._list_namespaces(conn, op)
+            elif not isinstance(op, PutOp):
+                raise ValueError(f"Unknown operation type: {type(op)}")
+
+    def _get(self, conn: sqlite3.Connection, op: GetOp) -> Optional[Item]:
+        row = conn.execute(GET_SQL, (encode_namespace(op.namespace), op.key)).fetchone()
+        if row is None:
+            return None
+        key, value, created_at, updated_at = row
+        return Item(
+            value=json.loads(value),
+            key=key,
+            namespace=op.namespace,
+            created_at=datetime.fromisoformat(created_at),
+            updated_at=datetime.fromisoformat(updated_at),
+        )
+
+    def _search(self, conn: sqlite3.Connection, op: SearchOp) -> list[SearchItem]:
+        # Semantic search needs an embedding index, so `op.query` is ignored like InMemoryStore without one
+        clauses, params = filter_clauses(op.filter) if op.filter else ([], [])
+        # An empty prefix matches every namespace
+        if op.namespace_prefix:
+            prefix = encode_namespace(op.namespace_prefix)
+            clauses.insert(0, NAMESPACE_CONDITION)
+            params[:0] = [prefix, prefix + SEPARATOR, prefix + SEPARATOR_END]
+        sql = SEARCH_SQL.format(conditions=" AND ".join(clauses) or "1")
+        params += [op.limit, op.offset]
+        return [
+            SearchItem(
+                namespace=decode_namespace(row_prefix),
+                key=key,
+                value=json.loads(value),
+                created_at=datetime.fromisoformat(created_at),
+                updated_at=datetime.fromisoformat(updated_at),
+            )
+            for row_prefix, key, value, created_at, updated_at in conn.execute(sql, params)
+        ]
+
+    def _list_namespaces(self, conn: sqlite3.Connection, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        namespaces = set()
+        for (prefix,) in conn.execute(LIST_PREFIXES_SQL):
+            namespace = decode_namespace(prefix)
+            if op.match_conditions and not all(does_match(c, namespace) for c in op.match_conditions):
+                continue
+            namespaces.add(namespace[: op.max_depth] if op.max_depth is not None else namespace)
+        return sorted(namespaces)[op.offset : op.offset + op.limit]
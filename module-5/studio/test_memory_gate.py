@@ -0,0 +1,27 @@
+import pytest
+
+from memory_gate import MemoryGate, classify
+
+@pytest.mark.parametrize("text, decision", [
+    ("thanks!", "skip"),
+    ("ok cool", "skip"),
+    ("", "skip"),
+    ("What is the capital of France?", "skip"),
+    ("How do I reverse a list in Python?", "skip"),
+    ("I live in San Francisco", "write"),
+    ("My daughter starts school next week", "write"),
+    ("Can you remind me what I told you about my job?", "write"),
+    # Questions can still reveal facts about the user
+    ("Any tips for a new dad with twins?", "uncertain"),
+    ("What's a good gift for my wife's birthday?", "write"),
+    ("Any recipes that work for a vegetarian?", "uncertain"),
+    ("Tell me about the Golden Gate Bridge", "uncertain"),
+])
+def test_classify(text, decision):
+    assert classify(text) == decision
+
+def test_questions_that_state_facts_are_written_without_a_model():
+    gate = MemoryGate()
+    assert gate.should_write("Any tips for a new dad with twins?")
+    assert not gate.should_write("What is the capital of France?")
+    assert gate.stats()["decisions"]["default"]["write"] == 1
@@ -0,0 +1,67 @@
+from langgraph.store.memory import InMemoryStore
+
+import memory_index
+from memory_index import MemoryIndexRegistry
+
+NAMESPACE = ("memories", "lance")
+
+def contents(items) -> list[str]:
+    return [item.value["content"] for item in items]
+
+def test_put_keeps_the_index_in_step():
+    store, registry = InMemoryStore(), MemoryIndexRegistry()
+    registry.put(store, NAMESPACE, "1", {"content": "Lance likes biking in San Francisco"})
+    registry.get(store, NAMESPACE)
+    registry.put(store, NAMESPACE, "2", {"content": "Lance has a bakery nearby"})
+    assert contents(registry.get(store, NAMESPACE).search("bakery", 1)) == ["Lance has a bakery nearby"]
+
+def test_writes_from_another_registry_are_picked_up():
+    store, registry = InMemoryStore(), MemoryIndexRegistry()
+    registry.put(store, NAMESPACE, "1", {"content": "Lance likes biking"})
+    assert contents(registry.get(store, NAMESPACE).search("biking", 5)) == ["Lance likes biking"]
+
+    # Another process has its own registry over the same store
+    other = MemoryIndexRegistry()
+    other.put(store, NAMESPACE, "2", {"content": "Lance is learning to surf"})
+    other.put(store, NAMESPACE, "1", {"content": "Lance sold his bike"})
+    index = registry.get(store, NAMESPACE)
+    assert contents(index.search("surf", 1)) == ["Lance is learning to surf"]
+    assert "Lance likes biking" not in contents(index.search("biking", 5))
+
+def test_direct_writes_are_picked_up_after_invalidate():
+    store, registry = InMemoryStore(), MemoryIndexRegistry()
+    registry.put(store, NAMESPACE, "1", {"content": "Lance likes biking"})
+    registry.put(store, NAMESPACE, "2", {"content": "Lance is learning to surf"})
+    registry.get(store, NAMESPACE)
+
+    store.delete(NAMESPACE, "2")
+    registry.invalidate(store, NAMESPACE)
+    assert "Lance is learning to surf" not in contents(registry.get(store, NAMESPACE).search("surf", 5))
+
+def test_get_only_scans_the_namespace_when_it_changed(monkeypatch):
+    store, registry = InMemoryStore(), MemoryIndexRegistry()
+    for i in range(5):
+        registry.put(store, NAMESPACE, str(i), {"content": f"Lance note {i}"})
+    scans = []
+    search_all = memory_index.search_all
+    monkeypatch.setattr(memory_index, "search_all", lambda *args: scans.append(args) or search_all(*args))
+
+    registry.get(store, NAMESPACE)
+    assert len(scans) == 1
+    registry.get(store, NAMESPACE)
+    registry.put(store, NAMESPACE, "5", {"content": "Lance has a bakery nearby"})
+    assert contents(registry.get(store, NAMESPACE).search("bakery", 1)) == ["Lance has a bakery nearby"]
+    assert len(scans) == 1
+
+    MemoryIndexRegistry().put(store, NAMESPACE, "6", {"content": "Lance plays chess"})
+    assert contents(registry.get(store, NAMESPACE).search("chess", 1)) == ["Lance plays chess"]
+    assert len(scans) == 2
+
+def test_indexes_are_not_shared_between_stores():
+    registry = MemoryIndexRegistry()
+    first = InMemoryStore()
+    registry.put(first, NAMESPACE, "1", {"content": "Lance likes biking"})
+    registry.get(first, NAMESPACE)
+    second = InMemoryStore()
+    second.put(NAMESPACE, "1", {"content": "Ada likes chess"})
+    assert contents(registry.get(second, NAMESPACE).search("likes", 5)) == ["Ada likes chess"]
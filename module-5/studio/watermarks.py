@@ -0,0 +1,17 @@
+from typing import Optional
+
+from langchain_core.messages import AnyMessage
+
+## Incremental extraction watermarks
+
+def messages_since(messages: list[AnyMessage], watermark: Optional[str]) -> list[AnyMessage]:
+    """Return the messages after the one with ID `watermark`, i.e. those not yet mined into memory.
+
+    If there is no watermark yet, or its message has since been removed from the thread,
+    every message is returned.
+    """
+    if watermark:
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].id == watermark:
+                return messages[i + 1:]
+    return messages
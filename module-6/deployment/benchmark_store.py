@@ -0,0 +1,92 @@
+"""Benchmark SqliteStore against InMemoryStore using the store access pattern of task_mAIstro.
+
+Each simulated turn loads the memory snapshot (one batched read), fetches the open
+ToDos due soonest through the status / deadline index and, for a share of turns,
+runs update_todos: page through every ToDo and write one back with its index entry.
+
+    python benchmark_store.py --users 50 --todos 200 --turns 2000 --threads 4
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from langgraph.store.base import BaseStore
+from langgraph.store.memory import InMemoryStore
+
+from memory_snapshot import MemorySnapshotCache
+from sqlite_store import SqliteStore
+from todo_repository import TodoRepository
+
+TODO_CATEGORY = "general"
+STATUSES = ["not started", "in progress", "done", "archived"]
+
+def make_todo(i: int) -> dict:
+    return {
+        "task": f"Task {i}",
+        "time_to_complete": random.randint(5, 120),
+        "deadline": f"2026-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T09:00:00" if random.random() < 0.7 else None,
+        "solutions": [f"Solution {i}"],
+        "status": random.choice(STATUSES),
+    }
+
+def seed(store: BaseStore, users: int, todos: int) -> None:
+    """Give every user a profile, instructions and a ToDo list with its index."""
+    for u in range(users):
+        user_id = f"user-{u}"
+        store.put(("profile", TODO_CATEGORY, user_id), str(uuid.uuid4()), {"name": user_id, "interests": ["biking"]})
+        store.put(("instructions", TODO_CATEGORY, user_id), "user_instructions", {"memory": "Add deadlines to every task."})
+        repository = TodoRepository(store, TODO_CATEGORY, user_id)
+        for i in range(todos):
+            repository.put(str(uuid.uuid4()), make_todo(i))
+
+def turn(store: BaseStore, snapshots: MemorySnapshotCache, user_id: str, write: bool) -> float:
+    """Run the store operations of one task_mAIstro turn and return its latency in seconds."""
+    run_key = str(uuid.uuid4())
+    start = time.perf_counter()
+    snapshot = snapshots.load(store, run_key, TODO_CATEGORY, user_id)
+    snapshot.todos(store).due_soonest(200)
+    if write:
+        todos = snapshots.load(store, run_key, TODO_CATEGORY, user_id).todos(store)
+        existing = todos.list_all()
+        todos.put(random.choice(existing).key if existing else str(uuid.uuid4()), make_todo(0))
+        snapshots.invalidate(store, run_key, TODO_CATEGORY, user_id)
+    snapshots.discard(run_key)
+    return time.perf_counter() - start
+
+def run(name: str, store: BaseStore, args: argparse.Namespace) -> None:
+    random.seed(0)
+    seed(store, args.users, args.todos)
+    snapshots = MemorySnapshotCache()
+    work = [(f"user-{random.randrange(args.users)}", random.random() < args.write_ratio) for _ in range(args.turns)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        latencies = list(pool.map(lambda w: turn(store, snapshots, *w), work))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<14} {args.turns / elapsed:>10.1f} {quantiles[49] * 1000:>9.3f} {quantiles[94] * 1000:>9.3f} {quantiles[98] * 1000:>9.3f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--todos", type=int, default=200, help="ToDos per user")
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="Share of turns that also run update_todos")
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'store':<14} {'turns/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    run("InMemoryStore", InMemoryStore(), args)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteStore(os.path.join(tmp, "store.db"), pool_size=args.threads)
+        run("SqliteStore", store, args)
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,14 @@ class Configuration:
     user_id: str = "default-user"
     todo_category: str = "general" 
     task_maistro_role: str = "You are a helpful task management assistant. You help you create, organize, and manage the user's ToDo list."
+    memory_token_budget: int = 2000
+    background_memory_updates: bool = False
+
+    def __post_init__(self):
+        # Values read from the environment arrive as strings
+        self.memory_token_budget = int(self.memory_token_budget)
+        if isinstance(self.background_memory_updates, str):
+            self.background_memory_updates = self.background_memory_updates.lower() in ("1", "true", "yes")
 
     @classmethod
     def from_runnable_config(
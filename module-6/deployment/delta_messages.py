@@ -0,0 +1,43 @@
+import os
+import warnings
+from typing import Annotated
+
+from typing_extensions import TypedDict
+
+from langchain_core.messages import AnyMessage
+from langgraph.graph import MessagesState
+
+# DeltaChannel is a beta API of recent langgraph releases, and its message reducer is private,
+# so without them the graphs fall back to checkpointing the full message list
+try:
+    from langgraph.channels.delta import DeltaChannel
+    from langgraph.graph.message import _messages_delta_reducer
+except ImportError:
+    DeltaChannel = None
+
+## Delta-encoded message checkpoints
+
+# A full copy of the message list is checkpointed after this many updates, which bounds
+# how many deltas get_state replays to rebuild the list
+SNAPSHOT_FREQUENCY = 100
+
+if DeltaChannel is not None:
+    class DeltaMessagesState(TypedDict):
+        """MessagesState whose checkpoints store each step's appended and removed messages.
+
+        The message list is rebuilt from the newest snapshot plus the updates written since,
+        so a step writes O(new messages) instead of the whole list. LangGraph's batch reducer
+        for messages is used because the graph loop gives its inputs stable IDs before they are
+        saved, so replayed messages can still be targeted by RemoveMessage.
+        """
+        messages: Annotated[list[AnyMessage], DeltaChannel(_messages_delta_reducer, snapshot_frequency=SNAPSHOT_FREQUENCY)]
+
+# Set DELTA_CHECKPOINTS=1 to checkpoint message deltas. Threads written in delta mode
+# can only be read in delta mode, while existing full-list threads read in either mode
+DELTA_CHECKPOINTS = os.environ.get("DELTA_CHECKPOINTS", "").lower() in ("1", "true", "yes")
+
+if DELTA_CHECKPOINTS and DeltaChannel is None:
+    warnings.warn("DELTA_CHECKPOINTS is set, but this langgraph has no DeltaChannel; checkpointing full message lists")
+    DELTA_CHECKPOINTS = False
+
+MessagesBase = DeltaMessagesState if DELTA_CHECKPOINTS else MessagesState
@@ -0,0 +1,76 @@
+import time
+from threading import Lock
+from typing import Any, Callable, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+
+## Process-wide registry of compiled Trustcall extractors
+
+class ExtractorRegistry:
+    """Build each Trustcall extractor once and share it across calls and threads.
+
+    Extractors are keyed by model, schema, tool_choice and insert mode. Listeners are
+    attached per call, so concurrent runs never share a Spy. The registry also tracks
+    the CPU time spent building extractors and the time saved by reusing them.
+    """
+
+    def __init__(self):
+        self._extractors: dict[tuple, tuple[BaseChatModel, Runnable, float]] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.build_cpu_seconds = 0.0
+        self.saved_cpu_seconds = 0.0
+
+    def get(self, model: BaseChatModel, schema: type, tool_choice: Optional[str] = None, enable_inserts: bool = False) -> Runnable:
+        """Return the compiled extractor for this configuration, building it on first use."""
+        tool_choice = tool_choice or schema.__name__
+        key = (id(model), schema, tool_choice, enable_inserts)
+        with self._lock:
+            entry = self._extractors.get(key)
+            if entry is not None:
+                # Reusing the extractor saves as much CPU time as building it cost
+                self.hits += 1
+                self.saved_cpu_seconds += entry[2]
+                return entry[1]
+
+            # Trustcall is imported when the first extractor is built
+            from trustcall import create_extractor
+
+            start = time.process_time()
+            extractor = create_extractor(
+                model,
+                tools=[schema],
+                tool_choice=tool_choice,
+                enable_inserts=enable_inserts,
+            )
+            build_cpu = time.process_time() - start
+
+            # Keep a reference to the model so its id is not reused while cached
+            self._extractors[key] = (model, extractor, build_cpu)
+            self.misses += 1
+            self.build_cpu_seconds += build_cpu
+            return extractor
+
+    def invoke(self, model: BaseChatModel, schema: type, inputs: dict[str, Any], tool_choice: Optional[str] = None, enable_inserts: bool = False, on_end: Optional[Callable] = None) -> dict[str, Any]:
+        """Invoke the shared extractor, attaching `on_end` for this call only."""
+        extractor = self.get(model, schema, tool_choice, enable_inserts)
+        if on_end is not None:
+            extractor = extractor.with_listeners(on_end=on_end)
+        return extractor.invoke(inputs)
+
+    def stats(self) -> dict[str, float]:
+        """Report cache hits and misses along with the CPU time saved per call."""
+        calls = self.hits + self.misses
+        return {
+            "extractors": len(self._extractors),
+            "hits": self.hits,
+            "misses": self.misses,
+            "build_cpu_seconds": self.build_cpu_seconds,
+            "saved_cpu_seconds": self.saved_cpu_seconds,
+            "saved_cpu_seconds_per_call": self.saved_cpu_seconds / calls if calls else 0.0,
+        }
+
+# Shared by every graph in the process
+extractor_registry = ExtractorRegistry()
@@ -0,0 +1,71 @@
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from langgraph.store.base import Item
+
+import tokens
+
+## Token-budgeted rendering of memories for the system prompt
+
+# Share of the score given to relevance to the latest user message; the rest goes to recency
+RELEVANCE_WEIGHT = 0.7
+
+# Recency decays by half every this many days since the item was last updated
+RECENCY_HALF_LIFE_DAYS = 7.0
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Count the tokens in a rendered memory item with tokens.py, the counter module-2 uses. Results are cached per item text."""
+    return tokens.count_tokens(text)
+
+def words(text: str) -> set[str]:
+    """Lowercased word set used for lexical relevance."""
+    return set(WORD_RE.findall(text.lower()))
+
+def relevance(item_text: str, query_words: set[str]) -> float:
+    """Fraction of the query's words that appear in the item."""
+    if not query_words:
+        return 0.0
+    return len(query_words & words(item_text)) / len(query_words)
+
+def recency(item: Item, now: datetime) -> float:
+    """1.0 for an item updated just now, halving every RECENCY_HALF_LIFE_DAYS."""
+    updated_at = item.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    age_days = max((now - updated_at).total_seconds(), 0.0) / 86400
+    return 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+def render_item(item: Item) -> str:
+    """Render a memory item the same way the system prompt always has."""
+    return f"{item.value}"
+
+def render_within_budget(items: list[Item], query: str, token_budget: int, now: Optional[datetime] = None) -> tuple[str, int]:
+    """Rank items by relevance to `query` and recency, then pack them into `token_budget` tokens.
+
+    Returns the rendered items, one per line, and the number of tokens used.
+    """
+    now = now or datetime.now(timezone.utc)
+    query_words = words(query)
+
+    scored = []
+    for item in items:
+        text = render_item(item)
+        score = RELEVANCE_WEIGHT * relevance(text, query_words) + (1 - RELEVANCE_WEIGHT) * recency(item, now)
+        scored.append((score, text))
+    scored.sort(key=lambda s: s[0], reverse=True)
+
+    # Greedily take the best-scoring items that still fit, counting the newline separator
+    lines = []
+    used = 0
+    for _, text in scored:
+        cost = count_tokens(text) + 1
+        if used + cost > token_budget:
+            continue
+        lines.append(text)
+        used += cost
+    return "\n".join(lines), used
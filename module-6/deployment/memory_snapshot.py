@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Optional
+
+from langgraph.store.base import BaseStore, Item, SearchOp
+
+from todo_repository import INDEX_NAMESPACE, PAGE_SIZE, TodoRepository, index_from_items, search_all
+
+## Snapshot of the three memory namespaces used by task_mAIstro
+
+@dataclass
+class MemorySnapshot:
+    """The profile, ToDo and instruction memories for one (todo_category, user_id).
+
+    ToDos are represented by their status / deadline index; the items themselves are
+    read through `todos`, which pages through the full list only when needed.
+    """
+    todo_category: str
+    user_id: str
+    profile: list[Item]
+    instructions: list[Item]
+    todo_index: Optional[dict[str, list]]
+
+    def get(self, memory_type: str, key: str) -> Optional[Item]:
+        """Return the item stored under `key` for a memory type, if any."""
+        for item in getattr(self, memory_type):
+            if item.key == key:
+                return item
+        return None
+
+    def todos(self, store: BaseStore) -> TodoRepository:
+        """Return a ToDo repository that reuses the index loaded with this snapshot."""
+        return TodoRepository(store, self.todo_category, self.user_id, index=self.todo_index)
+
+class MemorySnapshotCache:
+    """Load all three memory namespaces in one store round trip and keep them for the run.
+
+    Snapshots are keyed by `run_key`, an ID unique to one graph invocation, so a run never
+    sees another run's snapshot, even on the same thread. Writes made through `put` drop
+    the cached snapshot so the next read sees them. The cache is bounded so snapshots of
+    runs that never reach `discard`, e.g. runs killed mid-way, age out.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._snapshots: OrderedDict[tuple, MemorySnapshot] = OrderedDict()
+        self._lock = Lock()
+
+    def load(self, store: BaseStore, run_key: str, todo_category: str, user_id: str) -> MemorySnapshot:
+        """Return the cached snapshot, or fetch all namespaces with a single `store.batch`."""
+        cache_key = (id(store), run_key, todo_category, user_id)
+        with self._lock:
+            snapshot = self._snapshots.get(cache_key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(cache_key)
+                return snapshot
+
+        # One batched operation instead of three separate searches
+        profile_ns = ("profile", todo_category, user_id)
+        instructions_ns = ("instructions", todo_category, user_id)
+        profile, instructions, todo_index = store.batch([
+            SearchOp(profile_ns, limit=PAGE_SIZE),
+            SearchOp(instructions_ns, limit=PAGE_SIZE),
+            SearchOp((INDEX_NAMESPACE, todo_category, user_id), limit=PAGE_SIZE),
+        ])
+
+        # Only continue paging in the rare case a namespace fills its first page
+        if len(profile) == PAGE_SIZE:
+            profile = search_all(store, profile_ns)
+        if len(instructions) == PAGE_SIZE:
+            instructions = search_all(store, instructions_ns)
+        if len(todo_index) == PAGE_SIZE:
+            todo_index = search_all(store, (INDEX_NAMESPACE, todo_category, user_id))
+
+        snapshot = MemorySnapshot(
+            todo_category=todo_category,
+            user_id=user_id,
+            profile=profile,
+            instructions=instructions,
+            todo_index=index_from_items(todo_index),
+        )
+
+        with self._lock:
+            self._snapshots[cache_key] = snapshot
+            while len(self._snapshots) > self.maxsize:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def put(self, store: BaseStore, run_key: str, namespace: tuple[str, ...], key: str, value: dict[str, Any]) -> None:
+        """Write to the store and invalidate the snapshot that covers `namespace`."""
+        store.put(namespace, key, value)
+        _, todo_category, user_id = namespace
+        self.invalidate(store, run_key, todo_category, user_id)
+
+    def invalidate(self, store: BaseStore, run_key: str, todo_category: str, user_id: str) -> None:
+        """Drop the cached snapshot for a (todo_category, user_id) in the current run."""
+        with self._lock:
+            self._snapshots.pop((id(store), run_key, todo_category, user_id), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._snapshots)
+
+    def discard(self, run_key: str) -> None:
+        """Drop every snapshot held for a run, e.g. when it ends or fails."""
+        with self._lock:
+            for cache_key in [k for k in self._snapshots if k[1] == run_key]:
+                del self._snapshots[cache_key]
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+## Background worker for memory updates
+
+@dataclass
+class MemoryUpdateJob:
+    """A memory update to run off the critical path, e.g. a Trustcall extraction."""
+    user_key: str
+    fn: Callable[[], Any]
+    on_failure: Optional[Callable[[BaseException], Any]] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+class MemoryUpdateWorker:
+    """Drain memory updates on async workers running in a background event loop.
+
+    Jobs for the same user always land on the same shard, and each shard is drained
+    by a single worker, so updates for a user are applied in the order they were
+    submitted. Every shard queue is bounded: when it is full, `submit` waits at most
+    `submit_timeout` seconds (by default not at all) before giving up, so a full shard
+    never holds up the caller's turn for long. The time spent submitting is recorded
+    as backpressure.
+
+    A job that raises or runs longer than `job_timeout` seconds counts as failed and
+    its `on_failure` callback is called, so the caller can arrange a retry. A timed out
+    job's thread cannot be stopped and may still finish later.
+    """
+
+    def __init__(self, num_workers: int = 4, max_queue_size: int = 100, submit_timeout: float = 0.0, job_timeout: Optional[float] = 300.0):
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.submit_timeout = submit_timeout
+        self.job_timeout = job_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: list[asyncio.Queue] = []
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.backpressure_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+        self.max_depth = 0
+        self.last_error: Optional[str] = None
+
+    def _ensure_started(self) -> None:
+        """Start the event loop thread and its workers on first use."""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._queues = [asyncio.Queue(maxsize=self.max_queue_size) for _ in range(self.num_workers)]
+                for queue in self._queues:
+                    loop.create_task(self._drain(queue))
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name="memory-update-worker", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    async def _drain(self, queue: asyncio.Queue) -> None:
+        """Run the jobs of one shard one at a time, in submission order."""
+        while True:
+            job = await queue.get()
+            started = time.monotonic()
+            try:
+                # Extraction is blocking, so keep it off the event loop
+                await asyncio.wait_for(asyncio.to_thread(job.fn), timeout=self.job_timeout)
+                outcome = "completed"
+            except Exception as e:
+                outcome = "failed"
+                self.last_error = repr(e)
+                if job.on_failure is not None:
+                    try:
+                        await asyncio.to_thread(job.on_failure, e)
+                    except Exception as callback_error:
+                        self.last_error = repr(callback_error)
+            with self._metrics_lock:
+                self.queue_wait_seconds += started - job.enqueued_at
+                setattr(self, outcome, getattr(self, outcome) + 1)
+            queue.task_done()
+
+    def submit(self, user_key: str, fn: Callable[[], Any], on_failure: Optional[Callable[[BaseException], Any]] = None) -> bool:
+        """Queue `fn` behind any earlier updates for `user_key`; `on_failure` is called with its error if it fails.
+
+        Returns False if the shard stayed full for longer than `submit_timeout`, so the
+        caller can run the update itself.
+        """
+        self._ensure_started()
+        queue = self._queues[hash(user_key) % self.num_workers]
+        job = MemoryUpdateJob(user_key=user_key, fn=fn, on_failure=on_failure)
+
+        async def enqueue() -> bool:
+            try:
+                if self.submit_timeout <= 0:
+                    queue.put_nowait(job)
+                else:
+                    await asyncio.wait_for(queue.put(job), timeout=self.submit_timeout)
+                return True
+            except (asyncio.QueueFull, asyncio.TimeoutError):
+                return False
+
+        started = time.monotonic()
+        accepted = asyncio.run_coroutine_threadsafe(enqueue(), self._loop).result()
+
+        with self._metrics_lock:
+            self.backpressure_seconds += time.monotonic() - started
+            if accepted:
+                self.submitted += 1
+                self.max_depth = max(self.max_depth, queue.qsize())
+            else:
+                self.rejected += 1
+        return accepted
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Block until every queued job has run, e.g. in tests or before shutdown."""
+        if self._loop is None:
+            return
+
+        async def wait_all():
+            await asyncio.gather(*(queue.join() for queue in self._queues))
+
+        asyncio.run_coroutine_threadsafe(wait_all(), self._loop).result(timeout=timeout)
+
+    def metrics(self) -> dict[str, Any]:
+        """Throughput and backpressure counters, plus the current depth of each shard."""
+        with self._metrics_lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "in_flight": self.submitted - self.completed - self.failed,
+                "queue_depths": [queue.qsize() for queue in self._queues],
+                "max_depth": self.max_depth,
+                "backpressure_seconds": self.backpressure_seconds,
+                "avg_queue_wait_seconds": self.queue_wait_seconds / max(self.completed + self.failed, 1),
+                "last_error": self.last_error,
+            }
+
+# Shared by every run in the process
+memory_update_worker = MemoryUpdateWorker()
@@ -1,24 +1,29 @@
+import functools
 import uuid
 from datetime import datetime
 
 from pydantic import BaseModel, Field
 
-from trustcall import create_extractor
-
-from typing import Literal, Optional, TypedDict
+from typing import Annotated, Literal, Optional, TypedDict
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import merge_message_runs
 from langchain_core.messages import SystemMessage, HumanMessage
 
-from langchain_openai import ChatOpenAI
-
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import StateGraph, MessagesState, START, END
+from langgraph.graph import StateGraph, START, END
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
+from langgraph.types import Send
 
 import configuration
+from delta_messages import MessagesBase
+from extractors import extractor_registry
+from lazy import chat_model
+from memory_renderer import count_tokens, render_within_budget
+from memory_snapshot import MemorySnapshotCache
+from memory_worker import memory_update_worker
+from watermarks import merge_watermarks, messages_since, record_failed_update, take_failed_updates
 
 ## Utilities 
 
@@ -38,6 +43,22 @@ class Spy:
                     r.outputs["generations"][0][0]["message"]["kwargs"]["tool_calls"]
                 )
 
+# IDs of the UpdateMemory tool calls of one type in the latest message
+def update_tool_call_ids(state, update_type):
+    """Each update node answers every UpdateMemory call of its type, so the graph can fan out by type."""
+    return [tool_call['id'] for tool_call in state['messages'][-1].tool_calls
+            if tool_call['args']['update_type'] == update_type]
+
+# Messages not yet mined into one memory type
+def unmined_messages(state, update_type):
+    """The messages after this memory type's watermark, leaving out the UpdateMemory call itself."""
+    watermark = (state.get("memory_watermarks") or {}).get(update_type)
+    return messages_since(state["messages"][:-1], watermark)
+
+# Watermark update recording that a memory type has seen every message before the UpdateMemory call
+def advance_watermark(state, update_type):
+    return {update_type: state["messages"][-2].id}
+
 # Extract information from tool calls for both patches and new memories in Trustcall
 def extract_tool_info(tool_calls, schema_name="Memory"):
     """Extract information from tool calls for both patches and new memories.
@@ -97,6 +118,12 @@ def extract_tool_info(tool_calls, schema_name="Memory"):
 
 ## Schema definitions
 
+# Graph state: the chat history plus, per memory type, the ID of the last message already extracted
+class State(MessagesBase):
+    memory_watermarks: Annotated[dict[str, str], merge_watermarks]
+    # Unique to each invocation, set by start_run; keys the run's memory snapshot
+    memory_run_key: str
+
 # User profile schema
 class Profile(BaseModel):
     """This is the profile of the user you are chatting with"""
@@ -137,15 +164,29 @@ class UpdateMemory(TypedDict):
     """ Decision on what memory type to update """
     update_type: Literal['user', 'todo', 'instructions']
 
-# Initialize the model
-model = ChatOpenAI(model="gpt-4o", temperature=0)
+# Initialize the model, built on first use
+def model():
+    return chat_model(temperature=0)
+
+# Per-run cache of the profile, ToDo and instruction memories
+memory_snapshots = MemorySnapshotCache()
+
+def releases_snapshot(node):
+    """Discard the run's memory snapshot if `node` raises, since the run then never reaches END."""
+    @functools.wraps(node)
+    def wrapper(state, config, store):
+        try:
+            return node(state, config, store)
+        except BaseException:
+            memory_snapshots.discard(state.get("memory_run_key"))
+            raise
+    return wrapper
 
-## Create the Trustcall extractors for updating the user profile and ToDo list
-profile_extractor = create_extractor(
-    model,
-    tools=[Profile],
-    tool_choice="Profile",
-)
+# Maximum number of open ToDos considered for the system prompt, before the token budget is applied
+TODO_PROMPT_LIMIT = 200
+
+## The Trustcall extractors for updating the user profile and ToDo list are built
+## once per process by `extractor_registry` and shared across runs
 
 ## Prompts 
 
@@ -180,6 +221,7 @@ Here are your instructions for reasoning about the user's messages:
 - If personal information was provided about the user, update the user's profile by calling UpdateMemory tool with type `user`
 - If tasks are mentioned, update the ToDo list by calling UpdateMemory tool with type `todo`
 - If the user has specified preferences for how to update the ToDo list, update the instructions by calling UpdateMemory tool with type `instructions`
+- If more than one type of memory needs updating, call UpdateMemory once for each type in the same message
 
 3. Tell the user that you have updated your memory, if appropriate:
 - Do not tell the user you have updated the user's profile
@@ -210,9 +252,20 @@ Your current instructions are:
 {current_instructions}
 </current_instructions>"""
 
+# Added to the system prompt when memory updates run in the background, since no second model call follows the tool call
+BACKGROUND_UPDATE_INSTRUCTION = """
+
+Memory updates are saved in the background. Whenever you call the UpdateMemory tool, also write your complete reply to the user in the same message."""
+
 ## Node definitions
 
-def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore):
+def start_run(state: State):
+
+    """Give this invocation its own key for the memory snapshot, so nothing is reused from an earlier run on the thread."""
+    return {"memory_run_key": uuid.uuid4().hex}
+
+@releases_snapshot
+def task_mAIstro(state: State, config: RunnableConfig, store: BaseStore):
 
     """Load memories from the store and use them to personalize the chatbot's response."""
     
@@ -221,36 +274,44 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
     user_id = configurable.user_id
     todo_category = configurable.todo_category
     task_maistro_role = configurable.task_maistro_role
+    memory_token_budget = configurable.memory_token_budget
 
-   # Retrieve profile memory from the store
-    namespace = ("profile", todo_category, user_id)
-    memories = store.search(namespace)
+    # Retrieve the profile, ToDo and instruction memories in a single store round trip
+    snapshot = memory_snapshots.load(store, state["memory_run_key"], todo_category, user_id)
+
+    # Retrieve profile memory from the snapshot
+    memories = snapshot.profile
     if memories:
         user_profile = memories[0].value
     else:
         user_profile = None
 
-    # Retrieve people memory from the store
-    namespace = ("todo", todo_category, user_id)
-    memories = store.search(namespace)
-    todo = "\n".join(f"{mem.value}" for mem in memories)
-
     # Retrieve custom instructions
-    namespace = ("instructions", todo_category, user_id)
-    memories = store.search(namespace)
+    memories = snapshot.instructions
     if memories:
         instructions = memories[0].value
     else:
         instructions = ""
+
+    # The profile and instructions are always shown; ToDos share the rest of the token budget
+    todo_budget = memory_token_budget - count_tokens(f"{user_profile}") - count_tokens(f"{instructions}")
+
+    # Rank the open ToDos by relevance to the latest user message and by recency, and pack them into the budget
+    latest_user_message = next((m.content for m in reversed(state["messages"]) if m.type == "human"), "")
+    memories = snapshot.todos(store).due_soonest(TODO_PROMPT_LIMIT)
+    todo, _ = render_within_budget(memories, f"{latest_user_message}", todo_budget)
     
     system_msg = MODEL_SYSTEM_MESSAGE.format(task_maistro_role=task_maistro_role, user_profile=user_profile, todo=todo, instructions=instructions)
+    if configurable.background_memory_updates:
+        system_msg += BACKGROUND_UPDATE_INSTRUCTION
 
     # Respond using memory as well as the chat history
-    response = model.bind_tools([UpdateMemory], parallel_tool_calls=False).invoke([SystemMessage(content=system_msg)]+state["messages"])
+    response = model().bind_tools([UpdateMemory]).invoke([SystemMessage(content=system_msg)]+state["messages"])
 
     return {"messages": [response]}
 
-def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStore):
+@releases_snapshot
+def update_profile(state: State, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
@@ -262,8 +323,8 @@ def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStor
     # Define the namespace for the memories
     namespace = ("profile", todo_category, user_id)
 
-    # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    # Retrieve the most recent memories for context, reusing this run's snapshot
+    existing_items = memory_snapshots.load(store, state["memory_run_key"], todo_category, user_id).profile
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "Profile"
@@ -275,23 +336,27 @@ def update_profile(state: MessagesState, config: RunnableConfig, store: BaseStor
 
     # Merge the chat history and the instruction
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + unmined_messages(state, "user")))
 
     # Invoke the extractor
-    result = profile_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
+    result = extractor_registry.invoke(model(), Profile,
+                                       {"messages": updated_messages,
+                                        "existing": existing_memories},
+                                       tool_choice=tool_name)
 
     # Save save the memories from Trustcall to the store
     for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
+        memory_snapshots.put(store, state["memory_run_key"], namespace,
                   rmeta.get("json_doc_id", str(uuid.uuid4())),
                   r.model_dump(mode="json"),
             )
-    tool_calls = state['messages'][-1].tool_calls
     # Return tool message with update verification
-    return {"messages": [{"role": "tool", "content": "updated profile", "tool_call_id":tool_calls[0]['id']}]}
+    return {"messages": [{"role": "tool", "content": "updated profile", "tool_call_id":tool_call_id}
+                         for tool_call_id in update_tool_call_ids(state, "user")],
+            "memory_watermarks": advance_watermark(state, "user")}
 
-def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore):
+@releases_snapshot
+def update_todos(state: State, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
@@ -300,11 +365,11 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
     user_id = configurable.user_id
     todo_category = configurable.todo_category
 
-    # Define the namespace for the memories
-    namespace = ("todo", todo_category, user_id)
-
-    # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    # Retrieve every ToDo for context, paging through the store
+    todos = memory_snapshots.load(store, state["memory_run_key"], todo_category, user_id).todos(store)
+    existing_items = todos.list_all()
+    # Index any ToDos that were written to the store without going through the repository
+    todos.sync_index(existing_items)
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "ToDo"
@@ -316,38 +381,35 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
 
     # Merge the chat history and the instruction
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + unmined_messages(state, "todo")))
 
     # Initialize the spy for visibility into the tool calls made by Trustcall
     spy = Spy()
     
-    # Create the Trustcall extractor for updating the ToDo list 
-    todo_extractor = create_extractor(
-    model,
-    tools=[ToDo],
-    tool_choice=tool_name,
-    enable_inserts=True
-    ).with_listeners(on_end=spy)
-
-    # Invoke the extractor
-    result = todo_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
-
-    # Save save the memories from Trustcall to the store
+    # Invoke the shared Trustcall extractor for updating the ToDo list, with this call's spy
+    result = extractor_registry.invoke(model(), ToDo,
+                                       {"messages": updated_messages,
+                                        "existing": existing_memories},
+                                       tool_choice=tool_name,
+                                       enable_inserts=True,
+                                       on_end=spy)
+
+    # Save save the memories from Trustcall to the store, keeping the ToDo index up to date
     for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
+        todos.put(rmeta.get("json_doc_id", str(uuid.uuid4())),
                   r.model_dump(mode="json"),
             )
+    memory_snapshots.invalidate(store, state["memory_run_key"], todo_category, user_id)
         
     # Respond to the tool call made in task_mAIstro, confirming the update    
-    tool_calls = state['messages'][-1].tool_calls
-
     # Extract the changes made by Trustcall and add the the ToolMessage returned to task_mAIstro
     todo_update_msg = extract_tool_info(spy.called_tools, tool_name)
-    return {"messages": [{"role": "tool", "content": todo_update_msg, "tool_call_id":tool_calls[0]['id']}]}
+    return {"messages": [{"role": "tool", "content": todo_update_msg, "tool_call_id":tool_call_id}
+                         for tool_call_id in update_tool_call_ids(state, "todo")],
+            "memory_watermarks": advance_watermark(state, "todo")}
 
-def update_instructions(state: MessagesState, config: RunnableConfig, store: BaseStore):
+@releases_snapshot
+def update_instructions(state: State, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
@@ -358,52 +420,129 @@ def update_instructions(state: MessagesState, config: RunnableConfig, store: Bas
     
     namespace = ("instructions", todo_category, user_id)
 
-    existing_memory = store.get(namespace, "user_instructions")
+    existing_memory = memory_snapshots.load(store, state["memory_run_key"], todo_category, user_id).get("instructions", "user_instructions")
         
     # Format the memory in the system prompt
     system_msg = CREATE_INSTRUCTIONS.format(current_instructions=existing_memory.value if existing_memory else None)
-    new_memory = model.invoke([SystemMessage(content=system_msg)]+state['messages'][:-1] + [HumanMessage(content="Please update the instructions based on the conversation")])
+    new_memory = model().invoke([SystemMessage(content=system_msg)]+unmined_messages(state, "instructions") + [HumanMessage(content="Please update the instructions based on the conversation")])
 
     # Overwrite the existing memory in the store 
     key = "user_instructions"
-    store.put(namespace, key, {"memory": new_memory.content})
-    tool_calls = state['messages'][-1].tool_calls
+    memory_snapshots.put(store, state["memory_run_key"], namespace, key, {"memory": new_memory.content})
     # Return tool message with update verification
-    return {"messages": [{"role": "tool", "content": "updated instructions", "tool_call_id":tool_calls[0]['id']}]}
+    return {"messages": [{"role": "tool", "content": "updated instructions", "tool_call_id":tool_call_id}
+                         for tool_call_id in update_tool_call_ids(state, "instructions")],
+            "memory_watermarks": advance_watermark(state, "instructions")}
+
+# Memory update node for each UpdateMemory type
+UPDATE_NODES = {
+    "user": update_profile,
+    "todo": update_todos,
+    "instructions": update_instructions,
+}
+
+def run_memory_update(update_type: str, state: State, config: RunnableConfig, store: BaseStore):
+
+    """Run a memory update node outside of the graph, e.g. on the background worker."""
+    try:
+        UPDATE_NODES[update_type](state, config, store)
+    finally:
+        # The update ran under its own run key, so release its snapshot
+        memory_snapshots.discard(state["memory_run_key"])
+
+@releases_snapshot
+def schedule_memory_updates(state: State, config: RunnableConfig, store: BaseStore):
+
+    """Queue the requested memory updates on the background worker and confirm the tool calls right away."""
+
+    # Get the user ID from the config
+    configurable = configuration.Configuration.from_runnable_config(config)
+    user_id = configurable.user_id
+    todo_category = configurable.todo_category
+    thread_id = str(config.get("configurable", {}).get("thread_id", "default"))
+
+    # Roll back the watermarks of earlier background updates that failed, so their messages are mined again
+    rolled_back = take_failed_updates(store, todo_category, user_id, thread_id)
+    previous_watermarks = {**(state.get("memory_watermarks") or {}), **rolled_back}
+
+    # The job outlives this run, so it gets a copy of the messages and a config of its own
+    job_state = {"messages": list(state["messages"]), "memory_watermarks": previous_watermarks,
+                 "memory_run_key": f"memory-update-{uuid.uuid4()}"}
+    job_config = {"configurable": {"user_id": user_id,
+                                   "todo_category": todo_category}}
+
+    # One job per memory type, like the inline path, answering every tool call of that type
+    update_types = list(dict.fromkeys(tool_call['args']['update_type'] for tool_call in state['messages'][-1].tool_calls))
+    if any(update_type not in UPDATE_NODES for update_type in update_types):
+        raise ValueError
+
+    tool_messages = []
+    watermarks = dict(rolled_back)
+    for update_type in update_types:
+        # Updates for the same user are applied in order; if the shard is full, update inline instead.
+        # The watermark is advanced now so the next turn does not queue the same messages again;
+        # if the job fails, it records the watermark to roll back to on the thread's next update.
+        queued = memory_update_worker.submit(
+            f"{todo_category}:{user_id}",
+            lambda update_type=update_type: run_memory_update(update_type, job_state, job_config, store),
+            on_failure=lambda error, update_type=update_type: record_failed_update(
+                store, todo_category, user_id, thread_id, update_type, previous_watermarks.get(update_type)),
+        )
+        if not queued:
+            run_memory_update(update_type, job_state, job_config, store)
+        tool_messages.extend({"role": "tool", "content": f"{update_type} memory update {'queued' if queued else 'applied'}", "tool_call_id": tool_call_id}
+                             for tool_call_id in update_tool_call_ids(state, update_type))
+        watermarks.update(advance_watermark(state, update_type))
+
+    # The reply already went out with the tool call, so the run ends here
+    memory_snapshots.discard(state["memory_run_key"])
+    return {"messages": tool_messages, "memory_watermarks": watermarks}
 
 # Conditional edge
-def route_message(state: MessagesState, config: RunnableConfig, store: BaseStore) -> Literal[END, "update_todos", "update_instructions", "update_profile"]:
+def route_message(state: State, config: RunnableConfig, store: BaseStore) -> Literal[END, "update_todos", "update_instructions", "update_profile", "schedule_memory_updates"]:
 
     """Reflect on the memories and chat history to decide whether to update the memory collection."""
     message = state['messages'][-1]
     if len(message.tool_calls) ==0:
+        # The run is ending, so release its memory snapshot
+        memory_snapshots.discard(state["memory_run_key"])
         return END
+    elif configuration.Configuration.from_runnable_config(config).background_memory_updates:
+        return "schedule_memory_updates"
     else:
-        tool_call = message.tool_calls[0]
-        if tool_call['args']['update_type'] == "user":
-            return "update_profile"
-        elif tool_call['args']['update_type'] == "todo":
-            return "update_todos"
-        elif tool_call['args']['update_type'] == "instructions":
-            return "update_instructions"
-        else:
-            raise ValueError
+        # Dispatch one update per memory type concurrently; their tool messages are
+        # joined before task_mAIstro runs again
+        sends = []
+        for update_type in dict.fromkeys(tool_call['args']['update_type'] for tool_call in message.tool_calls):
+            if update_type == "user":
+                sends.append(Send("update_profile", state))
+            elif update_type == "todo":
+                sends.append(Send("update_todos", state))
+            elif update_type == "instructions":
+                sends.append(Send("update_instructions", state))
+            else:
+                raise ValueError
+        return sends
 
 # Create the graph + all nodes
-builder = StateGraph(MessagesState, config_schema=configuration.Configuration)
+builder = StateGraph(State, config_schema=configuration.Configuration)
 
 # Define the flow of the memory extraction process
+builder.add_node(start_run)
 builder.add_node(task_mAIstro)
 builder.add_node(update_todos)
 builder.add_node(update_profile)
 builder.add_node(update_instructions)
+builder.add_node(schedule_memory_updates)
 
 # Define the flow 
-builder.add_edge(START, "task_mAIstro")
+builder.add_edge(START, "start_run")
+builder.add_edge("start_run", "task_mAIstro")
 builder.add_conditional_edges("task_mAIstro", route_message)
 builder.add_edge("update_todos", "task_mAIstro")
 builder.add_edge("update_profile", "task_mAIstro")
 builder.add_edge("update_instructions", "task_mAIstro")
+builder.add_edge("schedule_memory_updates", END)
 
 # Compile the graph
 graph = builder.compile()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.store.memory import InMemoryStore
+
+import task_maistro
+from memory_worker import MemoryUpdateWorker
+
+CONFIG = {"configurable": {"user_id": "lance", "thread_id": "thread-1", "background_memory_updates": True}}
+
+def turn(text: str, n: int) -> list:
+    return [HumanMessage(content=text, id=f"human-{n}"),
+            AIMessage(content="", id=f"ai-{n}", tool_calls=[{"name": "UpdateMemory", "args": {"update_type": "todo"}, "id": f"call-{n}"}])]
+
+def test_failed_background_update_rolls_the_watermark_back(monkeypatch):
+    store = InMemoryStore()
+    worker = MemoryUpdateWorker(num_workers=1)
+    mined = []
+
+    def run_memory_update(update_type, state, config, store):
+        messages = task_maistro.unmined_messages(state, update_type)
+        mined.append([m.id for m in messages])
+        if len(mined) == 1:
+            raise RuntimeError("Trustcall timed out")
+
+    monkeypatch.setattr(task_maistro, "memory_update_worker", worker)
+    monkeypatch.setattr(task_maistro, "run_memory_update", run_memory_update)
+
+    state = {"messages": turn("Add a ToDo: book flights", 1), "memory_watermarks": {}, "memory_run_key": "run-1"}
+    update = task_maistro.schedule_memory_updates(state, CONFIG, store)
+    assert update["memory_watermarks"] == {"todo": "human-1"}
+    worker.join(timeout=5)
+    assert worker.metrics()["failed"] == 1
+
+    # The next update starts from before the failed job's messages again
+    state = {"messages": state["messages"] + turn("Also renew my passport", 2), "memory_watermarks": update["memory_watermarks"], "memory_run_key": "run-2"}
+    update = task_maistro.schedule_memory_updates(state, CONFIG, store)
+    worker.join(timeout=5)
+    assert mined[1] == ["human-1", "ai-1", "human-2"]
+    assert update["memory_watermarks"] == {"todo": "human-2"}
+    assert task_maistro.take_failed_updates(store, "general", "lance", "thread-1") == {}
+
+def test_timed_out_jobs_call_on_failure():
+    worker = MemoryUpdateWorker(num_workers=1, job_timeout=0.01)
+    errors = []
+    worker.submit("general:lance", lambda: time.sleep(0.2), on_failure=errors.append)
+    worker.join(timeout=5)
+    assert len(errors) == 1 and worker.metrics()["failed"] == 1
+
+def test_repeated_update_types_queue_one_job_and_answer_every_call(monkeypatch):
+    worker = MemoryUpdateWorker(num_workers=1)
+    runs = []
+    monkeypatch.setattr(task_maistro, "memory_update_worker", worker)
+    monkeypatch.setattr(task_maistro, "run_memory_update", lambda update_type, state, config, store: runs.append(update_type))
+
+    calls = [{"name": "UpdateMemory", "args": {"update_type": update_type}, "id": f"call-{i}"}
+             for i, update_type in enumerate(["todo", "todo", "user"])]
+    state = {"messages": [HumanMessage(content="Add two ToDos", id="human-1"), AIMessage(content="", id="ai-1", tool_calls=calls)], "memory_run_key": "run-1"}
+    update = task_maistro.schedule_memory_updates(state, CONFIG, InMemoryStore())
+    worker.join(timeout=5)
+    assert sorted(runs) == ["todo", "user"]
+    assert sorted(message["tool_call_id"] for message in update["messages"]) == ["call-0", "call-1", "call-2"]
+
+def test_full_shard_is_rejected_without_waiting():
+    worker = MemoryUpdateWorker(num_workers=1, max_queue_size=1)
+    release = threading.Event()
+    assert worker.submit("general:lance", release.wait)
+    # The first job is running, so this one fills the queue
+    while not worker.submit("general:lance", lambda: None):
+        time.sleep(0.01)
+    start = time.monotonic()
+    assert not worker.submit("general:lance", lambda: None)
+    assert time.monotonic() - start < 1
+    release.set()
+    worker.join(timeout=5)
+    assert worker.metrics()["rejected"] >= 1
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from langgraph.store.base import Item
+
+from memory_renderer import count_tokens, render_item, render_within_budget
+
+NOW = datetime(2026, 1, 15, tzinfo=timezone.utc)
+
+def todo(key: str, task: str, days_old: float = 0.0) -> Item:
+    updated_at = NOW - timedelta(days=days_old)
+    return Item(value={"task": task}, key=key, namespace=("todo", "general", "lance"), created_at=updated_at, updated_at=updated_at)
+
+def cost(item: Item) -> int:
+    # Each rendered item also costs its newline separator
+    return count_tokens(render_item(item)) + 1
+
+ITEMS = [
+    todo("old", "Renew passport", days_old=30),
+    todo("relevant", "Book flights to Lisbon for the conference", days_old=10),
+    todo("recent", "Call the plumber about the sink"),
+]
+
+def test_items_are_rendered_best_score_first():
+    rendered, _ = render_within_budget(ITEMS, "flights to Lisbon", 10_000, now=NOW)
+    assert rendered.split("\n") == [render_item(ITEMS[1]), render_item(ITEMS[2]), render_item(ITEMS[0])]
+
+def test_lowest_scoring_items_are_dropped_first():
+    budget = cost(ITEMS[1]) + cost(ITEMS[2])
+    rendered, used = render_within_budget(ITEMS, "flights to Lisbon", budget, now=NOW)
+    assert rendered.split("\n") == [render_item(ITEMS[1]), render_item(ITEMS[2])]
+    assert used == budget
+
+def test_an_item_that_does_not_fit_is_skipped_for_smaller_ones():
+    # Room for the best item and the old one, but not the recent one ranked between them
+    budget = cost(ITEMS[1]) + cost(ITEMS[0])
+    assert cost(ITEMS[2]) > cost(ITEMS[0])
+    rendered, used = render_within_budget(ITEMS, "flights to Lisbon", budget, now=NOW)
+    assert rendered.split("\n") == [render_item(ITEMS[1]), render_item(ITEMS[0])]
+    assert used == budget
+
+def test_budget_boundary():
+    item = ITEMS[0]
+    rendered, used = render_within_budget([item], "", cost(item), now=NOW)
+    assert (rendered, used) == (render_item(item), cost(item))
+    assert render_within_budget([item], "", cost(item) - 1, now=NOW) == ("", 0)
+    assert render_within_budget(ITEMS, "", 0, now=NOW) == ("", 0)
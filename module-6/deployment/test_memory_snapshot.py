@@ -0,0 +1,31 @@
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.store.memory import InMemoryStore
+
+import task_maistro
+from fake_chat_model import FakeChatModel
+
+CONFIG = {"configurable": {"thread_id": "thread-1", "user_id": "lance"}}
+
+def test_each_run_gets_its_own_snapshot_and_a_failed_run_releases_it(monkeypatch):
+    graph = task_maistro.builder.compile(checkpointer=MemorySaver(), store=InMemoryStore())
+    run_keys = []
+    load, render = task_maistro.memory_snapshots.load, task_maistro.render_within_budget
+    monkeypatch.setattr(task_maistro.memory_snapshots, "load", lambda store, run_key, *args: run_keys.append(run_key) or load(store, run_key, *args))
+    monkeypatch.setattr(task_maistro, "model", lambda: FakeChatModel(responses=["Hello!"]))
+
+    def render_failing_once(*args):
+        if len(run_keys) == 1:
+            raise RuntimeError("renderer failed")
+        return render(*args)
+
+    # The first run fails after loading its snapshot, so it never reaches END
+    monkeypatch.setattr(task_maistro, "render_within_budget", render_failing_once)
+    with pytest.raises(RuntimeError):
+        graph.invoke({"messages": [("user", "Hi")]}, CONFIG)
+    assert len(task_maistro.memory_snapshots) == 0
+
+    graph.invoke({"messages": [("user", "Hi again")]}, CONFIG)
+    assert len(task_maistro.memory_snapshots) == 0
+    # Same thread, but the second run never sees the first run's key
+    assert len(run_keys) == 2 and run_keys[0] != run_keys[1]
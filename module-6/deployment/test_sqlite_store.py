@@ -0,0 +1,70 @@
+import random
+import sqlite3
+
+import pytest
+from langgraph.store.memory import InMemoryStore
+
+from sqlite_store import SqliteStore
+
+NAMESPACES = [("memories", "lance"), ("memories", "lance", "work"), ("memories", "ada"), ("todo", "general", "lance")]
+
+def fill(stores: list, seed: int = 0, writes: int = 300) -> None:
+    """Apply the same random puts, updates and deletes to every store."""
+    rng = random.Random(seed)
+    for i in range(writes):
+        namespace, key = rng.choice(NAMESPACES), f"key-{rng.randrange(40)}"
+        value = None if rng.random() < 0.1 else {"memory": f"fact {i}", "kind": rng.choice(["a", "b"]), "n": rng.randrange(5)}
+        for store in stores:
+            if value is None:
+                store.delete(namespace, key)
+            else:
+                store.put(namespace, key, value)
+
+def listing(items) -> list:
+    return [(item.namespace, item.key, item.value) for item in items]
+
+@pytest.fixture
+def stores(tmp_path):
+    memory, sqlite = InMemoryStore(), SqliteStore(str(tmp_path / "store.db"))
+    fill([memory, sqlite])
+    yield memory, sqlite
+    sqlite.close()
+
+@pytest.mark.parametrize("prefix", [(), ("memories",), ("memories", "lance"), ("memories", "lance", "work"), ("todo",), ("missing",)])
+def test_search_matches_in_memory_store(stores, prefix):
+    memory, sqlite = stores
+    assert listing(sqlite.search(prefix, limit=1000)) == listing(memory.search(prefix, limit=1000))
+
+@pytest.mark.parametrize("filter", [{"kind": "a"}, {"n": {"$gte": 2}}, {"kind": "b", "n": {"$ne": 0}}])
+def test_filtered_search_matches_in_memory_store(stores, filter):
+    memory, sqlite = stores
+    assert listing(sqlite.search(("memories",), filter=filter, limit=1000)) == listing(memory.search(("memories",), filter=filter, limit=1000))
+
+def test_paging_matches_in_memory_store(stores):
+    memory, sqlite = stores
+    for offset in range(0, 60, 7):
+        assert listing(sqlite.search(("memories",), limit=7, offset=offset)) == listing(memory.search(("memories",), limit=7, offset=offset))
+
+def test_paging_is_stable_under_updates(tmp_path):
+    store = SqliteStore(str(tmp_path / "store.db"))
+    for i in range(20):
+        store.put(("memories", "lance"), f"key-{i}", {"n": i})
+    first_page = store.search(("memories", "lance"), limit=10)
+    # Updating items already read must not move them onto a later page
+    for item in first_page:
+        store.put(("memories", "lance"), item.key, {"n": -1})
+    second_page = store.search(("memories", "lance"), limit=10, offset=10)
+    assert [item.key for item in first_page + second_page] == [f"key-{i}" for i in range(20)]
+
+def test_databases_without_rowid_are_migrated(tmp_path):
+    path = str(tmp_path / "store.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE store (prefix TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,
+                        created_at TEXT NOT NULL, updated_at TEXT NOT NULL, PRIMARY KEY (prefix, key)) WITHOUT ROWID;
+    INSERT INTO store VALUES ('memories.lance', 'b', '{"n": 1}', '2026-01-01T00:00:00+00:00', '2026-01-03T00:00:00+00:00');
+    INSERT INTO store VALUES ('memories.lance', 'a', '{"n": 2}', '2026-01-02T00:00:00+00:00', '2026-01-02T00:00:00+00:00');
+    """)
+    conn.close()
+    store = SqliteStore(path)
+    assert [item.key for item in store.search(("memories", "lance"))] == ["b", "a"]
@@ -0,0 +1,89 @@
+import threading
+
+from langgraph.store.memory import InMemoryStore
+
+from memory_snapshot import MemorySnapshotCache
+from sqlite_store import SqliteStore
+from todo_repository import TodoRepository
+
+def todo(status: str, deadline: str = None) -> dict:
+    return {"task": "Task", "status": status, "deadline": deadline}
+
+def test_concurrent_writers_keep_each_others_entries(tmp_path):
+    # SqliteStore copies values like a deployed store, so writers cannot share an index by reference
+    store = SqliteStore(str(tmp_path / "store.db"))
+    TodoRepository(store, "general", "lance").rebuild_index()
+    # Both writers load the index before either writes, as two overlapping update_todos runs do
+    writers = [TodoRepository(store, "general", "lance") for _ in range(2)]
+    for writer in writers:
+        writer.index()
+    barrier = threading.Barrier(len(writers))
+
+    def write(i: int) -> None:
+        barrier.wait()
+        for j in range(50):
+            writers[i].put(f"todo-{i}-{j}", todo("not started"))
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(len(writers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    index = TodoRepository(store, "general", "lance").index()
+    assert set(index) == {f"todo-{i}-{j}" for i in range(2) for j in range(50)}
+
+def test_todos_written_outside_the_repository_are_indexed_on_sync():
+    store = InMemoryStore()
+    repository = TodoRepository(store, "general", "lance")
+    repository.put("indexed", todo("not started", "2026-03-01"))
+    store.put(("todo", "general", "lance"), "external", todo("in progress", "2026-01-01"))
+    store.put(("todo", "general", "lance"), "indexed", todo("done", "2026-03-01"))
+
+    repository = TodoRepository(store, "general", "lance")
+    repository.sync_index(repository.list_all())
+
+    due = TodoRepository(store, "general", "lance").due_soonest(10)
+    assert [item.key for item in due] == ["external"]
+
+def test_existing_todos_are_indexed_when_the_index_is_missing():
+    store = InMemoryStore()
+    store.put(("todo", "general", "lance"), "old", todo("not started"))
+    assert [item.key for item in TodoRepository(store, "general", "lance").due_soonest(10)] == ["old"]
+
+def test_put_does_not_change_the_cached_snapshot_index():
+    store = InMemoryStore()
+    TodoRepository(store, "general", "lance").put("first", todo("not started"))
+    snapshots = MemorySnapshotCache()
+    snapshot = snapshots.load(store, "run", "general", "lance")
+    snapshot.todos(store).put("second", todo("not started"))
+    assert set(snapshot.todo_index) == {"first"}
+
+def test_deleted_todos_are_dropped_from_the_index_on_sync():
+    store = InMemoryStore()
+    repository = TodoRepository(store, "general", "lance")
+    repository.put("deleted", todo("not started", "2026-01-01"))
+    repository.put("kept", todo("not started", "2026-02-01"))
+    store.delete(("todo", "general", "lance"), "deleted")
+
+    repository = TodoRepository(store, "general", "lance")
+    repository.sync_index(repository.list_all())
+    assert set(TodoRepository(store, "general", "lance").index()) == {"kept"}
+    assert [item.key for item in TodoRepository(store, "general", "lance").due_soonest(1)] == ["kept"]
+
+def test_deadlines_are_ordered_by_instant_across_utc_offsets():
+    repository = TodoRepository(InMemoryStore(), "general", "lance")
+    repository.put("naive", todo("not started", "2026-03-01T06:00:00"))
+    repository.put("offset", todo("not started", "2026-03-01T10:00:00+05:00"))
+    repository.put("utc", todo("not started", "2026-03-01T05:30:00Z"))
+    repository.put("none", todo("not started"))
+    assert [item.key for item in repository.due_soonest(10)] == ["offset", "utc", "naive", "none"]
+
+def test_reading_a_missing_index_does_not_write_it():
+    store = InMemoryStore()
+    store.put(("todo", "general", "lance"), "old", todo("not started"))
+    assert [item.key for item in TodoRepository(store, "general", "lance").due_soonest(10)] == ["old"]
+    assert store.search(("todo_index", "general", "lance")) == []
+
+    TodoRepository(store, "general", "lance").put("new", todo("not started"))
+    assert set(TodoRepository(store, "general", "lance").index()) == {"old", "new"}
@@ -0,0 +1,156 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from langgraph.store.base import BaseStore, GetOp, Item, PutOp
+
+## Complete, indexed access to a user's ToDo list
+
+# Statuses that count as open work
+OPEN_STATUSES = ("not started", "in progress")
+
+# Where the status / deadline index for a ToDo list is kept: one item per ToDo key,
+# plus a marker item that records the index has been built
+INDEX_NAMESPACE = "todo_index"
+INDEX_MARKER_KEY = "__index__"
+
+# Number of items requested per store.search call
+PAGE_SIZE = 100
+
+def search_all(store: BaseStore, namespace: tuple[str, ...], page_size: int = PAGE_SIZE) -> list[Item]:
+    """Page through every item in a namespace instead of stopping at the store's default limit."""
+    items = []
+    offset = 0
+    while True:
+        page = store.search(namespace, limit=page_size, offset=offset)
+        items.extend(page)
+        if len(page) < page_size:
+            return items
+        offset += page_size
+
+def index_entry(value: dict[str, Any]) -> list[Optional[str]]:
+    """The index only keeps the fields needed to rank a ToDo: its status and deadline."""
+    return [value.get("status"), value.get("deadline")]
+
+def deadline_key(deadline: Optional[str]) -> tuple[bool, datetime]:
+    """Sort key for a stored deadline: ToDos without a readable deadline go last.
+
+    Deadlines are parsed rather than compared as ISO strings, so values with different
+    UTC offsets sort by the instant they name. A deadline without an offset is taken as UTC.
+    """
+    try:
+        parsed = datetime.fromisoformat(deadline)
+    except (TypeError, ValueError):
+        return (True, datetime.max.replace(tzinfo=timezone.utc))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (False, parsed.astimezone(timezone.utc))
+
+def index_from_items(items: list[Item]) -> Optional[dict[str, list]]:
+    """Turn the items of an index namespace into {key: [status, deadline]}, or None if it was never built."""
+    if not any(item.key == INDEX_MARKER_KEY for item in items):
+        return None
+    return {item.key: item.value["entry"] for item in items if item.key != INDEX_MARKER_KEY}
+
+class TodoRepository:
+    """ToDo items for a (todo_category, user_id), with a secondary index by status and deadline.
+
+    The index lives in its own namespace, so the prompt can pick the open items due
+    soonest and fetch only those, without reading archived or completed tasks. Each ToDo
+    has its own index entry, so concurrent writers for the same user never overwrite
+    each other's entries. ToDos written to the store directly, or deleted from it, are
+    picked up by `sync_index` the next time the full list is read.
+
+    Reads never write: if the index was never built, `index` works it out from a full
+    scan, and the next `put` or `sync_index` stores it.
+    """
+
+    def __init__(self, store: BaseStore, todo_category: str, user_id: str, index: Optional[dict[str, list]] = None, page_size: int = PAGE_SIZE):
+        self.store = store
+        self.namespace = ("todo", todo_category, user_id)
+        self.index_namespace = (INDEX_NAMESPACE, todo_category, user_id)
+        self.page_size = page_size
+        self._index = index
+        self._stored = index is not None
+
+    def list_all(self) -> list[Item]:
+        """Return every ToDo item, paging through the store."""
+        return search_all(self.store, self.namespace, self.page_size)
+
+    def index(self) -> dict[str, list]:
+        """Return the status / deadline index, worked out from a full scan of the ToDos if it was never stored."""
+        if self._index is None:
+            self._index = index_from_items(search_all(self.store, self.index_namespace, self.page_size))
+            self._stored = self._index is not None
+            if self._index is None:
+                self._index = {item.key: index_entry(item.value) for item in self.list_all()}
+        return self._index
+
+    def rebuild_index(self) -> dict[str, list]:
+        """Scan every ToDo once and store a fresh index."""
+        items = self.list_all()
+        stale = {item.key for item in search_all(self.store, self.index_namespace, self.page_size)} - {item.key for item in items}
+        self.store.batch(
+            [PutOp(self.index_namespace, item.key, {"entry": index_entry(item.value)}) for item in items]
+            + [PutOp(self.index_namespace, key, None) for key in stale - {INDEX_MARKER_KEY}]
+            + [PutOp(self.index_namespace, INDEX_MARKER_KEY, {})]
+        )
+        self._index = {item.key: index_entry(item.value) for item in items}
+        self._stored = True
+        return self._index
+
+    def sync_index(self, items: list[Item]) -> None:
+        """Bring the index in line with a full scan of the ToDos.
+
+        ToDos missing from the index or changed since their entry was written are indexed.
+        An entry is only replaced when the ToDo is newer than it, so a scan that raced
+        with a `put` never overwrites the newer entry. Entries of ToDos absent from the
+        scan are removed once the store confirms the ToDo is gone, so they stop taking
+        `due_soonest` slots.
+        """
+        entries = {item.key: item for item in search_all(self.store, self.index_namespace, self.page_size)}
+        if INDEX_MARKER_KEY not in entries:
+            self.rebuild_index()
+            return
+        index = index_from_items(list(entries.values()))
+        ops = []
+        for item in items:
+            entry = entries.get(item.key)
+            if entry is None or (entry.value["entry"] != index_entry(item.value) and item.updated_at > entry.updated_at):
+                ops.append(PutOp(self.index_namespace, item.key, {"entry": index_entry(item.value)}))
+                index[item.key] = index_entry(item.value)
+        # A ToDo put after the scan started is in the index but not the scan, so check the store
+        scanned = {item.key for item in items}
+        missing = [key for key in entries if key != INDEX_MARKER_KEY and key not in scanned]
+        if missing:
+            found = self.store.batch([GetOp(self.namespace, key) for key in missing])
+            for key, item in zip(missing, found):
+                if item is None:
+                    ops.append(PutOp(self.index_namespace, key, None))
+                    index.pop(key, None)
+        if ops:
+            self.store.batch(ops)
+        self._index = index
+        self._stored = True
+        self._stored = index is not None
+
+    def due_soonest(self, limit: int, statuses: tuple[str, ...] = OPEN_STATUSES) -> list[Item]:
+        """Return up to `limit` ToDos with one of `statuses`, earliest deadline first."""
+        candidates = [(key, deadline) for key, (status, deadline) in self.index().items() if status in statuses]
+        candidates.sort(key=lambda c: deadline_key(c[1]))
+        keys = [key for key, _ in candidates[:limit]]
+        if not keys:
+            return []
+        items = self.store.batch([GetOp(self.namespace, key) for key in keys])
+        return [item for item in items if item is not None]
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        """Write a ToDo and its own index entry in a single batch, storing the whole index first if it never was."""
+        index = self.index()
+        if not self._stored:
+            index = self.rebuild_index()
+        self.store.batch([
+            PutOp(self.namespace, key, value),
+            PutOp(self.index_namespace, key, {"entry": index_entry(value)}),
+        ])
+        # The index may be shared with a cached snapshot, so it is replaced rather than changed in place
+        self._index = {**index, key: index_entry(value)}
@@ -0,0 +1,57 @@
+import math
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+from langchain_core.messages import AnyMessage, get_buffer_string
+
+## Cached token counts for chat messages
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """Load the tiktoken encoding once, or return None if it is not available offline."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a piece of text."""
+    encoding = _encoding()
+    if encoding is None:
+        # Roughly four characters per token for English text
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+class MessageTokenCache:
+    """Token counts per message, computed once per message ID and content."""
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self._counts: OrderedDict[tuple, int] = OrderedDict()
+        self._lock = Lock()
+
+    def count(self, message: AnyMessage) -> int:
+        text = get_buffer_string([message])
+        # The content is part of the key so a message replaced under the same ID is recounted
+        key = (message.id, hash(text))
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        tokens = count_tokens(text) + MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            self._counts[key] = tokens
+            while len(self._counts) > self.maxsize:
+                self._counts.popitem(last=False)
+        return tokens
+
+    def total(self, messages: list[AnyMessage]) -> int:
+        return sum(self.count(m) for m in messages)
+
+# Shared by every run in the process
+message_tokens = MessageTokenCache()
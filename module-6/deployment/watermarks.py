@@ -0,0 +1,47 @@
+from typing import Optional
+
+from langchain_core.messages import AnyMessage
+from langgraph.store.base import BaseStore
+
+## Incremental extraction watermarks
+
+def merge_watermarks(left: Optional[dict[str, str]], right: Optional[dict[str, str]]) -> dict[str, str]:
+    """Reducer for per-memory-type watermarks, so parallel update nodes can each advance their own."""
+    return {**(left or {}), **(right or {})}
+
+def messages_since(messages: list[AnyMessage], watermark: Optional[str]) -> list[AnyMessage]:
+    """Return the messages after the one with ID `watermark`, i.e. those not yet mined into memory.
+
+    If there is no watermark yet, or its message has since been removed from the thread,
+    every message is returned.
+    """
+    if watermark:
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].id == watermark:
+                return messages[i + 1:]
+    return messages
+
+## Failed background updates
+
+# Where a failed background update leaves the watermark its messages started after
+FAILED_UPDATES_NAMESPACE = "failed_memory_updates"
+
+def record_failed_update(store: BaseStore, todo_category: str, user_id: str, thread_id: str, update_type: str, watermark: Optional[str]) -> None:
+    """Remember that a background update of the messages after `watermark` failed, so they are mined again.
+
+    The record lives in the store, so the next turn sees it whichever worker it lands on.
+    An earlier failure for the same thread and memory type is kept, since its watermark
+    is the older one.
+    """
+    namespace = (FAILED_UPDATES_NAMESPACE, todo_category, user_id)
+    key = f"{thread_id}:{update_type}"
+    if store.get(namespace, key) is None:
+        store.put(namespace, key, {"thread_id": thread_id, "update_type": update_type, "watermark": watermark})
+
+def take_failed_updates(store: BaseStore, todo_category: str, user_id: str, thread_id: str) -> dict[str, Optional[str]]:
+    """Return and clear the watermarks to roll back to for a thread, by memory type."""
+    namespace = (FAILED_UPDATES_NAMESPACE, todo_category, user_id)
+    items = store.search(namespace, filter={"thread_id": thread_id})
+    for item in items:
+        store.delete(namespace, item.key)
+    return {item.value["update_type"]: item.value["watermark"] for item in items}
@@ -0,0 +1,34 @@
+"""Check that the modules copied into several studio directories have stayed identical.
+
+Each studio directory is deployed on its own, with `"dependencies": ["."]` in its
+langgraph.json, and its graphs import these modules top-level, so every directory keeps
+its own copy. Edit one copy, then copy it over the others.
+
+    python -m pytest -q test_shared_modules.py
+"""
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent
+
+# Same file name, different module: each directory has its own graph, settings or reducers
+DISTINCT_MODULES = {"agent.py", "configuration.py", "watermarks.py"}
+
+def copies() -> dict[str, list[Path]]:
+    """Every module file name in more than one studio directory, with its copies."""
+    found = defaultdict(list)
+    for config in sorted(ROOT.glob("module-*/*/langgraph.json")):
+        for path in sorted(config.parent.glob("*.py")):
+            found[path.name].append(path)
+    return {name: paths for name, paths in found.items() if len(paths) > 1 and name not in DISTINCT_MODULES}
+
+def test_shared_modules_are_found():
+    assert {"fake_chat_model.py", "lazy.py", "delta_messages.py", "sqlite_store.py", "tokens.py"} <= copies().keys()
+
+@pytest.mark.parametrize("name", sorted(copies()))
+def test_copies_are_identical(name):
+    first, *others = copies()[name]
+    for other in others:
+        assert other.read_bytes() == first.read_bytes(), f"{other.relative_to(ROOT)} differs from {first.relative_to(ROOT)}"